@@ -17,15 +17,25 @@ interface IAgentIdentity {
  *
  *    Tier 2 — Optimistic Settlement (`autoSettle`)
  *      After submission a CHALLENGE_PERIOD window opens.
- *      If no dispute is raised, anyone may call `autoSettle` to release funds.
+ *      If no dispute is raised, anyone may call `autoSettle` to release funds
+ *      (or `settleMany` to release a batch in one transaction).
  *
  *    Tier 3 — Cross-AI Verification (`raiseDispute` / `verifyResult` / `finalizeDispute`)
  *      Employer raises a dispute within the challenge window.
  *      Third-party AI agents with ERC-8004 reputation >= MIN_VERIFIER_SCORE vote.
  *      Majority decides; ties favor the Worker (optimistic default).
  *
+ *    Claims (optional, per intent)
+ *      Intents published with a non-zero `claimLease` can be leased with
+ *      `claimIntent` before a worker starts executing, so competing workers
+ *      skip them instead of duplicating the work.
+ *
  * @dev Intent state is split across two mappings (`intents` / `intentDisputes`)
- *      to stay under the EVM stack limit without requiring `viaIR`.
+ *      so each path loads only the slots it needs. Both are storage-packed
+ *      (3 slots + 1 slot); the public getters widen every field back to the
+ *      original `uint256` tuple ABI. hardhat.config.js builds with `viaIR`, but
+ *      the getters and `_publish` are written to stay under the legacy
+ *      pipeline's 16-slot stack limit as well.
  */
 contract IntentPool {
     IAgentIdentity public identityContract;
@@ -34,34 +44,55 @@ contract IntentPool {
     uint256 public constant VOTE_PERIOD        = 2 hours;
     uint256 public constant MIN_VERIFIER_SCORE = 60;
     uint256 public constant MIN_VERIFIER_VOTES = 3;
-
-    /// @notice Core intent fields (9 slots).
+    uint256 public constant CLAIM_BOND_BPS     = 1000;   // claim bond = 10% of the bounty
+    uint256 public constant MAX_CLAIM_LEASE    = 1 days;
+    uint256 public constant PAYOUT_GAS_STIPEND = 10_000; // gas forwarded per payout in settleMany
+
+    /// @notice Core intent fields (3 slots).
+    /// @dev Amounts are uint96 (~7.9e10 ETH) and timestamps uint40; publish
+    ///      writes slots 0-1 (and slot 2 for claim-mode intents), submit writes
+    ///      slot 2 and updates slot 1.
     struct IntentCore {
-        address employer;
-        address worker;
-        uint256 bounty;
-        uint256 stake;
-        uint256 minScore;
+        address employer;      // slot 0
+        uint96  bounty;
+        uint96  stake;         // slot 1
+        uint64  minScore;
+        uint40  createdAt;
+        uint40  deadline;
         bool    isSolved;
         bool    isResolved;
-        uint256 createdAt;
-        uint256 deadline;
+        address worker;        // slot 2
+        uint32  claimLease;    // seconds a claim holds the intent; 0 = no claims
     }
 
-    /// @notice Dispute-specific fields (5 slots).
+    /// @notice Dispute-specific fields (1 slot).
     struct IntentDispute {
-        uint256 challengePeriodEnd;
+        uint40  challengePeriodEnd;
+        uint40  voteDeadline;
         bool    isDisputed;
-        uint256 approveVotes;
-        uint256 rejectVotes;
-        uint256 voteDeadline;
+        uint64  approveVotes;
+        uint64  rejectVotes;
+    }
+
+    /// @notice Current lease on a claim-mode intent (1 slot).
+    struct IntentClaim {
+        address claimant;
+        uint40  leaseEnd;
     }
 
-    mapping(bytes32 => IntentCore)    public intents;
-    mapping(bytes32 => IntentDispute) public intentDisputes;
+    mapping(bytes32 => IntentCore)    private _intents;
+    mapping(bytes32 => IntentDispute) private _disputes;
+    mapping(bytes32 => IntentClaim)   public intentClaims;
     mapping(bytes32 => mapping(address => bool)) public hasVerifierVoted;
 
-    event IntentPublished (bytes32 indexed intentId, address indexed employer, uint256 bounty, uint256 minScore, string rawJsonSchema);
+    /// @notice Forfeited claim bonds owed to employers, and `settleMany` payouts a
+    ///         worker could not receive inline; withdrawn with `withdrawCredits`.
+    mapping(address => uint256) public credits;
+
+    /// @dev `taskType` is an indexed bytes32 tag (the task_type name, zero-padded) so
+    ///      workers can filter intents by type in `eth_getLogs`; zero means untagged.
+    event IntentPublished (bytes32 indexed intentId, address indexed employer, bytes32 indexed taskType, uint256 bounty, uint256 minScore, uint256 claimLease, string rawJsonSchema);
+    event IntentClaimed   (bytes32 indexed intentId, address indexed worker, uint256 leaseEnd, uint256 bond);
     event IntentSolved    (bytes32 indexed intentId, address indexed worker,   string resultHash, string dataUrl);
     event IntentSettled   (bytes32 indexed intentId, address indexed recipient, uint256 payout);
     event ResultChallenged(bytes32 indexed intentId, address indexed employer);
@@ -73,30 +104,115 @@ contract IntentPool {
         identityContract = IAgentIdentity(_identityContract);
     }
 
+    // ─── Views ───────────────────────────────────────────────────────
+
+    /// @notice Core intent fields, widened to the pre-packing tuple ABI.
+    function intents(bytes32 intentId) external view returns (
+        address employer,
+        address worker,
+        uint256 bounty,
+        uint256 stake,
+        uint256 minScore,
+        bool    isSolved,
+        bool    isResolved,
+        uint256 createdAt,
+        uint256 deadline
+    ) {
+        // Assigned one by one: returning a 9-value tuple expression would also put
+        // nine temporaries on the stack and overflow it without viaIR
+        IntentCore storage core = _intents[intentId];
+        employer   = core.employer;
+        worker     = core.worker;
+        bounty     = core.bounty;
+        stake      = core.stake;
+        minScore   = core.minScore;
+        isSolved   = core.isSolved;
+        isResolved = core.isResolved;
+        createdAt  = core.createdAt;
+        deadline   = core.deadline;
+    }
+
+    /// @notice Dispute fields, widened to the pre-packing tuple ABI.
+    function intentDisputes(bytes32 intentId) external view returns (
+        uint256 challengePeriodEnd,
+        bool    isDisputed,
+        uint256 approveVotes,
+        uint256 rejectVotes,
+        uint256 voteDeadline
+    ) {
+        IntentDispute storage dispute = _disputes[intentId];
+        return (
+            dispute.challengePeriodEnd, dispute.isDisputed,
+            dispute.approveVotes, dispute.rejectVotes, dispute.voteDeadline
+        );
+    }
+
     // ─── Core ────────────────────────────────────────────────────────
 
     /// @notice Publish an intent with attached bounty.
     function publishIntent(
         bytes32 intentId,
+        bytes32 taskType,
         string calldata rawJsonSchema,
-        uint256 minScore
+        uint256 minScore,
+        uint32  claimLease
+    ) external payable {
+        _publish(intentId, taskType, rawJsonSchema, minScore, claimLease, msg.value);
+    }
+
+    /// @notice Publish several intents in one transaction; `msg.value` must equal the sum of `bounties`.
+    function publishIntents(
+        bytes32[] calldata intentIds,
+        bytes32[] calldata taskTypes,
+        string[]  calldata rawJsonSchemas,
+        uint256[] calldata minScores,
+        uint32[]  calldata claimLeases,
+        uint256[] calldata bounties
     ) external payable {
-        require(intents[intentId].employer == address(0), "Intent already exists");
-        require(msg.value > 0, "Bounty must be greater than 0");
-
-        intents[intentId] = IntentCore({
-            employer:   msg.sender,
-            worker:     address(0),
-            bounty:     msg.value,
-            stake:      0,
-            minScore:   minScore,
-            isSolved:   false,
-            isResolved: false,
-            createdAt:  block.timestamp,
-            deadline:   block.timestamp + 1 days
-        });
-
-        emit IntentPublished(intentId, msg.sender, msg.value, minScore, rawJsonSchema);
+        uint256 n = intentIds.length;
+        require(
+            taskTypes.length == n && rawJsonSchemas.length == n && minScores.length == n &&
+            claimLeases.length == n && bounties.length == n,
+            "Array length mismatch"
+        );
+
+        uint256 total;
+        for (uint256 i = 0; i < n; i++) {
+            _publish(intentIds[i], taskTypes[i], rawJsonSchemas[i], minScores[i], claimLeases[i], bounties[i]);
+            total += bounties[i];
+        }
+        require(total == msg.value, "Bounties must sum to msg.value");
+    }
+
+    function _publish(
+        bytes32 intentId,
+        bytes32 taskType,
+        string calldata rawJsonSchema,
+        uint256 minScore,
+        uint32  claimLease,
+        uint256 bounty
+    ) private {
+        IntentCore storage core = _intents[intentId];
+        require(core.employer == address(0), "Intent already exists");
+        require(bounty > 0, "Bounty must be greater than 0");
+        // Explicit bounds before every narrowing cast below — a silent truncation
+        // would escrow msg.value but record (and later pay out) a smaller bounty
+        require(bounty <= type(uint96).max, "Bounty too large");
+        require(minScore <= type(uint64).max, "minScore too large");
+        require(claimLease <= MAX_CLAIM_LEASE, "Claim lease too long");
+
+        // Field by field rather than a struct literal: the literal builds all ten
+        // fields on the stack and writes slot 2 even when it stays zero
+        core.employer  = msg.sender;
+        core.bounty    = uint96(bounty);
+        core.minScore  = uint64(minScore);
+        core.createdAt = uint40(block.timestamp);
+        core.deadline  = uint40(block.timestamp + 1 days);
+        if (claimLease > 0) {
+            core.claimLease = claimLease;
+        }
+
+        emit IntentPublished(intentId, msg.sender, taskType, bounty, minScore, claimLease, rawJsonSchema);
     }
 
     /// @notice Worker submits a result hash with matching stake; opens the challenge window.
@@ -105,37 +221,90 @@ contract IntentPool {
         string calldata resultHash,
         string calldata dataUrl
     ) external payable {
-        IntentCore storage core = intents[intentId];
+        IntentCore storage core = _intents[intentId];
         require(core.employer != address(0), "Intent does not exist");
         require(!core.isSolved,   "Intent already solved");
         require(!core.isResolved, "Intent already resolved");
         require(block.timestamp <= core.deadline, "Intent deadline passed");
-        require(msg.value >= core.bounty, "Must stake amount equal to bounty");
+
+        // A claimant's bond counts toward its stake; anyone else waits out the lease
+        uint256 stake = msg.value;
+        if (core.claimLease > 0) {
+            IntentClaim storage claim = intentClaims[intentId];
+            if (claim.claimant == msg.sender) {
+                stake += _claimBond(core);
+            } else if (claim.claimant != address(0)) {
+                require(block.timestamp > claim.leaseEnd, "Intent leased to another worker");
+                credits[core.employer] += _claimBond(core);
+            }
+            delete intentClaims[intentId];
+        }
+        require(stake >= core.bounty, "Must stake amount equal to bounty");
+        require(stake <= type(uint96).max, "Stake too large");   // guards the uint96 cast below
 
         uint256 workerScore = identityContract.getScore(msg.sender);
         require(workerScore >= core.minScore, "ERC-8004 score below requirement");
 
         core.worker   = msg.sender;
-        core.stake    = msg.value;
+        core.stake    = uint96(stake);
         core.isSolved = true;
 
-        intentDisputes[intentId].challengePeriodEnd = block.timestamp + CHALLENGE_PERIOD;
+        _disputes[intentId].challengePeriodEnd = uint40(block.timestamp + CHALLENGE_PERIOD);
 
         emit IntentSolved(intentId, msg.sender, resultHash, dataUrl);
     }
 
+    // ─── Claims ──────────────────────────────────────────────────────
+
+    /// @notice Lease a claim-mode intent before executing it, posting a bond of
+    ///         CLAIM_BOND_BPS of the bounty. While the lease runs only the
+    ///         claimant may submit. A lapsed lease can be claimed again, which
+    ///         forfeits the previous claimant's bond to the employer.
+    function claimIntent(bytes32 intentId) external payable {
+        IntentCore  storage core  = _intents[intentId];
+        IntentClaim storage claim = intentClaims[intentId];
+
+        require(core.claimLease > 0,              "Intent does not use claims");
+        require(!core.isSolved,                   "Intent already solved");
+        require(!core.isResolved,                 "Intent already resolved");
+        require(block.timestamp <= core.deadline, "Intent deadline passed");
+        require(block.timestamp > claim.leaseEnd, "Intent already leased");
+
+        uint256 bond = _claimBond(core);
+        require(msg.value == bond, "Must post the claim bond");
+        require(identityContract.getScore(msg.sender) >= core.minScore, "ERC-8004 score below requirement");
+
+        if (claim.claimant != address(0)) {
+            credits[core.employer] += bond;
+        }
+        claim.claimant = msg.sender;
+        claim.leaseEnd = uint40(block.timestamp + core.claimLease);
+
+        emit IntentClaimed(intentId, msg.sender, claim.leaseEnd, bond);
+    }
+
+    /// @notice Withdraw forfeited claim bonds credited to the caller.
+    function withdrawCredits() external {
+        uint256 amount = credits[msg.sender];
+        require(amount > 0, "Nothing to withdraw");
+
+        credits[msg.sender] = 0;
+        (bool ok,) = msg.sender.call{value: amount}("");
+        require(ok, "Withdraw failed");
+    }
+
     // ─── Tier 1: Fast Track ──────────────────────────────────────────
 
     /// @notice Employer directly approves and releases funds (fastest path).
     function approveAndPay(bytes32 intentId) external {
-        IntentCore storage core = intents[intentId];
+        IntentCore storage core = _intents[intentId];
         require(core.isSolved,    "Intent not solved yet");
         require(!core.isResolved, "Intent already resolved");
-        require(!intentDisputes[intentId].isDisputed, "Dispute in progress, use finalizeDispute");
+        require(!_disputes[intentId].isDisputed, "Dispute in progress, use finalizeDispute");
         require(msg.sender == core.employer, "Only employer can approve");
 
         core.isResolved = true;
-        uint256 payout = core.bounty + core.stake;
+        uint256 payout = _payout(core);
         (bool ok,) = core.worker.call{value: payout}("");
         require(ok, "Transfer failed");
 
@@ -146,8 +315,8 @@ contract IntentPool {
 
     /// @notice Auto-settle after challenge period expires with no dispute.
     function autoSettle(bytes32 intentId) external {
-        IntentCore    storage core    = intents[intentId];
-        IntentDispute storage dispute = intentDisputes[intentId];
+        IntentCore    storage core    = _intents[intentId];
+        IntentDispute storage dispute = _disputes[intentId];
 
         require(core.isSolved,                           "Intent not solved yet");
         require(!core.isResolved,                        "Already resolved");
@@ -156,19 +325,50 @@ contract IntentPool {
         require(block.timestamp > dispute.challengePeriodEnd, "Challenge period still active");
 
         core.isResolved = true;
-        uint256 payout = core.bounty + core.stake;
+        uint256 payout = _payout(core);
         (bool ok,) = core.worker.call{value: payout}("");
         require(ok, "Transfer failed");
 
         emit IntentSettled(intentId, core.worker, payout);
     }
 
+    /// @notice Auto-settle every eligible intent in `intentIds` in one transaction.
+    /// @dev IDs that `autoSettle` would reject are skipped instead of reverting the
+    ///      batch. Each payout forwards only PAYOUT_GAS_STIPEND, so one worker cannot
+    ///      burn the caller's gas; a payout that fails is credited to the worker
+    ///      (`withdrawCredits`) and the intent still settles.
+    /// @return settled Number of intents settled.
+    function settleMany(bytes32[] calldata intentIds) external returns (uint256 settled) {
+        for (uint256 i = 0; i < intentIds.length; i++) {
+            bytes32 intentId = intentIds[i];
+            IntentCore    storage core    = _intents[intentId];
+            IntentDispute storage dispute = _disputes[intentId];
+
+            if (
+                !core.isSolved || core.isResolved || dispute.isDisputed ||
+                dispute.challengePeriodEnd == 0 || block.timestamp <= dispute.challengePeriodEnd
+            ) {
+                continue;
+            }
+
+            core.isResolved = true;
+            uint256 payout = _payout(core);
+            (bool ok,) = core.worker.call{value: payout, gas: PAYOUT_GAS_STIPEND}("");
+            if (!ok) {
+                credits[core.worker] += payout;
+            }
+
+            emit IntentSettled(intentId, core.worker, payout);
+            settled++;
+        }
+    }
+
     // ─── Tier 3: Cross-AI Dispute Resolution ─────────────────────────
 
     /// @notice Employer raises a dispute within the challenge window, triggering a vote.
     function raiseDispute(bytes32 intentId) external {
-        IntentCore    storage core    = intents[intentId];
-        IntentDispute storage dispute = intentDisputes[intentId];
+        IntentCore    storage core    = _intents[intentId];
+        IntentDispute storage dispute = _disputes[intentId];
 
         require(msg.sender == core.employer, "Only employer can raise dispute");
         require(core.isSolved,               "Intent not solved yet");
@@ -177,7 +377,7 @@ contract IntentPool {
         require(block.timestamp <= dispute.challengePeriodEnd, "Challenge period expired");
 
         dispute.isDisputed   = true;
-        dispute.voteDeadline = block.timestamp + VOTE_PERIOD;
+        dispute.voteDeadline = uint40(block.timestamp + VOTE_PERIOD);
 
         emit ResultChallenged(intentId, msg.sender);
     }
@@ -185,8 +385,8 @@ contract IntentPool {
     /// @notice Third-party AI agent casts a vote on a disputed result.
     /// @dev Conflict-of-interest: employer and worker are barred from voting.
     function verifyResult(bytes32 intentId, bool approve) external {
-        IntentCore    storage core    = intents[intentId];
-        IntentDispute storage dispute = intentDisputes[intentId];
+        IntentCore    storage core    = _intents[intentId];
+        IntentDispute storage dispute = _disputes[intentId];
 
         require(dispute.isDisputed,   "No active dispute");
         require(!core.isResolved,     "Already resolved");
@@ -213,8 +413,8 @@ contract IntentPool {
     /// @notice Finalize a dispute after the vote period or quorum is reached.
     /// @dev Ties favor the Worker (optimistic bias toward execution).
     function finalizeDispute(bytes32 intentId) external {
-        IntentCore    storage core    = intents[intentId];
-        IntentDispute storage dispute = intentDisputes[intentId];
+        IntentCore    storage core    = _intents[intentId];
+        IntentDispute storage dispute = _disputes[intentId];
 
         require(dispute.isDisputed, "No active dispute");
         require(!core.isResolved,   "Already resolved");
@@ -230,12 +430,12 @@ contract IntentPool {
         emit DisputeResolved(intentId, workerWon, dispute.approveVotes, dispute.rejectVotes);
 
         if (workerWon) {
-            uint256 payout = core.bounty + core.stake;
+            uint256 payout = _payout(core);
             (bool ok,) = core.worker.call{value: payout}("");
             require(ok, "Worker payout failed");
             emit IntentSettled(intentId, core.worker, payout);
         } else {
-            uint256 refund = core.bounty + core.stake;
+            uint256 refund = _payout(core);
             (bool ok,) = core.employer.call{value: refund}("");
             require(ok, "Employer refund failed");
             emit IntentSettled(intentId, core.employer, refund);
@@ -246,7 +446,7 @@ contract IntentPool {
 
     /// @notice Employer reclaims bounty (+ worker stake if applicable) after deadline.
     function refundAndSlash(bytes32 intentId) external {
-        IntentCore storage core = intents[intentId];
+        IntentCore storage core = _intents[intentId];
         require(msg.sender == core.employer, "Only employer can refund");
         require(!core.isResolved, "Intent already resolved");
         require(block.timestamp > core.deadline, "Timeout not reached");
@@ -255,6 +455,10 @@ contract IntentPool {
         uint256 refund = core.bounty;
         if (core.isSolved) {
             refund += core.stake;
+        } else if (intentClaims[intentId].claimant != address(0)) {
+            // Leased but never delivered — the claimant's bond is forfeited
+            refund += _claimBond(core);
+            delete intentClaims[intentId];
         }
 
         (bool ok,) = core.employer.call{value: refund}("");
@@ -262,4 +466,15 @@ contract IntentPool {
 
         emit IntentSettled(intentId, core.employer, refund);
     }
+
+    // ─── Internal ────────────────────────────────────────────────────
+
+    /// @dev Bounty plus stake, summed in uint256 so two uint96 amounts cannot overflow.
+    function _payout(IntentCore storage core) private view returns (uint256) {
+        return uint256(core.bounty) + core.stake;
+    }
+
+    function _claimBond(IntentCore storage core) private view returns (uint256) {
+        return uint256(core.bounty) * CLAIM_BOND_BPS / 10_000;
+    }
 }
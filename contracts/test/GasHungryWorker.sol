@@ -0,0 +1,58 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20;
+
+import "@openzeppelin/contracts/token/ERC721/IERC721Receiver.sol";
+
+interface IIntentPoolWorker {
+    function submitResult(bytes32 intentId, string calldata resultHash, string calldata dataUrl) external payable;
+    function withdrawCredits() external;
+}
+
+interface IAgentRegistry {
+    function registerAgent(string memory agentURI) external;
+}
+
+/**
+ * @title GasHungryWorker
+ * @notice Test helper: a worker contract whose `receive` writes storage, so a
+ *         payout forwarding only IntentPool's PAYOUT_GAS_STIPEND runs out of gas.
+ * @dev `withdraw(true)` makes `receive` call `withdrawCredits` again and
+ *      record whether that nested call succeeded.
+ */
+contract GasHungryWorker is IERC721Receiver {
+    IIntentPoolWorker public immutable pool;
+
+    uint256 public received;
+    bool    public reenter;
+    bool    public reentered;
+
+    constructor(address pool_) {
+        pool = IIntentPoolWorker(pool_);
+    }
+
+    function register(address identity) external {
+        IAgentRegistry(identity).registerAgent("ipfs://gas-hungry-worker");
+    }
+
+    function submit(bytes32 intentId) external payable {
+        pool.submitResult{value: msg.value}(intentId, "0xhash", "ipfs://result");
+    }
+
+    function withdraw(bool reenter_) external {
+        reenter = reenter_;
+        pool.withdrawCredits();
+    }
+
+    receive() external payable {
+        received += msg.value;
+        if (reenter) {
+            reenter = false;
+            (bool ok,) = address(pool).call(abi.encodeCall(IIntentPoolWorker.withdrawCredits, ()));
+            reentered = ok;
+        }
+    }
+
+    function onERC721Received(address, address, uint256, bytes calldata) external pure returns (bytes4) {
+        return IERC721Receiver.onERC721Received.selector;
+    }
+}
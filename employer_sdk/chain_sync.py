@@ -0,0 +1,560 @@
+"""
+Chain sync helpers — durable block cursor, adaptive ``eth_getLogs`` range
+sizing, parallel log backfill and pluggable event sources (polling or
+WebSocket ``eth_subscribe``) shared by the worker listener and the employer
+daemon.
+
+The worker and employer ship as independent components, so each directory
+carries its own copy of this module; keep them byte-identical
+(tests/test_shared_modules.py fails when they diverge).
+"""
+
+import itertools
+import json
+import os
+import re
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from eth_utils import event_abi_to_log_topic, keccak, to_checksum_address
+from hexbytes import HexBytes
+from web3.datastructures import AttributeDict
+from web3.exceptions import ContractLogicError, Web3Exception
+from websockets.sync.client import connect as ws_connect
+
+BACKFILL_CHUNK       = 2_000
+BACKFILL_PARALLELISM = 4
+MAX_BACKFILL_BLOCKS  = 200_000   # ~1 intent deadline on Monad; older intents have expired
+MAX_RECONNECT_DELAY  = 300
+RATE_LIMIT_BACKOFF     = 1.0    # seconds, doubled per consecutive rate-limited call
+MAX_RATE_LIMIT_BACKOFF = 60.0
+RATE_LIMIT_RETRIES     = 6      # per backfill range before giving up
+CEILING_RECOVERY_POLLS = 50     # healthy polls before a learned range ceiling is raised again
+
+
+# ── Durable cursor ───────────────────────────────────────────────────
+
+class BlockCursor:
+    """
+    Last fully processed block, persisted atomically as JSON.
+
+    The file is bound to a contract address so pointing the node at a new
+    deployment never resumes from a stale cursor. Callers may persist extra
+    JSON-serializable state alongside the block number.
+    """
+
+    def __init__(self, path: str, contract_address: str):
+        self.path     = path
+        self.contract = contract_address.lower()
+        self.block: int | None = None
+        self.state: dict = {}
+
+    def load(self) -> int | None:
+        """Return the persisted block, or None if there is no usable cursor."""
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if data.get("contract") != self.contract:
+            return None
+        self.state = data.get("state", {})
+        self.block = int(data["block"])
+        return self.block
+
+    def save(self, block: int, state: dict | None = None):
+        """Write-then-rename so a crash never leaves a truncated cursor."""
+        if state is not None:
+            self.state = state
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".cursor-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"contract": self.contract, "block": block, "state": self.state}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp, 0o600)
+            os.replace(tmp, self.path)
+            self.block = block
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+
+def resume_block(cursor: BlockCursor, head: int) -> int:
+    """Block to resume from: the saved cursor, clamped to the backfill horizon."""
+    saved = cursor.load()
+    if saved is None or saved >= head:
+        return head
+    return max(saved, head - MAX_BACKFILL_BLOCKS)
+
+
+# ── Adaptive range sizing ────────────────────────────────────────────
+
+_RANGE_ERROR = re.compile(
+    r"range|too large|too many|limit|exceed|more than|timeout|timed out|response size",
+    re.IGNORECASE,
+)
+
+
+_RATE_LIMIT = re.compile(r"\b429\b|rate.?limit|too many requests|throttl|quota", re.IGNORECASE)
+
+
+def _is_timeout(exc: Exception) -> bool:
+    return isinstance(exc, TimeoutError) or "Timeout" in type(exc).__name__
+
+
+def is_rate_limited(exc: Exception) -> bool:
+    """Did the provider throttle us? Says nothing about the query size."""
+    response = getattr(exc, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    return bool(_RATE_LIMIT.search(str(exc)))
+
+
+def is_range_error(exc: Exception) -> bool:
+    """Heuristic: did the provider reject the query for being too big or slow?"""
+    if is_rate_limited(exc):
+        return False
+    return _is_timeout(exc) or bool(_RANGE_ERROR.search(str(exc)))
+
+
+class AdaptiveRange:
+    """
+    Block-range controller for log pollers.
+
+    Doubles the range while responses stay small and fast, halves it when a
+    response is heavy or slow, and halves it immediately when the provider
+    rejects the range or times out. A rejected size also becomes a ceiling,
+    so the controller does not keep probing a hard provider limit; after
+    CEILING_RECOVERY_POLLS healthy polls the ceiling is doubled again, so a
+    transient rejection does not cap the range for good. Rate limiting is
+    not a range problem: it backs off with a sleep and leaves the size
+    alone. ``lag`` is the distance to head after the last poll; callers
+    skip their sleep while it is non-zero.
+    """
+
+    def __init__(
+        self,
+        initial: int = 10,
+        minimum: int = 1,
+        maximum: int = 2_000,
+        target_logs: int = 500,
+        target_latency: float = 1.0,
+    ):
+        self.size           = initial
+        self.minimum        = minimum
+        self.maximum        = maximum
+        self.target_logs    = target_logs
+        self.target_latency = target_latency
+        self.ceiling        = maximum
+        self.lag            = 0
+        self.backoff        = 0.0   # current rate-limit sleep; 0 while unthrottled
+        self._healthy       = 0     # polls since the ceiling was last lowered or raised
+
+    def poll(self, fetch, cursor: int, head: int) -> tuple[list, int]:
+        """
+        Fetch logs for the next range after ``cursor`` up to ``head``.
+
+        Returns ``(logs, new_cursor)``. A rejected or rate-limited range
+        returns no logs with the cursor unchanged, so the caller simply
+        retries; other errors, and range errors at the minimum size, propagate.
+        """
+        self.lag = max(0, head - cursor)
+        if self.lag == 0:
+            return [], cursor
+
+        end     = min(cursor + self.size, head)
+        started = time.monotonic()
+        try:
+            logs = list(fetch(cursor + 1, end))
+        except Exception as e:
+            if is_rate_limited(e):
+                self.backoff = min(MAX_RATE_LIMIT_BACKOFF, self.backoff * 2 or RATE_LIMIT_BACKOFF)
+                time.sleep(self.backoff)
+                return [], cursor
+            if self.size <= self.minimum or not is_range_error(e):
+                raise
+            if not _is_timeout(e):
+                self.ceiling  = max(self.minimum, self.size * 3 // 4)
+                self._healthy = 0
+            self.size = max(self.minimum, self.size // 2)
+            return [], cursor
+
+        self.backoff = 0.0
+        elapsed = time.monotonic() - started
+        if len(logs) > self.target_logs or elapsed > self.target_latency:
+            self.size = max(self.minimum, self.size // 2)
+        elif len(logs) < self.target_logs // 2 and elapsed < self.target_latency / 2:
+            self._healthy += 1
+            if self.ceiling < self.maximum and self._healthy >= CEILING_RECOVERY_POLLS:
+                self.ceiling  = min(self.maximum, self.ceiling * 2)
+                self._healthy = 0
+            self.size = min(self.ceiling, self.size * 2)
+
+        self.lag = head - end
+        return logs, end
+
+
+# ── Parallel backfill ────────────────────────────────────────────────
+
+def _fetch_split(fetch, start: int, end: int) -> list:
+    """
+    Fetch [start, end], bisecting the range if the provider rejects it.
+    Rate-limited calls are retried after a backoff instead of being split,
+    which would only multiply the request count.
+    """
+    delay = RATE_LIMIT_BACKOFF
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        try:
+            return list(fetch(start, end))
+        except Exception as e:
+            if is_rate_limited(e):
+                if attempt == RATE_LIMIT_RETRIES:
+                    raise
+                time.sleep(delay)
+                delay = min(MAX_RATE_LIMIT_BACKOFF, delay * 2)
+                continue
+            if start == end:
+                raise
+            mid = (start + end) // 2
+            return _fetch_split(fetch, start, mid) + _fetch_split(fetch, mid + 1, end)
+
+
+def backfill_logs(
+    fetch,
+    start: int,
+    end: int,
+    chunk: int = BACKFILL_CHUNK,
+    parallelism: int = BACKFILL_PARALLELISM,
+):
+    """
+    Catch up on [start, end] with concurrent ``eth_getLogs`` calls.
+
+    ``fetch(from_block, to_block)`` returns the logs for one range. Yields
+    ``(logs, range_end)`` strictly in block order so the caller can advance
+    its cursor after each range, while later ranges are already in flight.
+    """
+    ranges = [(lo, min(lo + chunk - 1, end)) for lo in range(start, end + 1, chunk)]
+    if not ranges:
+        return
+    with ThreadPoolExecutor(max_workers=parallelism) as pool:
+        futures = [pool.submit(_fetch_split, fetch, lo, hi) for lo, hi in ranges]
+        for (_, hi), fut in zip(ranges, futures):
+            yield fut.result(), hi
+
+
+# ── Event sources ────────────────────────────────────────────────────
+
+def _hex_topic(topic):
+    if topic is None:
+        return None
+    if isinstance(topic, (list, tuple)):
+        return [_hex_topic(t) for t in topic]
+    return "0x" + HexBytes(topic).hex().removeprefix("0x")
+
+
+def log_filter(address: str, *topics) -> dict:
+    """
+    ``eth_getLogs`` / ``eth_subscribe`` filter for one contract. Each topic
+    position takes ``None`` (wildcard), a single value, or a list (OR).
+    """
+    return {"address": address, "topics": [_hex_topic(t) for t in topics]}
+
+
+def address_topic(address: str) -> HexBytes:
+    """An address left-padded to 32 bytes, as it appears in an indexed topic."""
+    return HexBytes(bytes(12) + HexBytes(address))
+
+
+def task_type_topic(task_type: str) -> HexBytes:
+    """
+    The ``taskType`` tag of IntentPublished: the UTF-8 name zero-padded to
+    32 bytes (as ethers' ``encodeBytes32String``), or its keccak256 when the
+    name is 32 bytes or longer. An empty name maps to the zero tag (untagged).
+    """
+    raw = task_type.encode()
+    if len(raw) < 32:
+        return HexBytes(raw.ljust(32, b"\0"))
+    return HexBytes(keccak(raw))
+
+
+def is_current_deployment(w3, address: str) -> bool:
+    """
+    True if ``address`` runs an IntentPool with the current ABI (indexed
+    ``taskType`` topic, claims). Older deployments lack ``MAX_CLAIM_LEASE()``,
+    so its getter reverts or returns nothing there; their IntentPublished
+    logs would never match this module's filters.
+
+    Raises RuntimeError when the RPC node cannot be asked (timeouts, HTTP
+    and connection errors, RPC-level failures).
+    """
+    try:
+        probe = {"to": to_checksum_address(address), "data": keccak(text="MAX_CLAIM_LEASE()")[:4]}
+        return len(w3.eth.call(probe)) == 32
+    except ContractLogicError:
+        return False
+    except (Web3Exception, OSError) as e:   # requests' exceptions are OSErrors
+        raise RuntimeError(f"could not verify deployment at {address}: {e}") from e
+
+
+def deployment_problem(w3, address: str) -> str | None:
+    """Startup check: why an agent cannot run against ``address``, or None if it can."""
+    try:
+        if is_current_deployment(w3, address):
+            return None
+    except RuntimeError as e:
+        return f"[!] IntentPool check failed — {e}\n    Check RPC connectivity and try again."
+    return (
+        f"[!] IntentPool at {address} predates the current contract ABI; this release cannot use it.\n"
+        "    Set INTENTPOOL_ADDRESS to a pool deployed from this release. `npm run deploy:monad`\n"
+        "    deploys one and prints the line to export:\n"
+        "        export INTENTPOOL_ADDRESS=0x...\n"
+        "    See README → Upgrading."
+    )
+
+
+def event_topic(event) -> HexBytes:
+    """topic0 of a web3 contract event, e.g. ``contract.events.IntentSolved``."""
+    return HexBytes(event_abi_to_log_topic(event.abi))
+
+
+def event_decoder(*events):
+    """Build ``decode(raw_log) -> EventData | None`` over the given contract events."""
+    by_topic = {bytes(event_topic(ev)): ev() for ev in events}
+
+    def decode(log):
+        ev = by_topic.get(bytes(log["topics"][0])) if log["topics"] else None
+        return ev.process_log(log) if ev else None
+
+    return decode
+
+
+def _log_order(log) -> tuple[int, int]:
+    return log["blockNumber"], log["logIndex"]
+
+
+def _format_log(raw: dict) -> AttributeDict:
+    """Normalize a JSON-RPC log object into the shape web3's ``get_logs`` returns."""
+    return AttributeDict({
+        "address":          to_checksum_address(raw["address"]),
+        "topics":           [HexBytes(t) for t in raw["topics"]],
+        "data":             HexBytes(raw["data"]),
+        "blockNumber":      int(raw["blockNumber"], 16),
+        "blockHash":        HexBytes(raw["blockHash"]),
+        "transactionHash":  HexBytes(raw["transactionHash"]),
+        "transactionIndex": int(raw["transactionIndex"], 16),
+        "logIndex":         int(raw["logIndex"], 16),
+        "removed":          raw.get("removed", False),
+    })
+
+
+class EventSource(ABC):
+    """
+    Stream of raw contract logs in block order.
+
+    ``batches(cursor)`` yields ``(logs, through_block)`` forever, starting
+    after ``cursor``. Empty batches are yielded while idle so consumers get a
+    regular tick for housekeeping; ``through_block`` is safe to persist.
+    """
+
+    lag: int = 0
+
+    @abstractmethod
+    def fetch(self, from_block: int, to_block: int) -> list:
+        """All matching logs in [from_block, to_block], sorted by position."""
+        ...
+
+    @abstractmethod
+    def batches(self, cursor: int):
+        ...
+
+
+class PollingEventSource(EventSource):
+    """``eth_getLogs`` polling with adaptive range sizing — the baseline source."""
+
+    def __init__(self, w3, filters: list[dict], poll_interval: float = 1.0, ranger: AdaptiveRange | None = None):
+        self.w3            = w3
+        self.filters       = filters
+        self.poll_interval = poll_interval
+        self.ranger        = ranger or AdaptiveRange()
+
+    @property
+    def lag(self) -> int:
+        return self.ranger.lag
+
+    def fetch(self, from_block: int, to_block: int) -> list:
+        logs = []
+        for f in self.filters:
+            logs.extend(self.w3.eth.get_logs({**f, "fromBlock": from_block, "toBlock": to_block}))
+        return sorted(logs, key=_log_order)
+
+    def batches(self, cursor: int):
+        head = cursor
+        while True:
+            logs, idle = [], True
+            try:
+                if cursor >= head:
+                    head = self.w3.eth.block_number
+                logs, cursor = self.ranger.poll(self.fetch, cursor, head)
+                idle = self.ranger.lag == 0
+            except Exception as e:
+                print(f"[!] RPC poll error (auto-retrying): {e}")
+            yield logs, cursor
+            if idle:
+                time.sleep(self.poll_interval)
+
+
+class WebSocketEventSource(EventSource):
+    """
+    Push-based source over ``eth_subscribe("logs")``, one subscription per filter.
+
+    On every (re)connect the range between the cursor and head is gap-filled
+    through the polling source before live events are consumed, and while the
+    socket is down the polling source takes over transparently. Logs seen via
+    both paths are de-duplicated.
+    """
+
+    def __init__(
+        self,
+        ws_url: str,
+        fallback: PollingEventSource,
+        idle_timeout: float = 1.0,
+        heartbeat: float = 15.0,
+        reconnect_delay: float = 10.0,
+    ):
+        self.ws_url          = ws_url
+        self.fallback        = fallback
+        self.idle_timeout    = idle_timeout
+        self.heartbeat       = heartbeat
+        self.reconnect_delay = reconnect_delay
+        self.connected       = False
+        self._ids            = itertools.count(1)
+        self._seen: set      = set()
+        self._seen_order     = deque()
+
+    @property
+    def lag(self) -> int:
+        return 0 if self.connected else self.fallback.lag
+
+    def fetch(self, from_block: int, to_block: int) -> list:
+        return self.fallback.fetch(from_block, to_block)
+
+    def batches(self, cursor: int):
+        delay = self.reconnect_delay
+        while True:
+            try:
+                with ws_connect(self.ws_url, open_timeout=10) as ws:
+                    cursor = yield from self._stream(ws, cursor)
+            except Exception as e:
+                if self.connected:
+                    print(f"[WS] Subscription lost ({e}) — falling back to polling")
+                    delay = self.reconnect_delay
+                else:
+                    print(f"[WS] Unavailable ({e}) — polling for {delay:.0f}s before retrying")
+            self.connected = False
+            cursor = yield from self._poll_for(cursor, delay)
+            delay  = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    # ── internals ──
+
+    def _poll_for(self, cursor: int, seconds: float):
+        deadline = time.monotonic() + seconds
+        for logs, cursor in self.fallback.batches(cursor):
+            yield self._unseen(logs), cursor
+            if time.monotonic() >= deadline and self.fallback.lag == 0:
+                return cursor
+
+    def _unseen(self, logs: list) -> list:
+        fresh = []
+        for log in logs:
+            key = (bytes(log["transactionHash"]), log["logIndex"])
+            if key in self._seen or log.get("removed"):
+                continue
+            self._seen.add(key)
+            self._seen_order.append(key)
+            if len(self._seen_order) > 10_000:
+                self._seen.discard(self._seen_order.popleft())
+            fresh.append(log)
+        return fresh
+
+    def _call(self, ws, method: str, params: list) -> int:
+        req_id = next(self._ids)
+        ws.send(json.dumps({"jsonrpc": "2.0", "id": req_id, "method": method, "params": params}))
+        return req_id
+
+    def _await(self, ws, req_id: int, buffered: list):
+        """Wait for a response by id, buffering any notifications that arrive first."""
+        while True:
+            msg = json.loads(ws.recv(timeout=10))
+            if msg.get("id") == req_id:
+                if "error" in msg:
+                    raise ValueError(msg["error"].get("message", msg["error"]))
+                return msg["result"]
+            if msg.get("method") == "eth_subscription":
+                buffered.append(msg["params"]["result"])
+
+    def _stream(self, ws, cursor: int):
+        pending: list = []
+        for f in self.fallback.filters:
+            self._await(ws, self._call(ws, "eth_subscribe", ["logs", f]), pending)
+        self.connected = True
+        print(f"[WS] Subscribed to {len(self.fallback.filters)} log filter(s) via {self.ws_url}")
+
+        # Gap-fill anything published between the cursor and the subscription
+        while True:
+            head = int(self._await(ws, self._call(ws, "eth_blockNumber", []), pending), 16)
+            if head <= cursor:
+                break
+            for logs, range_end in backfill_logs(self.fetch, cursor + 1, head):
+                cursor = range_end
+                yield self._unseen(logs), cursor
+
+        last_beat, beat_id = time.monotonic(), None
+        while True:
+            try:
+                msg = json.loads(ws.recv(timeout=self.idle_timeout))
+            except TimeoutError:
+                msg = None
+
+            if msg and msg.get("method") == "eth_subscription":
+                pending.append(msg["params"]["result"])
+                # A newer block means every earlier block has been delivered in full
+                newest = max(int(r["blockNumber"], 16) for r in pending)
+                ready  = [r for r in pending if int(r["blockNumber"], 16) < newest]
+                if ready:
+                    pending = [r for r in pending if int(r["blockNumber"], 16) == newest]
+                    logs    = sorted((_format_log(r) for r in ready), key=_log_order)
+                    cursor  = max(cursor, newest - 1)
+                    yield self._unseen(logs), cursor
+                continue
+
+            if msg and beat_id is not None and msg.get("id") == beat_id:
+                beat_id = None
+                # Logs of the head block itself may still be on their way
+                if not pending:
+                    cursor = max(cursor, int(msg["result"], 16) - 1)
+                continue
+
+            if msg is None:
+                logs = sorted((_format_log(r) for r in pending), key=_log_order)
+                if pending:
+                    # Deliver now, but the newest block is only complete once a later one shows up
+                    cursor  = max(cursor, max(log["blockNumber"] for log in logs) - 1)
+                    pending = []
+                yield self._unseen(logs), cursor
+
+            if time.monotonic() - last_beat >= self.heartbeat:
+                beat_id   = self._call(ws, "eth_blockNumber", [])
+                last_beat = time.monotonic()
+
+
+def make_event_source(w3, filters: list[dict], ws_url: str = "", poll_interval: float = 1.0) -> EventSource:
+    """WebSocket source with polling fallback when ``ws_url`` is set, plain polling otherwise."""
+    polling = PollingEventSource(w3, filters, poll_interval=poll_interval)
+    return WebSocketEventSource(ws_url, polling) if ws_url else polling
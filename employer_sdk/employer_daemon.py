@@ -5,33 +5,122 @@ Publishes intents from JSON payloads, monitors on-chain events, and drives
 the three-tier settlement pipeline (fast-track / optimistic / dispute).
 """
 
+import argparse
 import getpass
 import hashlib
+import heapq
+import io
 import json
 import os
+import sys
 import threading
 import time
 import uuid
+import zlib
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import NamedTuple
+from urllib.parse import urlsplit
 
 import requests
 from Crypto.Cipher import AES
 from dotenv import load_dotenv
 from eth_account.messages import encode_defunct
+from hexbytes import HexBytes
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from web3 import Web3
 
+try:
+    import zstandard
+except ImportError:   # in requirements.txt; without it only zstd-compressed results fail
+    zstandard = None
+
+from chain_sync import (
+    BlockCursor,
+    address_topic,
+    backfill_logs,
+    deployment_problem,
+    event_decoder,
+    event_topic,
+    log_filter,
+    make_event_source,
+    resume_block,
+    task_type_topic,
+)
+from tx_manager import TxPipeline
+
 # ── Configuration ────────────────────────────────────────────────────
 
-_ENV_PATH = os.path.join(os.path.dirname(__file__), ".env")
+_ENV_PATH   = os.path.join(os.path.dirname(__file__), ".env")
+_STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".employer_state.json")
 load_dotenv(_ENV_PATH)
 
 RPC_URL          = "https://testnet-rpc.monad.xyz"
-CONTRACT_ADDRESS = "0x1a8d74e1ADf1Be715e20d39ccF7637b8486b5899"
+CONTRACT_ADDRESS = Web3.to_checksum_address(os.environ.get("INTENTPOOL_ADDRESS") or "0x1a8d74e1ADf1Be715e20d39ccF7637b8486b5899")
+
+WS_RPC_URL       = os.environ.get("WS_RPC_URL", "")   # optional push-based event delivery
+
+POLL_INTERVAL   = 2     # seconds between polls once caught up with head
+READ_BATCH_SIZE = 100   # intents per JSON-RPC batch (two eth_calls each)
+STATE_SAVE_INTERVAL = 10   # seconds between saves that would only advance the block cursor
+
+# Mirrors IntentPool.sol — deadlines are derived locally from event timestamps
+CHALLENGE_PERIOD = 1 * 3600
+VOTE_PERIOD      = 2 * 3600
+INTENT_TTL       = 24 * 3600
+TIMER_SLACK      = 5     # seconds past a deadline before acting (block.timestamp must exceed it)
+TIMER_RETRY      = 30    # seconds before re-checking chain state after a failed transaction
+
+# Settlement pipeline — runs off the event-scanning thread
+SETTLEMENT_WORKERS = 16
+STAGE_LIMITS       = {"download": 8, "key": 8}   # max concurrent settlements per stage
+IPFS_TIMEOUT       = 30
+MANIFEST_FETCH_ATTEMPTS = 4
+MANIFEST_RETRY_DELAY    = 10   # seconds, doubled per attempt — workers may pin after submitting
+KEY_BATCH_WINDOW   = 0.2   # seconds key requests for one gateway are gathered before a batch handshake
+KEY_BATCH_SIZE     = 50    # flush a gateway's batch early at this many intents
+X402_TIMEOUT       = (5, 15)   # (connect, read) seconds per x.402 request
+
+# Bulk dispatch
+DEFAULT_BOUNTY_ETH = 0.001
+DEFAULT_MIN_SCORE  = 85
+BULK_CONCURRENCY   = 32    # publish transactions awaiting a receipt at once
+PUBLISH_BATCH_SIZE = 20    # intents per publishIntents transaction
+PUBLISH_GAS        = 300_000   # per intent
+MAX_BOUNTY_WEI     = 2**96 - 1     # IntentCore.bounty is a uint96 (see IntentPool.sol)
+MAX_MIN_SCORE      = 2**64 - 1     # IntentCore.minScore is a uint64
+SETTLE_BATCH_SIZE  = 50    # intents per settleMany transaction
+SETTLE_GAS         = 75_000    # per intent in settleMany, on top of SETTLE_GAS_BASE
+SETTLE_GAS_BASE    = 50_000
+
+# Off-chain task payloads — the intent carries only a descriptor (see payload_ref in worker_cli/worker.py)
+PAYLOAD_IPFS_API   = os.environ.get("PAYLOAD_IPFS_API", "")   # IPFS HTTP API the payloads are pinned to
+OFFCHAIN_MIN_BYTES = 4096   # "auto" mode moves payloads at least this large off-chain
+OFFCHAIN_MODES     = ("auto", "always", "never")
+
+# Claim mode — workers lease an intent (bond = CLAIM_BOND_BPS of the bounty) before executing it
+MAX_CLAIM_LEASE    = 24 * 3600   # mirrors IntentPool.sol
+
+FINAL_STATUSES     = ("Settled", "Refunded")
+IN_FLIGHT_STATUSES = ("Publishing", "Verifying", "Settling", "Disputing", "Refunding")   # step in progress
+
+# Result manifest v2 — see EncryptedManifest in worker_cli/worker.py for the layout
+MANIFEST_MAGIC      = b"A2AM"
+SEGMENT_FINAL       = 0x01
+MAX_MANIFEST_HEADER = 64 * 1024
+MAX_MANIFEST_CHUNK  = 16 * 1024 * 1024
+DECOMPRESS_CHUNK    = 1024 * 1024   # max plaintext produced per decompression step
 
 CONTRACT_ABI = [
     # Write operations
-    {"inputs": [{"internalType": "bytes32", "name": "intentId", "type": "bytes32"}, {"internalType": "string", "name": "rawJsonSchema", "type": "string"}, {"internalType": "uint256", "name": "minScore", "type": "uint256"}], "name": "publishIntent",   "outputs": [], "stateMutability": "payable",     "type": "function"},
+    {"inputs": [{"internalType": "bytes32", "name": "intentId", "type": "bytes32"}, {"internalType": "bytes32", "name": "taskType", "type": "bytes32"}, {"internalType": "string", "name": "rawJsonSchema", "type": "string"}, {"internalType": "uint256", "name": "minScore", "type": "uint256"}, {"internalType": "uint32", "name": "claimLease", "type": "uint32"}], "name": "publishIntent",   "outputs": [], "stateMutability": "payable",     "type": "function"},
+    {"inputs": [{"internalType": "bytes32[]", "name": "intentIds", "type": "bytes32[]"}, {"internalType": "bytes32[]", "name": "taskTypes", "type": "bytes32[]"}, {"internalType": "string[]", "name": "rawJsonSchemas", "type": "string[]"}, {"internalType": "uint256[]", "name": "minScores", "type": "uint256[]"}, {"internalType": "uint32[]", "name": "claimLeases", "type": "uint32[]"}, {"internalType": "uint256[]", "name": "bounties", "type": "uint256[]"}], "name": "publishIntents", "outputs": [], "stateMutability": "payable", "type": "function"},
     {"inputs": [{"internalType": "bytes32", "name": "intentId", "type": "bytes32"}], "name": "approveAndPay",  "outputs": [], "stateMutability": "nonpayable", "type": "function"},
     {"inputs": [{"internalType": "bytes32", "name": "intentId", "type": "bytes32"}], "name": "autoSettle",     "outputs": [], "stateMutability": "nonpayable", "type": "function"},
+    {"inputs": [{"internalType": "bytes32[]", "name": "intentIds", "type": "bytes32[]"}], "name": "settleMany", "outputs": [{"internalType": "uint256", "name": "settled", "type": "uint256"}], "stateMutability": "nonpayable", "type": "function"},
+    {"inputs": [{"internalType": "address", "name": "", "type": "address"}], "name": "credits", "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}], "stateMutability": "view", "type": "function"},
+    {"inputs": [], "name": "withdrawCredits", "outputs": [], "stateMutability": "nonpayable", "type": "function"},
     {"inputs": [{"internalType": "bytes32", "name": "intentId", "type": "bytes32"}], "name": "raiseDispute",   "outputs": [], "stateMutability": "nonpayable", "type": "function"},
     {"inputs": [{"internalType": "bytes32", "name": "intentId", "type": "bytes32"}, {"internalType": "bool", "name": "approve", "type": "bool"}], "name": "verifyResult", "outputs": [], "stateMutability": "nonpayable", "type": "function"},
     {"inputs": [{"internalType": "bytes32", "name": "intentId", "type": "bytes32"}], "name": "finalizeDispute","outputs": [], "stateMutability": "nonpayable", "type": "function"},
@@ -57,12 +146,203 @@ CONTRACT_ABI = [
         {"internalType": "uint256", "name": "voteDeadline",       "type": "uint256"}
     ], "stateMutability": "view", "type": "function"},
     # Events
+    {"anonymous": False, "inputs": [{"indexed": True, "internalType": "bytes32", "name": "intentId", "type": "bytes32"}, {"indexed": True, "internalType": "address", "name": "employer", "type": "address"}, {"indexed": True, "internalType": "bytes32", "name": "taskType", "type": "bytes32"}, {"indexed": False, "internalType": "uint256", "name": "bounty", "type": "uint256"}, {"indexed": False, "internalType": "uint256", "name": "minScore", "type": "uint256"}, {"indexed": False, "internalType": "uint256", "name": "claimLease", "type": "uint256"}, {"indexed": False, "internalType": "string", "name": "rawJsonSchema", "type": "string"}], "name": "IntentPublished", "type": "event"},
     {"anonymous": False, "inputs": [{"indexed": True, "internalType": "bytes32", "name": "intentId", "type": "bytes32"}, {"indexed": True, "internalType": "address", "name": "worker", "type": "address"}, {"indexed": False, "internalType": "string", "name": "resultHash", "type": "string"}, {"indexed": False, "internalType": "string", "name": "dataUrl", "type": "string"}], "name": "IntentSolved", "type": "event"},
     {"anonymous": False, "inputs": [{"indexed": True, "internalType": "bytes32", "name": "intentId", "type": "bytes32"}, {"indexed": True, "internalType": "address", "name": "employer", "type": "address"}], "name": "ResultChallenged", "type": "event"},
     {"anonymous": False, "inputs": [{"indexed": True, "internalType": "bytes32", "name": "intentId", "type": "bytes32"}, {"indexed": False, "internalType": "bool", "name": "workerWon", "type": "bool"}, {"indexed": False, "internalType": "uint256", "name": "approveVotes", "type": "uint256"}, {"indexed": False, "internalType": "uint256", "name": "rejectVotes", "type": "uint256"}], "name": "DisputeResolved", "type": "event"},
+    {"anonymous": False, "inputs": [{"indexed": True, "internalType": "bytes32", "name": "intentId", "type": "bytes32"}, {"indexed": True, "internalType": "address", "name": "recipient", "type": "address"}, {"indexed": False, "internalType": "uint256", "name": "payout", "type": "uint256"}], "name": "IntentSettled", "type": "event"},
 ]
 
 
+
+def _read_exact(stream, n: int) -> bytes:
+    """Read exactly ``n`` bytes from a file-like stream or raise on EOF."""
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = stream.read(n - len(buf))
+        if not chunk:
+            raise ValueError("Truncated result manifest")
+        buf += chunk
+    return bytes(buf)
+
+
+class _ChunkReader(io.RawIOBase):
+    """Read-only file object over an iterator of byte chunks."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buf    = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buf:
+            self._buf = next(self._chunks, None)
+            if self._buf is None:
+                self._buf = b""
+                return 0
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
+
+
+def _decompress(chunks, codec: str):
+    """Undo the manifest ``codec`` on a stream of decrypted chunks, in bounded steps."""
+    if codec == "none":
+        yield from chunks
+    elif codec == "zlib":
+        d = zlib.decompressobj()
+        for data in chunks:
+            while data:
+                out = d.decompress(data, DECOMPRESS_CHUNK)
+                if out:
+                    yield out
+                data = d.unconsumed_tail
+        tail = d.flush()
+        if tail:
+            yield tail
+        if not d.eof:
+            raise ValueError("Truncated zlib result stream")
+    elif codec == "zstd":
+        if zstandard is None:
+            raise ValueError("Result is zstd-compressed — install 'zstandard' to settle it")
+        reader = zstandard.ZstdDecompressor().stream_reader(_ChunkReader(chunks))
+        while block := reader.read(DECOMPRESS_CHUNK):
+            yield block
+    else:
+        raise ValueError(f"Unsupported result codec '{codec}'")
+
+
+class IntentCore(NamedTuple):
+    """Decoded ``intents(bytes32)`` tuple."""
+    employer:    str
+    worker:      str
+    bounty:      int
+    stake:       int
+    min_score:   int
+    is_solved:   bool
+    is_resolved: bool
+    created_at:  int
+    deadline:    int
+
+
+class IntentDispute(NamedTuple):
+    """Decoded ``intentDisputes(bytes32)`` tuple."""
+    challenge_period_end: int
+    is_disputed:          bool
+    approve_votes:        int
+    reject_votes:         int
+    vote_deadline:        int
+
+
+# ── Task files ───────────────────────────────────────────────────────
+
+def load_tasks(path: str):
+    """
+    Yield ``(source, task)`` from a JSONL file, a single JSON file, or a
+    directory of ``*.json`` / ``*.jsonl`` files. A task is either a bare
+    payload or ``{"payload": {...}, "bounty_eth": ..., "min_score": ...}``;
+    ``task`` is None for entries that do not parse. ``source`` is a stable
+    ``file:line`` label used to match outcomes back to their input.
+    """
+    if os.path.isdir(path):
+        files = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.endswith((".json", ".jsonl"))
+        )
+    else:
+        files = [path]
+
+    for file_path in files:
+        with open(file_path, "r", encoding="utf-8") as f:
+            if not file_path.endswith(".jsonl"):
+                try:
+                    yield file_path, json.load(f)
+                except json.JSONDecodeError:
+                    yield file_path, None
+                continue
+            for n, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield f"{file_path}:{n}", json.loads(line)
+                except json.JSONDecodeError:
+                    yield f"{file_path}:{n}", None
+
+
+# Client for HTTP calls made outside an EmployerAgent; like the agent's own
+# sessions it ignores proxy and auth settings from the environment
+_http = requests.Session()
+_http.trust_env = False
+
+
+def upload_payload(data: bytes, api_url: str = PAYLOAD_IPFS_API) -> str:
+    """Pin ``data`` through an IPFS HTTP API (``/api/v0/add``); returns its ``ipfs://`` URI."""
+    if not api_url:
+        raise RuntimeError("PAYLOAD_IPFS_API is not set")
+    resp = _http.post(
+        f"{api_url.rstrip('/')}/api/v0/add",
+        params={"pin": "true", "cid-version": "0"},
+        files={"file": ("payload.json", data, "application/json")},
+        timeout=IPFS_TIMEOUT,
+    )
+    resp.raise_for_status()
+    return "ipfs://" + resp.json()["Hash"]
+
+
+def payload_descriptor(payload: dict, data: bytes, uri: str) -> str:
+    """On-chain stand-in for an off-chain payload: task type, size, content hash and URI."""
+    return json.dumps({
+        "task_type": payload.get("task_type"),
+        "payload_ref": {"uri": uri, "sha256": hashlib.sha256(data).hexdigest(), "size": len(data)},
+    })
+
+
+def _task_tag(payload: dict) -> bytes:
+    """Indexed ``taskType`` topic for a payload (zero when it has no task_type)."""
+    return bytes(task_type_topic(str(payload.get("task_type") or "")))
+
+
+def _task_error(payload, bounty_eth, min_score, claim_lease) -> str | None:
+    """Why a bulk task cannot be published as given, or None if it can."""
+    if not isinstance(payload, dict):
+        return "payload is not a JSON object"
+    # bool is an int subclass, but true/false in a task file is always a mistake
+    if isinstance(bounty_eth, bool) or not isinstance(bounty_eth, (int, float)) or not bounty_eth > 0:
+        return f"bad bounty_eth={bounty_eth!r}"
+    try:
+        bounty_wei = Web3.to_wei(bounty_eth, "ether")
+    except (ValueError, ArithmeticError):
+        return f"bad bounty_eth={bounty_eth!r}"
+    if bounty_wei == 0:
+        return f"bounty_eth={bounty_eth!r} is less than 1 wei"
+    if bounty_wei > MAX_BOUNTY_WEI:
+        return f"bounty_eth={bounty_eth!r} exceeds the uint96 limit"
+    if isinstance(min_score, bool) or not isinstance(min_score, int) or not 0 <= min_score <= MAX_MIN_SCORE:
+        return f"bad min_score={min_score!r}"
+    if isinstance(claim_lease, bool) or not isinstance(claim_lease, int) or not 0 <= claim_lease <= MAX_CLAIM_LEASE:
+        return f"bad claim_lease={claim_lease!r}"
+    return None
+
+
+def _completed_sources(out_path: str) -> set[str]:
+    """Sources already published according to an existing outcome file."""
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+    with open(out_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                outcome = json.loads(line)
+            except json.JSONDecodeError:
+                continue   # torn last line from an interrupted run
+            if outcome.get("status") == "published":
+                done.add(outcome["source"])
+    return done
+
+
 # ── Private-key bootstrap ────────────────────────────────────────────
 
 def load_private_key() -> str:
@@ -90,8 +370,14 @@ def load_private_key() -> str:
 # ── Agent ─────────────────────────────────────────────────────────────
 
 class EmployerAgent:
-    def __init__(self, private_key: str | None = None):
+    def __init__(self, private_key: str | None = None, offchain: str = "auto", claim_lease: int = 0):
+        if offchain not in OFFCHAIN_MODES:
+            raise ValueError(f"offchain must be one of {OFFCHAIN_MODES}")
+        if not 0 <= claim_lease <= MAX_CLAIM_LEASE:
+            raise ValueError(f"claim_lease must be between 0 and {MAX_CLAIM_LEASE} seconds")
         self.private_key = private_key or load_private_key()
+        self.offchain    = offchain
+        self.claim_lease = claim_lease   # default for intents that do not choose; 0 = no claims
 
         session = requests.Session()
         session.trust_env = False
@@ -99,250 +385,917 @@ class EmployerAgent:
 
         self.account  = self.w3.eth.account.from_key(self.private_key)
         self.contract = self.w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+        self.tx       = TxPipeline(self.w3, self.private_key)
+        self._batch_reads = True
+
+        self.cursor = BlockCursor(_STATE_PATH, CONTRACT_ADDRESS)
+        events = self.contract.events
+        self.source = make_event_source(
+            self.w3,
+            [
+                # Lifecycle events for any intent — only tracked ones are acted upon
+                log_filter(CONTRACT_ADDRESS, [
+                    event_topic(events.IntentSolved),
+                    event_topic(events.DisputeResolved),
+                    event_topic(events.IntentSettled),
+                ]),
+                # Events carrying the employer as an indexed topic — ours only
+                log_filter(
+                    CONTRACT_ADDRESS,
+                    [event_topic(events.IntentPublished), event_topic(events.ResultChallenged)],
+                    None,
+                    address_topic(self.account.address),
+                ),
+            ],
+            ws_url=WS_RPC_URL,
+            poll_interval=POLL_INTERVAL,
+        )
+        self._decode = event_decoder(
+            events.IntentPublished, events.IntentSolved, events.ResultChallenged,
+            events.DisputeResolved, events.IntentSettled,
+        )
+        self._timers: list[tuple[float, bytes, str]] = []   # min-heap of (due, intent_id, action)
+        self._timer_lock  = threading.Lock()
+        self._block_times: OrderedDict[int, int] = OrderedDict()
+
+        self._settle_pool   = ThreadPoolExecutor(max_workers=SETTLEMENT_WORKERS, thread_name_prefix="settle")
+        self._stage_limits  = {stage: threading.BoundedSemaphore(n) for stage, n in STAGE_LIMITS.items()}
+        self._sessions: dict[str, requests.Session] = {}
+        self._sessions_lock = threading.Lock()
+        self._key_batches: dict[str, list[tuple[bytes, Future]]] = {}   # batch url → waiting settlements
+        self._key_batch_lock = threading.Lock()
+        self._watcher: threading.Thread | None = None
+        self.last_scanned_block = resume_block(self.cursor, self.w3.eth.block_number)
 
         self.active_intents: dict[bytes, str] = {}
-        self.last_scanned_block = self.w3.eth.block_number
+        if self.cursor.state.get("employer") == self.account.address:
+            # In-flight transactions did not survive the restart; re-derive from chain state
+            self.active_intents = {
+                bytes.fromhex(k): "Pending" if v in IN_FLIGHT_STATUSES else v
+                for k, v in self.cursor.state.get("active_intents", {}).items()
+                if v not in FINAL_STATUSES
+            }
+        self._state_lock = threading.Lock()
+        self._saved: tuple[dict, float] | None = None   # (last persisted intents, monotonic save time)
 
         print(f"[*] Employer Agent initialized | address: {self.account.address}")
+        if self.active_intents:
+            print(f"[*] Restored {len(self.active_intents)} tracked intent(s) from {_STATE_PATH}")
+
+    @property
+    def scan_lag(self) -> int:
+        """Blocks between the scan cursor and chain head as of the last poll."""
+        return self.source.lag
+
+    def _save_state(self, force: bool = False):
+        """
+        Persist the scan cursor and open intents so restarts lose nothing.
+        Settled / refunded intents are dropped, so the file only grows with
+        the open workload. Unless ``force``d, a save that would only advance
+        the cursor is throttled to one per STATE_SAVE_INTERVAL; replaying
+        those blocks after a crash is harmless.
+        """
+        with self._state_lock:
+            for iid, status in list(self.active_intents.items()):
+                if status in FINAL_STATUSES:
+                    self.active_intents.pop(iid, None)
+            intents = {k.hex(): v for k, v in list(self.active_intents.items())}
+            if self._saved is not None and not force:
+                saved_intents, saved_at = self._saved
+                if intents == saved_intents and (
+                    self.last_scanned_block == self.cursor.block
+                    or time.monotonic() - saved_at < STATE_SAVE_INTERVAL
+                ):
+                    return
+            self.cursor.save(self.last_scanned_block, {"employer": self.account.address, "active_intents": intents})
+            self._saved = (intents, time.monotonic())
 
     # ── Intent dispatch ──────────────────────────────────────────────
 
+    def _intent_json(self, task_payload: dict, offchain: bool | None = None) -> str:
+        """
+        The ``rawJsonSchema`` to publish: the payload itself, or a descriptor
+        after pinning it off-chain. ``offchain=None`` follows the agent's mode
+        ("auto" moves payloads of OFFCHAIN_MIN_BYTES or more when
+        PAYLOAD_IPFS_API is set).
+        """
+        raw_json = json.dumps({**task_payload, "timestamp": int(time.time())})
+        if offchain is None:
+            offchain = self.offchain == "always" or (
+                self.offchain == "auto" and bool(PAYLOAD_IPFS_API) and len(raw_json) >= OFFCHAIN_MIN_BYTES
+            )
+        if not offchain:
+            return raw_json
+        data = raw_json.encode()
+        uri  = upload_payload(data)
+        print(f"[*] Payload pinned off-chain: {uri} ({len(data)} bytes)")
+        return payload_descriptor(task_payload, data, uri)
+
     def dispatch_intent(
         self,
         task_payload: dict,
         min_score: int = 85,
         bounty_eth: float = 0.001,
+        on_result=None,
+        offchain: bool | None = None,
+        claim_lease: int | None = None,
     ) -> bytes | None:
-        """Publish an intent on-chain. Returns the 32-byte intent ID, or None on failure."""
+        """
+        Publish an intent on-chain. Returns the 32-byte intent ID, or None on failure.
+        ``on_result(intent_id, receipt)`` fires once the publish is mined (receipt None if dropped).
+        ``offchain`` overrides the agent's off-chain payload mode for this intent, and
+        ``claim_lease`` its claim mode (seconds a worker's claim holds it; 0 = no claims).
+        """
         intent_id = uuid.uuid4().bytes * 2
-        task_payload = {**task_payload, "timestamp": int(time.time())}
-        raw_json = json.dumps(task_payload)
-        bounty_wei = self.w3.to_wei(bounty_eth, "ether")
+        try:
+            raw_json = self._intent_json(task_payload, offchain)
+        except Exception as e:
+            print(f"[!] Failed to pin payload off-chain: {e}")
+            return None
+        bounty_wei  = self.w3.to_wei(bounty_eth, "ether")
+        claim_lease = self.claim_lease if claim_lease is None else claim_lease
+
+        print(f"[*] Publishing intent {intent_id.hex()[:10]}... bounty={bounty_eth} ETH"
+              + (f" claim lease={claim_lease}s" if claim_lease else ""))
+
+        def on_receipt(receipt):
+            if receipt is not None and receipt["status"] == 1:
+                self.active_intents[intent_id] = "Pending"
+                self._save_state()
+                print(f"[+] Intent {intent_id.hex()[:10]}... confirmed on-chain")
+            else:
+                self.active_intents.pop(intent_id, None)
+                print(f"[!] Intent {intent_id.hex()[:10]}... failed to publish (reverted or dropped)")
+            if on_result:
+                on_result(intent_id, receipt)
+
+        self.active_intents[intent_id] = "Publishing"
+        tx_hash = self._send_tx(
+            self.contract.functions.publishIntent(intent_id, _task_tag(task_payload), raw_json, min_score, claim_lease),
+            gas=PUBLISH_GAS,
+            value=bounty_wei,
+            on_receipt=on_receipt,
+        )
+        if not tx_hash:
+            self.active_intents.pop(intent_id, None)
+            print("[!] Failed to publish intent")
+            return None
 
-        print(f"[*] Publishing intent {intent_id.hex()[:10]}... bounty={bounty_eth} ETH")
+        print(f"[+] Intent broadcast OK | tx: {tx_hash}")
+        return intent_id
 
+    def dispatch_intents(self, tasks: list[tuple[dict, int, float, int]], on_result=None) -> list[bytes] | None:
+        """
+        Publish ``(payload, min_score, bounty_eth, claim_lease)`` tasks in one
+        ``publishIntents`` transaction. Returns their intent IDs, or None if the broadcast failed.
+        ``on_result(intent_ids, receipt)`` fires once it is mined (receipt None if dropped);
+        the batch lands or reverts as a whole.
+        """
+        intent_ids = [uuid.uuid4().bytes * 2 for _ in tasks]
         try:
-            tx = self.contract.functions.publishIntent(
-                intent_id, raw_json, min_score
-            ).build_transaction({
-                "from": self.account.address,
-                "value": bounty_wei,
-                "nonce": self.w3.eth.get_transaction_count(self.account.address),
-                "gas": 300_000,
-                "gasPrice": self.w3.eth.gas_price,
-            })
-            signed = self.w3.eth.account.sign_transaction(tx, private_key=self.private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed.raw_transaction)
-            self.w3.eth.wait_for_transaction_receipt(tx_hash)
-
-            self.active_intents[intent_id] = "Pending"
-            print(f"[+] Intent broadcast OK | tx: {tx_hash.hex()}")
-            return intent_id
+            raw_jsons = [self._intent_json(payload) for payload, *_ in tasks]
         except Exception as e:
-            print(f"[!] Failed to publish intent: {e}")
+            print(f"[!] Failed to pin payload off-chain: {e}")
+            return None
+        task_tags  = [_task_tag(payload) for payload, *_ in tasks]
+        min_scores = [min_score for _, min_score, _, _ in tasks]
+        bounties   = [self.w3.to_wei(bounty_eth, "ether") for _, _, bounty_eth, _ in tasks]
+        leases     = [claim_lease for *_, claim_lease in tasks]
+
+        print(f"[*] Publishing {len(tasks)} intents in one transaction | total bounty={self.w3.from_wei(sum(bounties), 'ether')} ETH")
+
+        def on_receipt(receipt):
+            ok = receipt is not None and receipt["status"] == 1
+            for iid in intent_ids:
+                if ok:
+                    self.active_intents[iid] = "Pending"
+                else:
+                    self.active_intents.pop(iid, None)
+            if ok:
+                self._save_state()
+                print(f"[+] {len(intent_ids)} intents confirmed on-chain")
+            else:
+                print(f"[!] Batch of {len(intent_ids)} intents failed to publish (reverted or dropped)")
+            if on_result:
+                on_result(intent_ids, receipt)
+
+        for iid in intent_ids:
+            self.active_intents[iid] = "Publishing"
+        tx_hash = self._send_tx(
+            self.contract.functions.publishIntents(intent_ids, task_tags, raw_jsons, min_scores, leases, bounties),
+            gas=PUBLISH_GAS * len(tasks),
+            value=sum(bounties),
+            on_receipt=on_receipt,
+        )
+        if not tx_hash:
+            for iid in intent_ids:
+                self.active_intents.pop(iid, None)
+            print("[!] Failed to publish intent batch")
             return None
 
+        print(f"[+] Intent batch broadcast OK | tx: {tx_hash}")
+        return intent_ids
+
+    def dispatch_bulk(
+        self,
+        path: str,
+        out_path: str,
+        concurrency: int = BULK_CONCURRENCY,
+        bounty_eth: float = DEFAULT_BOUNTY_ETH,
+        min_score: int = DEFAULT_MIN_SCORE,
+        batch_size: int = PUBLISH_BATCH_SIZE,
+        claim_lease: int | None = None,
+    ) -> Counter:
+        """
+        Publish every task under ``path`` and append one JSON line per task to
+        ``out_path``: ``{source, status, intent_id, tx, error}`` with status
+        published / reverted / dropped / failed / invalid. Tasks go out in
+        ``publishIntents`` batches of ``batch_size``, pipelined with at most
+        ``concurrency`` transactions awaiting a receipt. Tasks already
+        recorded as published in ``out_path`` are skipped, so an interrupted
+        run can simply be repeated. Returns a count per status. Tasks may set
+        ``claim_lease`` to choose claim mode; ``claim_lease`` here is the default.
+        """
+        claim_lease = self.claim_lease if claim_lease is None else claim_lease
+
+        skip     = _completed_sources(out_path)
+        slots    = threading.BoundedSemaphore(concurrency)
+        counts   = Counter()
+        out_lock = threading.Lock()
+        out      = open(out_path, "a", encoding="utf-8")
+
+        def record(source: str, status: str, intent_id: bytes | None = None, tx: str | None = None, error: str = ""):
+            outcome = {"source": source, "status": status,
+                       "intent_id": "0x" + intent_id.hex() if intent_id else None, "tx": tx}
+            if error:
+                outcome["error"] = error
+            with out_lock:
+                out.write(json.dumps(outcome) + "\n")
+                out.flush()
+                counts[status] += 1
+
+        def on_result(intent_ids, receipt, sources):
+            try:
+                for source, intent_id in zip(sources, intent_ids):
+                    if receipt is None:
+                        record(source, "dropped", intent_id)
+                    else:
+                        status = "published" if receipt["status"] == 1 else "reverted"
+                        record(source, status, intent_id, receipt["transactionHash"].hex())
+            finally:
+                slots.release()
+
+        def publish(batch):
+            sources = [source for source, _ in batch]
+            slots.acquire()
+            sent, error = None, "publish failed before broadcast"
+            try:
+                if len(batch) == 1:
+                    payload, score, bounty, lease = batch[0][1]
+                    sent = self.dispatch_intent(
+                        payload, score, bounty, claim_lease=lease,
+                        on_result=lambda iid, receipt: on_result([iid], receipt, sources),
+                    )
+                else:
+                    sent = self.dispatch_intents(
+                        [task for _, task in batch], on_result=lambda iids, receipt: on_result(iids, receipt, sources),
+                    )
+            except Exception as e:
+                error = f"{error}: {e}"
+            finally:
+                if sent is None:
+                    # Nothing was broadcast, so no receipt will free the slot
+                    slots.release()
+            if sent is not None:
+                return
+            if len(batch) > 1:
+                # One bad task must not sink the batch — retry each on its own
+                print(f"[!] Batch of {len(batch)} failed before broadcast — publishing its tasks one by one")
+                for item in batch:
+                    publish([item])
+                return
+            record(sources[0], "failed", error=error)
+
+        started = time.monotonic()
+        batch: list[tuple[str, tuple[dict, int, float, int]]] = []
+        try:
+            for source, task in load_tasks(path):
+                if source in skip:
+                    counts["skipped"] += 1
+                    continue
+                if not isinstance(task, dict):
+                    record(source, "invalid", error="invalid JSON" if task is None else "not a JSON object")
+                    continue
+                if "payload" in task:
+                    payload = task["payload"]
+                    bounty  = task.get("bounty_eth", bounty_eth)
+                    score   = task.get("min_score", min_score)
+                    lease   = task.get("claim_lease", claim_lease)
+                else:
+                    payload, bounty, score, lease = task, bounty_eth, min_score, claim_lease
+                error = _task_error(payload, bounty, score, lease)
+                if error:
+                    record(source, "invalid", error=error)
+                    continue
+
+                batch.append((source, (payload, score, bounty, lease)))
+                if len(batch) >= batch_size:
+                    publish(batch)
+                    batch = []
+            if batch:
+                publish(batch)
+        finally:
+            # Every slot back means every outstanding publish has its outcome on disk
+            for _ in range(concurrency):
+                slots.acquire()
+            out.close()
+
+        elapsed = time.monotonic() - started
+        summary = ", ".join(f"{k}={v}" for k, v in sorted(counts.items()))
+        print(f"[*] Bulk dispatch done in {elapsed:.1f}s | {summary} | outcomes: {out_path}")
+        return counts
+
     # ── x.402 + IPFS settlement ──────────────────────────────────────
 
     @staticmethod
     def _aes_decrypt(key: bytes, data: bytes) -> bytes:
-        """AES-256-GCM decrypt. Layout: nonce(16) | tag(16) | ciphertext."""
+        """AES-256-GCM decrypt (v1.0 manifests). Layout: nonce(16) | tag(16) | ciphertext."""
         nonce, tag, ct = data[:16], data[16:32], data[32:]
         return AES.new(key, AES.MODE_GCM, nonce=nonce).decrypt_and_verify(ct, tag)
 
-    def process_settlement(self, intent_id: bytes, ipfs_url: str, expected_hash: str):
+    @staticmethod
+    def _decrypt_segments(stream, key: bytes, header_bytes: bytes, header: dict):
+        """Yield plaintext from a v2 manifest body, one authenticated segment at a time."""
+        prefix     = bytes.fromhex(header["nonce_prefix"])
+        chunk_size = min(int(header["chunk_size"]), MAX_MANIFEST_CHUNK)
+        index = 0
+        while True:
+            flags  = _read_exact(stream, 1)[0]
+            length = int.from_bytes(_read_exact(stream, 4), "big")
+            if length > chunk_size:
+                raise ValueError(f"Manifest segment {index} exceeds chunk size ({length} > {chunk_size})")
+            body  = _read_exact(stream, length + 16)
+            final = bool(flags & SEGMENT_FINAL)
+            nonce = prefix + index.to_bytes(4, "big") + bytes([final])
+            cipher = AES.new(key, AES.MODE_GCM, nonce=nonce)
+            cipher.update(header_bytes)
+            yield cipher.decrypt_and_verify(body[:length], body[length:])
+            if final:
+                if stream.read(1):
+                    raise ValueError("Trailing data after final manifest segment")
+                return
+            index += 1
+
+    def _open_manifest(self, ipfs_url: str):
         """
-        Full x.402 + IPFS hybrid settlement pipeline:
-          1. Download encrypted manifest from IPFS
-          2. Acquire AES key via x.402 handshake with Worker gateway
-          3. Decrypt payload & verify SHA-256 against on-chain attestation
-          4. Persist plaintext result to local `results/` directory
-          5. Call `approveAndPay` — or `raiseDispute` if hash mismatches
+        Start downloading a result manifest and read only its header.
+
+        Returns ``(response, header, decrypt)``; ``header["key_gateway"]`` is
+        always present, v2 headers may add ``key_batch_url``. ``decrypt(aes_key)`` yields
+        plaintext chunks: a v2 binary manifest is decrypted segment by segment
+        while the rest of the body is still arriving. A v1.0 JSON manifest is
+        read whole. Compressed payloads (header ``codec``) are inflated on the
+        fly, so the caller always sees plaintext. The caller closes ``response``.
         """
-        id_hex = intent_id.hex()
-        print(f"\n[*] Intent {id_hex[:10]}... solved — initiating x.402 settlement")
-
+        resp = self._session(ipfs_url).get(ipfs_url, timeout=IPFS_TIMEOUT, stream=True)
         try:
-            s = requests.Session()
-            s.trust_env = False
-
-            # Step 1 — IPFS manifest
-            print("[IPFS]  Downloading encrypted manifest...")
-            resp = s.get(ipfs_url, timeout=30)
             resp.raise_for_status()
-            manifest       = resp.json()
-            key_gateway    = manifest["key_gateway"]
-            encrypted_data = bytes.fromhex(manifest["encrypted_data"])
-
-            # Step 2 — x.402 key exchange
-            key_url = f"{key_gateway}/{id_hex}"
-            print(f"[x.402] Requesting decryption key: {key_url}")
-
-            r1 = s.get(key_url)
-            if r1.status_code != 402:
-                print(f"[!] Expected 402, got {r1.status_code}. Aborting.")
-                return
-            print("[x.402] Received 402 challenge, signing...")
-
-            message  = encode_defunct(text=f"Unlock_Key_{id_hex}")
-            sig_hex  = self.w3.eth.account.sign_message(
-                message, private_key=self.private_key
-            ).signature.hex()
-
-            r2 = s.get(key_url, headers={"Authorization": f"x402 {sig_hex}"})
-            if r2.status_code != 200:
-                print(f"[!] x.402 authorization failed ({r2.status_code}): {r2.text}")
-                return
+            resp.raw.decode_content = True
+            raw   = resp.raw
+            magic = _read_exact(raw, len(MANIFEST_MAGIC))
+
+            if magic != MANIFEST_MAGIC:
+                manifest  = json.loads(magic + raw.read())
+                encrypted = bytes.fromhex(manifest["encrypted_data"])
+                header    = {"key_gateway": manifest["key_gateway"]}
+                return resp, header, lambda key: iter((self._aes_decrypt(key, encrypted),))
+
+            version = _read_exact(raw, 1)[0]
+            if version != 2:
+                raise ValueError(f"Unsupported manifest version {version}")
+            header_len = int.from_bytes(_read_exact(raw, 4), "big")
+            if header_len > MAX_MANIFEST_HEADER:
+                raise ValueError(f"Manifest header too large ({header_len} bytes)")
+            header_bytes = _read_exact(raw, header_len)
+            header       = json.loads(header_bytes)
+            codec = header.get("codec", "none")
+            return resp, header, lambda key: _decompress(self._decrypt_segments(raw, key, header_bytes, header), codec)
+        except Exception:
+            resp.close()
+            raise
+
+    def _session(self, url: str) -> requests.Session:
+        """
+        Long-lived session per host, so repeated downloads / key requests reuse
+        connections. Connection failures and idempotent requests that hit a
+        transient error status are retried with backoff.
+        """
+        host = urlsplit(url).netloc
+        with self._sessions_lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                session.trust_env = False
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=SETTLEMENT_WORKERS,
+                    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 502, 503, 504)),
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+            return session
+
+    def _fetch_key(self, key_gateway: str, intent_id: bytes) -> bytes | None:
+        """Single-intent x.402 handshake: 402 challenge, then signed retry."""
+        id_hex  = intent_id.hex()
+        key_url = f"{key_gateway}/{id_hex}"
+        print(f"[x.402] Requesting decryption key: {key_url}")
+        s = self._session(key_url)
+
+        r1 = s.get(key_url, timeout=X402_TIMEOUT)
+        if r1.status_code != 402:
+            print(f"[!] Expected 402, got {r1.status_code}. Aborting.")
+            return None
+        print("[x.402] Received 402 challenge, signing...")
 
-            aes_key = bytes.fromhex(r2.json()["key"])
-            print("[x.402] Key acquired successfully")
+        message  = encode_defunct(text=f"Unlock_Key_{id_hex}")
+        sig_hex  = self.w3.eth.account.sign_message(
+            message, private_key=self.private_key
+        ).signature.hex()
 
-            # Step 3 — Decrypt & verify
-            print("[AES]   Decrypting content...")
-            plaintext = self._aes_decrypt(aes_key, encrypted_data)
-            content   = plaintext.decode("utf-8")
+        r2 = s.get(key_url, headers={"Authorization": f"x402 {sig_hex}"}, timeout=X402_TIMEOUT)
+        if r2.status_code != 200:
+            print(f"[!] x.402 authorization failed ({r2.status_code}): {r2.text}")
+            return None
 
-            actual_hash = hashlib.sha256(plaintext).hexdigest()
-            if actual_hash != expected_hash:
-                print(f"[!] Hash mismatch | on-chain: {expected_hash[:16]}... vs decrypted: {actual_hash[:16]}...")
-                print("[!] Integrity check failed — auto-raising on-chain dispute")
-                self._raise_dispute_on_chain(intent_id)
-                return
+        return bytes.fromhex(r2.json()["key"])
+
+    def _fetch_keys(self, batch_url: str, intent_ids: list[bytes]) -> dict[bytes, bytes]:
+        """Batch x.402 handshake (POST /keys): one signature unlocks every owned, solved intent."""
+        body = {"intent_ids": [iid.hex() for iid in intent_ids]}
+        s    = self._session(batch_url)
+        print(f"[x.402] Requesting {len(intent_ids)} keys in one handshake: {batch_url}")
+
+        r1 = s.post(batch_url, json=body, timeout=X402_TIMEOUT)
+        if r1.status_code != 402:
+            raise RuntimeError(f"expected 402, got {r1.status_code}")
+        expected = "Unlock_Keys_" + hashlib.sha256(b"".join(sorted(set(intent_ids)))).hexdigest()
+        if f'challenge="{expected}"' not in r1.headers.get("WWW-Authenticate", ""):
+            raise RuntimeError("unexpected batch challenge")
+
+        sig_hex = self.w3.eth.account.sign_message(
+            encode_defunct(text=expected), private_key=self.private_key
+        ).signature.hex()
+        r2 = s.post(batch_url, json=body, headers={"Authorization": f"x402 {sig_hex}"}, timeout=X402_TIMEOUT)
+        if r2.status_code != 200:
+            raise RuntimeError(f"authorization failed ({r2.status_code}): {r2.text}")
+
+        reply = r2.json()
+        for id_hex, reason in reply.get("errors", {}).items():
+            print(f"[!] x.402 key for {id_hex[:10]}... refused: {reason}")
+        return {bytes.fromhex(h): bytes.fromhex(k) for h, k in reply.get("keys", {}).items()}
+
+    def _batched_key(self, batch_url: str, intent_id: bytes) -> bytes | None:
+        """
+        Join the pending batch for ``batch_url`` and wait for its handshake.
+        A batch is sent KEY_BATCH_WINDOW after its first request, or at once
+        when it reaches KEY_BATCH_SIZE. Returns None if the gateway refused
+        this intent.
+        """
+        future: Future = Future()
+        with self._key_batch_lock:
+            batch = self._key_batches.setdefault(batch_url, [])
+            batch.append((intent_id, future))
+            if len(batch) == 1:
+                threading.Timer(KEY_BATCH_WINDOW, self._flush_keys, args=(batch_url,)).start()
+            full = len(batch) >= KEY_BATCH_SIZE
+        if full:
+            self._flush_keys(batch_url)
+        return future.result(timeout=KEY_BATCH_WINDOW + 2 * sum(X402_TIMEOUT))
+
+    def _flush_keys(self, batch_url: str):
+        with self._key_batch_lock:
+            batch = self._key_batches.pop(batch_url, [])
+        if not batch:
+            return
+        try:
+            keys = self._fetch_keys(batch_url, [iid for iid, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for iid, future in batch:
+            future.set_result(keys.get(iid))
+
+    def start_settlement(self, intent_id: bytes, ipfs_url: str, expected_hash: str):
+        """Hand a solved intent to the settlement pool; never blocks the event scanner."""
+        self.active_intents[intent_id] = "Verifying"
+        self._settle_pool.submit(self._run_settlement, intent_id, ipfs_url, expected_hash)
+
+    def _run_settlement(self, intent_id: bytes, ipfs_url: str, expected_hash: str):
+        try:
+            self.process_settlement(intent_id, ipfs_url, expected_hash)
+        finally:
+            if self.active_intents.get(intent_id) == "Verifying":
+                # Off-chain verification did not complete — fall back to the timers
+                self.active_intents[intent_id] = "Pending"
+                self._schedule(int(time.time()) + TIMER_RETRY, intent_id, "reconcile")
 
-            print(f"[+] Decryption & hash verification passed ({len(content)} bytes)")
+    def process_settlement(self, intent_id: bytes, ipfs_url: str, expected_hash: str):
+        """
+        Full x.402 + IPFS hybrid settlement pipeline:
+          1. Open the encrypted manifest on IPFS and read its header
+          2. Acquire AES key via x.402 handshake with Worker gateway (batched per gateway)
+          3. Stream-decrypt the payload & verify SHA-256 against on-chain attestation
+          4. Persist plaintext result to local `results/` directory
+          5. Call `approveAndPay` — or `raiseDispute` if hash mismatches
 
-            # Step 4 — Persist result locally
-            results_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
-            os.makedirs(results_dir, exist_ok=True)
-            result_path = os.path.join(results_dir, f"{id_hex[:16]}.txt")
-            with open(result_path, "w", encoding="utf-8") as f:
-                f.write(content)
+        Runs on the settlement pool (see ``start_settlement``); each network or
+        CPU stage is capped by its own concurrency limit.
+        """
+        id_hex = intent_id.hex()
+        print(f"\n[*] Intent {id_hex[:10]}... solved — initiating x.402 settlement")
 
-            print(f"[+] Result saved to: {result_path} ({len(content)} bytes)")
+        try:
+            # Step 1 — IPFS manifest header (the worker may still be uploading it)
+            for attempt in range(MANIFEST_FETCH_ATTEMPTS):
+                try:
+                    with self._stage_limits["download"]:
+                        print("[IPFS]  Opening result manifest...")
+                        resp, header, decrypt = self._open_manifest(ipfs_url)
+                    break
+                except requests.RequestException as e:
+                    if attempt == MANIFEST_FETCH_ATTEMPTS - 1:
+                        raise
+                    delay = MANIFEST_RETRY_DELAY * 2 ** attempt
+                    print(f"[IPFS]  Manifest not available yet ({e}) — retrying in {delay}s")
+                    time.sleep(delay)
+
+            with resp:
+                # Step 2 — x.402 key exchange, batched per gateway where supported
+                aes_key   = None
+                batch_url = header.get("key_batch_url")
+                if batch_url:
+                    try:
+                        aes_key = self._batched_key(batch_url, intent_id)
+                        if aes_key is None:
+                            print(f"[!] x.402 gateway refused the key for {id_hex[:10]}...")
+                            return
+                    except Exception as e:
+                        print(f"[!] Batch key request failed ({e}) — falling back to single handshake")
+                if aes_key is None:
+                    with self._stage_limits["key"]:
+                        aes_key = self._fetch_key(header["key_gateway"], intent_id)
+                    if aes_key is None:
+                        return
+                print("[x.402] Key acquired successfully")
+
+                # Steps 3+4 — Stream the body through decrypt + SHA-256 into a temp
+                # file; it only becomes the result once the hash matches
+                results_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+                os.makedirs(results_dir, exist_ok=True)
+                result_path = os.path.join(results_dir, f"{id_hex[:16]}.txt")
+                part_path   = result_path + ".part"
+
+                with self._stage_limits["download"]:
+                    print("[AES]   Downloading, decrypting & hashing content...")
+                    hasher = hashlib.sha256()
+                    size   = 0
+                    try:
+                        with open(part_path, "wb") as f:
+                            for chunk in decrypt(aes_key):
+                                f.write(chunk)
+                                hasher.update(chunk)
+                                size += len(chunk)
+
+                        actual_hash = hasher.hexdigest()
+                        if actual_hash != expected_hash:
+                            print(f"[!] Hash mismatch | on-chain: {expected_hash[:16]}... vs decrypted: {actual_hash[:16]}...")
+                            print("[!] Integrity check failed — auto-raising on-chain dispute")
+                            self.active_intents[intent_id] = "Pending"
+                            self._raise_dispute_on_chain(intent_id)
+                            return
+
+                        os.replace(part_path, result_path)
+                    finally:
+                        if os.path.exists(part_path):
+                            os.remove(part_path)
+
+                print("[+] Decryption & hash verification passed")
+                print(f"[+] Result saved to: {result_path} ({size} bytes)")
 
             # Step 5 — On-chain settlement
-            tx_hash = self._send_tx(self.contract.functions.approveAndPay(intent_id))
-            if tx_hash:
-                self.active_intents[intent_id] = "Settled"
-                print(f"[+] Funds released | tx: {tx_hash}")
+            self.active_intents[intent_id] = "Pending"
+            self._transition(
+                intent_id, self.contract.functions.approveAndPay(intent_id),
+                via="Settling", to="Settled", done_msg="[+] Funds released",
+            )
 
         except Exception as e:
             print(f"[!] Settlement error: {e}")
 
-    # ── Transaction helper ───────────────────────────────────────────
+    # ── Transaction helpers ──────────────────────────────────────────
 
-    def _send_tx(self, fn_call, gas: int = 150_000) -> str | None:
-        """Build, sign, broadcast a contract call. Returns tx hash or None."""
+    def _send_tx(self, fn_call, gas: int = 150_000, value: int = 0, on_receipt=None) -> str | None:
+        """Sign and broadcast a contract call without waiting. Returns tx hash or None."""
         try:
-            tx = fn_call.build_transaction({
-                "from": self.account.address,
-                "nonce": self.w3.eth.get_transaction_count(self.account.address),
-                "gas": gas,
-                "gasPrice": self.w3.eth.gas_price,
-            })
-            signed  = self.w3.eth.account.sign_transaction(tx, private_key=self.private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed.raw_transaction)
-            self.w3.eth.wait_for_transaction_receipt(tx_hash)
-            return tx_hash.hex()
+            return self.tx.send(fn_call, gas=gas, value=value, on_receipt=on_receipt).hex()
         except Exception as e:
             print(f"[!] Transaction failed: {e}")
             return None
 
+    def _transition(self, intent_id: bytes, fn_call, via: str, to: str, done_msg: str, fail_msg: str = "") -> str | None:
+        """
+        Broadcast ``fn_call`` and park the intent in the in-flight status ``via``
+        until the receipt arrives; then move it to ``to``, or back to its
+        previous status if the transaction reverted or was dropped. Failures
+        schedule a reconcile against chain state rather than a blind retry.
+        """
+        previous = self.active_intents.get(intent_id, "Pending")
+
+        def on_receipt(receipt):
+            if receipt is not None and receipt["status"] == 1:
+                self.active_intents[intent_id] = to
+                print(f"{done_msg} | tx: {receipt['transactionHash'].hex()}")
+            else:
+                self.active_intents[intent_id] = previous
+                self._schedule(int(time.time()) + TIMER_RETRY, intent_id, "reconcile")
+                print(fail_msg or f"[!] {via} {intent_id.hex()[:10]}... failed (reverted or dropped)")
+
+        self.active_intents[intent_id] = via
+        tx_hash = self._send_tx(fn_call, on_receipt=on_receipt)
+        if not tx_hash:
+            self.active_intents[intent_id] = previous
+            self._schedule(int(time.time()) + TIMER_RETRY, intent_id, "reconcile")
+            if fail_msg:
+                print(fail_msg)
+        return tx_hash
+
     # ── Tier 3 helpers ───────────────────────────────────────────────
 
     def _raise_dispute_on_chain(self, intent_id: bytes):
         id_hex = intent_id.hex()
         print(f"[*] Raising on-chain dispute for {id_hex[:10]}...")
-        tx_hash = self._send_tx(self.contract.functions.raiseDispute(intent_id))
-        if tx_hash:
-            self.active_intents[intent_id] = "Disputed"
-            print(f"[+] Dispute submitted — awaiting third-party verifier votes | tx: {tx_hash}")
-        else:
-            print("[!] raiseDispute failed (challenge period may have expired)")
+        self._transition(
+            intent_id, self.contract.functions.raiseDispute(intent_id),
+            via="Disputing", to="Disputed",
+            done_msg="[+] Dispute submitted — awaiting third-party verifier votes",
+            fail_msg="[!] raiseDispute failed (challenge period may have expired)",
+        )
 
     def _try_auto_settle(self, intent_id: bytes):
         id_hex = intent_id.hex()
         print(f"[*] Challenge period elapsed for {id_hex[:10]}... — calling autoSettle")
-        tx_hash = self._send_tx(self.contract.functions.autoSettle(intent_id))
-        if tx_hash:
-            self.active_intents[intent_id] = "Settled"
-            print(f"[+] autoSettle complete — worker received bounty + stake | tx: {tx_hash}")
+        self._transition(
+            intent_id, self.contract.functions.autoSettle(intent_id),
+            via="Settling", to="Settled",
+            done_msg="[+] autoSettle complete — worker received bounty + stake",
+        )
+
+    def _auto_settle_many(self, intent_ids: list[bytes]):
+        """
+        ``_try_auto_settle`` for many intents: one ``settleMany`` per SETTLE_BATCH_SIZE.
+        A batch that reverts, is dropped or never broadcasts falls back to one
+        ``autoSettle`` per intent, so a single bad ID cannot hold up the rest.
+        """
+        if len(intent_ids) == 1:
+            self._try_auto_settle(intent_ids[0])
+            return
+        for i in range(0, len(intent_ids), SETTLE_BATCH_SIZE):
+            chunk    = intent_ids[i:i + SETTLE_BATCH_SIZE]
+            previous = {iid: self.active_intents.get(iid, "Pending") for iid in chunk}
+            print(f"[*] Challenge period elapsed for {len(chunk)} intents — calling settleMany")
+
+            def settle_each(chunk=chunk, previous=previous):
+                print(f"[!] settleMany failed — settling {len(chunk)} intents one by one")
+                for iid in chunk:
+                    self.active_intents[iid] = previous[iid]
+                    self._try_auto_settle(iid)
+
+            def on_receipt(receipt, chunk=chunk, previous=previous):
+                if receipt is None or receipt["status"] != 1:
+                    settle_each()
+                    return
+                events  = (self._decode(log) for log in receipt["logs"])
+                settled = {ev["args"]["intentId"] for ev in events if ev and ev["event"] == "IntentSettled"}
+                for iid in chunk:
+                    if iid in settled:
+                        self.active_intents[iid] = "Settled"
+                    else:
+                        # Skipped by the contract — re-derive from chain state
+                        self.active_intents[iid] = previous[iid]
+                        self._schedule(int(time.time()) + TIMER_RETRY, iid, "reconcile")
+                print(f"[+] settleMany complete — {len(settled)}/{len(chunk)} settled")
+
+            for iid in chunk:
+                self.active_intents[iid] = "Settling"
+            tx_hash = self._send_tx(
+                self.contract.functions.settleMany(chunk),
+                gas=SETTLE_GAS_BASE + SETTLE_GAS * len(chunk),
+                on_receipt=on_receipt,
+            )
+            if not tx_hash:
+                settle_each()
 
     def _try_finalize_dispute(self, intent_id: bytes):
         id_hex = intent_id.hex()
         print(f"[*] Vote period ended for {id_hex[:10]}... — calling finalizeDispute")
-        tx_hash = self._send_tx(self.contract.functions.finalizeDispute(intent_id))
-        if tx_hash:
-            self.active_intents[intent_id] = "Settled"
-            print(f"[+] Dispute finalized | tx: {tx_hash}")
+        self._transition(
+            intent_id, self.contract.functions.finalizeDispute(intent_id),
+            via="Settling", to="Settled", done_msg="[+] Dispute finalized",
+        )
 
     def _refund_expired(self, intent_id: bytes):
         id_hex = intent_id.hex()
         print(f"\n[*] Intent {id_hex[:10]}... expired — calling refundAndSlash")
-        tx_hash = self._send_tx(self.contract.functions.refundAndSlash(intent_id))
-        if tx_hash:
-            self.active_intents[intent_id] = "Refunded"
-            print(f"[+] Refund complete | tx: {tx_hash}")
-        else:
-            print("[!] refundAndSlash failed")
+        self._transition(
+            intent_id, self.contract.functions.refundAndSlash(intent_id),
+            via="Refunding", to="Refunded", done_msg="[+] Refund complete",
+            fail_msg="[!] refundAndSlash failed",
+        )
 
     # ── Event loop ───────────────────────────────────────────────────
 
+    def _block_time(self, block_number: int) -> int:
+        ts = self._block_times.get(block_number)
+        if ts is None:
+            ts = self.w3.eth.get_block(block_number)["timestamp"]
+            self._block_times[block_number] = ts
+            if len(self._block_times) > 256:
+                self._block_times.popitem(last=False)
+        return ts
+
+    def _schedule(self, due: int, intent_id: bytes, action: str):
+        """Arm a timer; ``due`` is a chain timestamp after which ``action`` becomes valid."""
+        with self._timer_lock:
+            heapq.heappush(self._timers, (due + TIMER_SLACK, intent_id, action))
+
+    def _on_event(self, ev):
+        """Advance the settlement state machine from one decoded IntentPool event."""
+        if ev is None:
+            return
+        iid  = ev["args"]["intentId"]
+        name = ev["event"]
+
+        if name == "IntentPublished":
+            if self.active_intents.get(iid) in (None, "Publishing"):
+                self.active_intents[iid] = "Pending"
+            self._schedule(self._block_time(ev["blockNumber"]) + INTENT_TTL, iid, "refund")
+            return
+
+        status = self.active_intents.get(iid)
+        if status is None or status in FINAL_STATUSES:
+            return
+
+        if name == "IntentSolved":
+            self._schedule(self._block_time(ev["blockNumber"]) + CHALLENGE_PERIOD, iid, "auto_settle")
+            if status == "Pending":
+                self.start_settlement(iid, ev["args"]["dataUrl"], ev["args"]["resultHash"])
+        elif name == "ResultChallenged":
+            if status not in IN_FLIGHT_STATUSES:
+                self.active_intents[iid] = "Disputed"
+            self._schedule(self._block_time(ev["blockNumber"]) + VOTE_PERIOD, iid, "finalize")
+        elif name in ("DisputeResolved", "IntentSettled"):
+            self.active_intents[iid] = "Refunded" if status == "Refunding" else "Settled"
+
+    def _fire_due_timers(self):
+        """Run every deadline action whose on-chain precondition now holds."""
+        now = time.time()
+        due = []
+        with self._timer_lock:
+            while self._timers and self._timers[0][0] <= now:
+                due.append(heapq.heappop(self._timers))
+
+        stale, settle = [], []
+        for _, iid, action in due:
+            status = self.active_intents.get(iid)
+            if status is None or status in FINAL_STATUSES or status in IN_FLIGHT_STATUSES:
+                continue
+            if action == "reconcile":
+                stale.append(iid)
+            elif action == "auto_settle" and status == "Pending":
+                settle.append(iid)
+            elif action == "finalize" and status == "Disputed":
+                self._try_finalize_dispute(iid)
+            elif action == "refund":
+                self._refund_expired(iid)
+        if settle:
+            self._auto_settle_many(list(dict.fromkeys(settle)))
+        if stale:
+            self._reconcile(list(dict.fromkeys(stale)))
+
+    def _reconcile(self, intent_ids: list[bytes]):
+        """Rebuild statuses and timers from on-chain state (startup and after failed transactions)."""
+        if not intent_ids:
+            return
+        try:
+            states = self.read_intent_states(intent_ids)
+        except Exception as e:
+            print(f"[!] State query error (retrying later): {e}")
+            for iid in intent_ids:
+                self._schedule(int(time.time()) + TIMER_RETRY, iid, "reconcile")
+            return
+
+        for iid, (core, dispute) in states.items():
+            status = self.active_intents.get(iid)
+            if status is None or status in IN_FLIGHT_STATUSES:
+                continue
+            if int(core.employer, 16) == 0:
+                # Publish never landed (e.g. restored mid-flight) — nothing to settle
+                del self.active_intents[iid]
+                continue
+            if core.is_resolved:
+                self.active_intents[iid] = "Refunded" if status == "Refunded" else "Settled"
+                continue
+
+            if dispute.is_disputed:
+                self.active_intents[iid] = "Disputed"
+                self._schedule(dispute.vote_deadline, iid, "finalize")
+            else:
+                self.active_intents[iid] = "Pending"
+                if core.is_solved:
+                    self._schedule(dispute.challenge_period_end, iid, "auto_settle")
+            self._schedule(core.deadline, iid, "refund")
+
+    def _backfill(self):
+        head = self.w3.eth.block_number
+        if head <= self.last_scanned_block:
+            return
+        print(f"[*] Backfilling blocks {self.last_scanned_block + 1} → {head}...")
+        try:
+            for logs, range_end in backfill_logs(self.source.fetch, self.last_scanned_block + 1, head):
+                for log in logs:
+                    self._on_event(self._decode(log))
+                self.last_scanned_block = range_end
+                self._save_state()
+            print("[*] Backfill complete.")
+        except Exception as e:
+            print(f"[!] Backfill interrupted, resuming via live tailing: {e}")
+
     def watch_events(self):
         """
-        Background poller driving the settlement state-machine:
-          1. IntentSolved → start x.402 settlement  (Tier 1)
-          2. Challenge period elapsed, no dispute    → autoSettle   (Tier 2)
-          3. Dispute vote period elapsed             → finalizeDispute (Tier 3)
-          4. Global deadline exceeded                → refundAndSlash
+        Event-driven settlement state machine:
+          IntentPublished   → arm refund timer at the intent deadline
+          IntentSolved      → start x.402 settlement (Tier 1), arm autoSettle timer (Tier 2)
+          ResultChallenged  → arm finalizeDispute timer at the vote deadline (Tier 3)
+          DisputeResolved / IntentSettled → terminal
+
+        Deadlines follow exactly from event block timestamps and the contract
+        constants, so a min-heap fires each action when it becomes valid and
+        no per-intent polling happens in steady state. On startup tracked
+        intents are reconciled once from chain state and missed blocks are
+        backfilled before switching to live tailing.
         """
-        while True:
+        self._reconcile([
+            iid for iid, status in list(self.active_intents.items())
+            if status not in FINAL_STATUSES
+        ])
+        self._backfill()
+
+        for logs, scanned in self.source.batches(self.last_scanned_block):
             try:
-                head = self.w3.eth.block_number
-                if head > self.last_scanned_block:
-                    batch_end = min(self.last_scanned_block + 10, head)
-
-                    for ev in self.contract.events.IntentSolved.get_logs(
-                        from_block=self.last_scanned_block + 1, to_block=batch_end
-                    ):
-                        iid  = ev["args"]["intentId"]
-                        if self.active_intents.get(iid) == "Pending":
-                            self.process_settlement(
-                                iid, ev["args"]["dataUrl"], ev["args"]["resultHash"]
-                            )
-
-                    self.last_scanned_block = batch_end
-
-                now = int(time.time())
-                for iid, status in list(self.active_intents.items()):
-                    if status in ("Settled", "Refunded"):
-                        continue
-                    try:
-                        c  = self.contract.functions.intents(iid).call()
-                        dp = self.contract.functions.intentDisputes(iid).call()
-
-                        is_resolved   = c[6]
-                        deadline      = c[8]
-                        challenge_end = dp[0]
-                        is_disputed   = dp[1]
-                        vote_deadline = dp[4]
-
-                        if is_resolved:
-                            self.active_intents[iid] = "Settled"
-                            continue
-
-                        if status == "Pending" and c[5] and not is_disputed and challenge_end > 0 and now > challenge_end:
-                            self._try_auto_settle(iid)
-                        elif status == "Disputed" and vote_deadline > 0 and now > vote_deadline:
-                            self._try_finalize_dispute(iid)
-                        elif now > deadline:
-                            self._refund_expired(iid)
-                    except Exception as e:
-                        print(f"[!] State query error: {e}")
+                for log in logs:
+                    self._on_event(self._decode(log))
+
+                if scanned != self.last_scanned_block:
+                    self.last_scanned_block = scanned
+                    self._save_state()
+
+                self._fire_due_timers()
 
             except Exception as e:
                 print(f"[!] Event loop error (auto-retrying): {e}")
-            time.sleep(2)
+
+    def read_intent_states(self, intent_ids: list[bytes]) -> dict[bytes, tuple[IntentCore, IntentDispute]]:
+        """
+        Read ``intents()`` + ``intentDisputes()`` for many intents using
+        JSON-RPC batch requests — one round-trip per READ_BATCH_SIZE intents
+        instead of two per intent. Falls back to sequential calls if the
+        provider does not support batching.
+        """
+        states: dict[bytes, tuple[IntentCore, IntentDispute]] = {}
+        for i in range(0, len(intent_ids), READ_BATCH_SIZE):
+            chunk   = intent_ids[i:i + READ_BATCH_SIZE]
+            results = None
+            if self._batch_reads:
+                try:
+                    with self.w3.batch_requests() as batch:
+                        for iid in chunk:
+                            batch.add(self.contract.functions.intents(iid))
+                            batch.add(self.contract.functions.intentDisputes(iid))
+                        results = batch.execute()
+                except Exception as e:
+                    print(f"[!] Batched reads unavailable ({e}) — using sequential calls")
+                    self._batch_reads = False
+            if results is None:
+                results = []
+                for iid in chunk:
+                    results.append(self.contract.functions.intents(iid).call())
+                    results.append(self.contract.functions.intentDisputes(iid).call())
+            for j, iid in enumerate(chunk):
+                states[iid] = (IntentCore(*results[2 * j]), IntentDispute(*results[2 * j + 1]))
+        return states
 
     # ── Task dispatch from file ──────────────────────────────────────
 
@@ -359,13 +1312,35 @@ class EmployerAgent:
         except Exception as e:
             print(f"[!] Error reading task file: {e}")
 
+    # ── Claim bonds ──────────────────────────────────────────────────
+
+    def withdraw_credits(self) -> bool:
+        """Withdraw claim bonds forfeited by workers whose leases lapsed. Blocks until mined."""
+        credit = self.contract.functions.credits(self.tx.address).call()
+        if credit == 0:
+            print("[*] No forfeited claim bonds to withdraw.")
+            return True
+        print(f"[*] Withdrawing {self.w3.from_wei(credit, 'ether')} ETH of forfeited claim bonds...")
+        tx_hash = self._send_tx(self.contract.functions.withdrawCredits(), gas=60_000)
+        receipt = self.tx.wait(HexBytes(tx_hash)) if tx_hash else None
+        if receipt is None or receipt["status"] != 1:
+            print("[!] Withdrawal failed.")
+            return False
+        print(f"[+] Credits withdrawn | tx: {tx_hash}")
+        return True
+
     # ── Main loop ────────────────────────────────────────────────────
 
-    def run(self):
-        watcher = threading.Thread(target=self.watch_events, daemon=True)
-        watcher.start()
+    def start_watcher(self):
+        if self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self.watch_events, daemon=True)
+        self._watcher.start()
         print("[*] Event watcher started. Listening for settlement events...\n")
 
+    def run(self):
+        """Interactive mode: publish task files entered at the prompt."""
+        self.start_watcher()
         try:
             while True:
                 cmd = input("[Ready] Enter task file name (e.g. task_payload.json), or Ctrl+C to quit: ")
@@ -374,8 +1349,91 @@ class EmployerAgent:
                 else:
                     time.sleep(1)
         except KeyboardInterrupt:
+            self._save_state(force=True)
             print("\n[*] Shutting down gracefully.")
 
+    def watch(self):
+        """Headless mode: settle tracked intents until interrupted."""
+        self.start_watcher()
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            self._save_state(force=True)
+            print("\n[*] Shutting down gracefully.")
+
+
+# ── Entry point ──────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description="A2A IntentPool Employer Daemon")
+    subs = parser.add_subparsers(dest="command")
+
+    dispatch_p = subs.add_parser("dispatch", help="Publish every task in a JSONL file or directory, without the prompt")
+    dispatch_p.add_argument("tasks", help="JSONL file, JSON file, or directory of *.json / *.jsonl task files")
+    dispatch_p.add_argument(
+        "--out", default=None,
+        help="Per-task outcome file, appended to (default: <tasks>.outcomes.jsonl); "
+             "tasks already published there are skipped on re-run",
+    )
+    dispatch_p.add_argument(
+        "--concurrency", type=int, default=BULK_CONCURRENCY,
+        help=f"Max publish transactions awaiting a receipt (default: {BULK_CONCURRENCY})",
+    )
+    dispatch_p.add_argument(
+        "--batch-size", type=int, default=PUBLISH_BATCH_SIZE,
+        help=f"Intents per publishIntents transaction; 1 publishes one by one (default: {PUBLISH_BATCH_SIZE})",
+    )
+    dispatch_p.add_argument(
+        "--bounty", type=float, default=DEFAULT_BOUNTY_ETH,
+        help=f"Bounty in ETH for tasks that do not set bounty_eth (default: {DEFAULT_BOUNTY_ETH})",
+    )
+    dispatch_p.add_argument(
+        "--min-score", type=int, default=DEFAULT_MIN_SCORE,
+        help=f"Minimum worker score for tasks that do not set min_score (default: {DEFAULT_MIN_SCORE})",
+    )
+    dispatch_p.add_argument(
+        "--watch", action="store_true",
+        help="Keep running after dispatch and settle the published intents",
+    )
+    dispatch_p.add_argument(
+        "--claim-lease", type=int, default=0,
+        help="Publish in claim mode: a worker's on-chain claim holds an intent for this many "
+             "seconds (default: 0, no claims); tasks may set claim_lease themselves",
+    )
+    dispatch_p.add_argument(
+        "--offchain", choices=OFFCHAIN_MODES, default="auto",
+        help=f"Publish payloads as hash-referenced descriptors pinned via PAYLOAD_IPFS_API: "
+             f"auto (payloads >= {OFFCHAIN_MIN_BYTES} bytes when set, default), always or never",
+    )
+
+    subs.add_parser("watch", help="Settle tracked intents headlessly (no prompt)")
+    subs.add_parser("withdraw", help="Withdraw claim bonds forfeited by workers whose leases lapsed")
+
+    args = parser.parse_args()
+    if problem := deployment_problem(Web3(Web3.HTTPProvider(RPC_URL, session=_http)), CONTRACT_ADDRESS):
+        print(problem)
+        sys.exit(1)
+    if args.command == "dispatch":
+        agent = EmployerAgent(offchain=args.offchain, claim_lease=args.claim_lease)
+        if args.watch:
+            agent.start_watcher()
+        out_path = args.out or args.tasks.rstrip("/" + os.sep) + ".outcomes.jsonl"
+        counts = agent.dispatch_bulk(
+            args.tasks, out_path, args.concurrency, args.bounty, args.min_score, args.batch_size,
+        )
+        if args.watch:
+            agent.watch()
+        elif counts["failed"] or counts["invalid"] or counts["reverted"] or counts["dropped"]:
+            sys.exit(1)
+    elif args.command == "watch":
+        EmployerAgent().watch()
+    elif args.command == "withdraw":
+        if not EmployerAgent().withdraw_credits():
+            sys.exit(1)
+    else:
+        EmployerAgent().run()
+
 
 if __name__ == "__main__":
-    EmployerAgent().run()
+    main()
@@ -0,0 +1,208 @@
+"""
+Transaction pipeline — local nonce allocation and asynchronous receipt
+tracking, so an account can keep many transactions in flight instead of
+waiting one confirmation round-trip per transaction.
+
+The worker and employer ship as independent components, so each directory
+carries its own copy of this module; keep them byte-identical
+(tests/test_shared_modules.py fails when they diverge).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from web3.exceptions import TransactionNotFound
+
+GAS_PRICE_TTL   = 5      # seconds a fetched gas price is reused
+RECEIPT_POLL    = 1.0    # seconds between receipt sweeps
+RECEIPT_TIMEOUT = 180    # seconds between checks on whether an unmined transaction can still land
+
+
+class NonceManager:
+    """
+    Hands out nonces for one account from a local counter.
+
+    The counter is seeded from the chain's pending nonce on first use and
+    re-seeded only after something went wrong (rejected broadcast, dropped
+    transaction), never on the happy path.
+    """
+
+    def __init__(self, w3, address: str):
+        self.w3      = w3
+        self.address = address
+        self._lock   = threading.Lock()
+        self._next: int | None = None
+
+    def allocate(self) -> int:
+        with self._lock:
+            if self._next is None:
+                self._next = self.w3.eth.get_transaction_count(self.address, "pending")
+            nonce = self._next
+            self._next += 1
+            return nonce
+
+    def release(self, nonce: int):
+        """Hand back a nonce that was allocated but never broadcast."""
+        with self._lock:
+            if self._next == nonce + 1:
+                self._next = nonce
+            else:
+                # Later nonces are already out; re-seed so the gap gets filled
+                self._next = None
+
+    def resync(self):
+        with self._lock:
+            self._next = None
+
+
+class TxPipeline:
+    """
+    Signs and broadcasts contract calls without blocking on receipts.
+
+    ``send`` returns the transaction hash as soon as the node accepts it; a
+    background thread collects receipts and fires ``on_receipt(receipt)``
+    (``receipt`` is None if the transaction never got mined). Since one
+    account's transactions are mined in nonce order, each sweep stops at the
+    first unmined transaction, so tracking costs O(newly mined) calls.
+    """
+
+    def __init__(self, w3, private_key: str):
+        self.w3          = w3
+        self.private_key = private_key
+        self.address     = w3.eth.account.from_key(private_key).address
+        self.nonces      = NonceManager(w3, self.address)
+
+        self._lock      = threading.Lock()
+        self._pending: dict[int, tuple] = {}             # nonce → (tx_hash, on_receipt, sent_at)
+        self._waiters: dict[bytes, threading.Event] = {}
+        self._done: OrderedDict[bytes, object] = OrderedDict()   # recent tx_hash → receipt
+        self._gas_price = (0, 0.0)
+        self._tracker: threading.Thread | None = None
+
+    # ── Broadcasting ──
+
+    def gas_price(self) -> int:
+        price, fetched_at = self._gas_price
+        if time.monotonic() - fetched_at > GAS_PRICE_TTL:
+            price = self.w3.eth.gas_price
+            self._gas_price = (price, time.monotonic())
+        return price
+
+    def send(self, fn_call, gas: int = 150_000, value: int = 0, on_receipt=None):
+        """Build, sign and broadcast ``fn_call``. Returns the tx hash (HexBytes)."""
+        gas_price = self.gas_price()
+        for attempt in range(2):
+            nonce = self.nonces.allocate()
+            try:
+                tx = fn_call.build_transaction({
+                    "from": self.address,
+                    "value": value,
+                    "nonce": nonce,
+                    "gas": gas,
+                    "gasPrice": gas_price,
+                })
+                signed = self.w3.eth.account.sign_transaction(tx, private_key=self.private_key)
+            except Exception:
+                # Nothing was broadcast — an unused nonce would stall every later transaction
+                self.nonces.release(nonce)
+                raise
+            try:
+                tx_hash = self.w3.eth.send_raw_transaction(signed.raw_transaction)
+            except Exception as e:
+                # The local counter is now ahead of (or behind) the chain
+                self.nonces.resync()
+                if attempt == 0 and "nonce" in str(e).lower():
+                    continue
+                raise
+            with self._lock:
+                self._pending[nonce] = (tx_hash, on_receipt, time.monotonic())
+            self._ensure_tracker()
+            return tx_hash
+
+    def wait(self, tx_hash, timeout: float | None = None):
+        """
+        Block until ``tx_hash`` (sent via this pipeline) is mined, replaced or
+        dropped, or ``timeout`` runs out; returns the receipt or None.
+        """
+        key = bytes(tx_hash)
+        with self._lock:
+            if key in self._done:
+                return self._done[key]
+            event = self._waiters.setdefault(key, threading.Event())
+        event.wait(timeout)
+        with self._lock:
+            self._waiters.pop(key, None)
+            return self._done.get(key)
+
+    # ── Receipt tracking ──
+
+    def _ensure_tracker(self):
+        with self._lock:
+            if self._tracker is None or not self._tracker.is_alive():
+                self._tracker = threading.Thread(target=self._track, name="tx-receipts", daemon=True)
+                self._tracker.start()
+
+    def _track(self):
+        while True:
+            time.sleep(RECEIPT_POLL)
+            with self._lock:
+                pending = sorted(self._pending.items())
+            for nonce, (tx_hash, on_receipt, sent_at) in pending:
+                try:
+                    receipt = self.w3.eth.get_transaction_receipt(tx_hash)
+                except TransactionNotFound:
+                    if time.monotonic() - sent_at < RECEIPT_TIMEOUT or self._still_pending(nonce, tx_hash, on_receipt):
+                        break
+                    receipt = None
+                except Exception as e:
+                    print(f"[!] Receipt poll error (auto-retrying): {e}")
+                    break
+                self._complete(nonce, tx_hash, on_receipt, receipt)
+
+    def _still_pending(self, nonce: int, tx_hash, on_receipt) -> bool:
+        """
+        Decide the fate of a transaction with no receipt after RECEIPT_TIMEOUT.
+        Only a transaction that can no longer be mined is given up on: one
+        whose nonce went to another transaction (replaced), or one that left
+        the mempool before its nonce was used (dropped). Anything else is
+        still pending and is checked again after another RECEIPT_TIMEOUT.
+        """
+        short = tx_hash.hex()[:10]
+        try:
+            if nonce >= self.w3.eth.get_transaction_count(self.address, "latest"):
+                try:
+                    self.w3.eth.get_transaction(tx_hash)
+                except TransactionNotFound:
+                    print(f"[Tx] {short}... dropped from the mempool unmined — resyncing nonce")
+                    self.nonces.resync()
+                    return False
+                print(f"[Tx] {short}... still pending after {RECEIPT_TIMEOUT}s — waiting")
+            else:
+                try:
+                    self.w3.eth.get_transaction_receipt(tx_hash)   # mined since the last sweep
+                except TransactionNotFound:
+                    print(f"[Tx] {short}... replaced: nonce {nonce} was mined by another transaction")
+                    return False
+        except Exception as e:
+            print(f"[!] Could not check overdue tx {short}... (auto-retrying): {e}")
+        with self._lock:
+            if nonce in self._pending:
+                self._pending[nonce] = (tx_hash, on_receipt, time.monotonic())
+        return True
+
+    def _complete(self, nonce: int, tx_hash, on_receipt, receipt):
+        key = bytes(tx_hash)
+        with self._lock:
+            self._pending.pop(nonce, None)
+            self._done[key] = receipt
+            if len(self._done) > 1_000:
+                self._done.popitem(last=False)
+            event = self._waiters.get(key)
+        if event:
+            event.set()
+        if on_receipt:
+            try:
+                on_receipt(receipt)
+            except Exception as e:
+                print(f"[!] Receipt callback error: {e}")
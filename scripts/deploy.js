@@ -0,0 +1,42 @@
+// Deploy IntentPool (and, unless one is given, a fresh AgentIdentity registry).
+//
+//   npm run deploy:monad                                  (PRIVATE_KEY=0x... in the env)
+//   IDENTITY_ADDRESS=0x... npm run deploy:monad           (keep an existing registry)
+//
+// Reusing the live AgentIdentity keeps every agent's registration and score;
+// read its address from the old pool's `identityContract()`. Prints the env
+// lines that point the worker, gateway, employer and explorer at the new pool.
+
+const hre = require("hardhat");
+
+async function main() {
+  const [deployer] = await hre.ethers.getSigners();
+  console.log(`Deploying from ${deployer.address} on ${hre.network.name}`);
+
+  let identityAddress = process.env.IDENTITY_ADDRESS;
+  if (identityAddress) {
+    if ((await hre.ethers.provider.getCode(identityAddress)) === "0x") {
+      throw new Error(`IDENTITY_ADDRESS ${identityAddress} has no contract code`);
+    }
+    console.log(`AgentIdentity (existing): ${identityAddress}`);
+  } else {
+    const identity = await hre.ethers.deployContract("AgentIdentity");
+    await identity.waitForDeployment();
+    identityAddress = await identity.getAddress();
+    console.log(`AgentIdentity: ${identityAddress}`);
+  }
+
+  const pool = await hre.ethers.deployContract("IntentPool", [identityAddress]);
+  await pool.waitForDeployment();
+  const poolAddress = await pool.getAddress();
+  console.log(`IntentPool:    ${poolAddress}`);
+
+  console.log("\nPoint the agents and the explorer at it:");
+  console.log(`  export INTENTPOOL_ADDRESS=${poolAddress}                 # worker, gateway, employer`);
+  console.log(`  NEXT_PUBLIC_INTENTPOOL_ADDRESS=${poolAddress}            # web/.env.local`);
+}
+
+main().catch((error) => {
+  console.error(error);
+  process.exitCode = 1;
+});
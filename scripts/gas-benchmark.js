@@ -0,0 +1,129 @@
+// Gas benchmark — single vs batched publish / settle on a local Hardhat EVM.
+//
+//   npx hardhat run scripts/gas-benchmark.js            (BENCH_N=50 by default)
+//
+// Prints total and per-intent gas for N `publishIntent` calls vs one
+// `publishIntents`, N `autoSettle` calls vs one `settleMany`, and the
+// per-intent cost of `submitResult`. Arguments are built from the deployed
+// ABI, so the script also runs against older IntentPool revisions (no task
+// type, no claim lease, no batch calls — those rows are then skipped). To
+// compare a contract change, bench it, swap in the older contract and bench
+// again:
+//
+//   npm run bench:gas
+//   git show <old-commit>:contracts/IntentPool.sol > contracts/IntentPool.sol
+//   npm run bench:gas
+//   git checkout contracts/IntentPool.sol
+
+const hre = require("hardhat");
+
+const N         = Number(process.env.BENCH_N || 50);
+const BOUNTY    = hre.ethers.parseEther("0.001");
+const TASK_TYPE = hre.ethers.encodeBytes32String("API_INTEGRATION_TEST");
+const PAYLOAD   = JSON.stringify({
+  task_type: "API_INTEGRATION_TEST",
+  endpoint: "https://api.example.com/v1/health",
+  method: "GET",
+  test_payload: {},
+  timestamp: 1700000000,
+});
+
+function ids(prefix, n) {
+  return Array.from({ length: n }, (_, i) => hre.ethers.id(`${prefix}-${i}`));
+}
+
+// Argument values by name, covering every IntentPool revision's publish ABI
+function singleArgs(id) {
+  return { intentId: id, taskType: TASK_TYPE, rawJsonSchema: PAYLOAD, minScore: 0, claimLease: 0 };
+}
+
+function batchArgs(intentIds) {
+  return {
+    intentIds,
+    taskTypes:      intentIds.map(() => TASK_TYPE),
+    rawJsonSchemas: intentIds.map(() => PAYLOAD),
+    minScores:      intentIds.map(() => 0),
+    claimLeases:    intentIds.map(() => 0),
+    bounties:       intentIds.map(() => BOUNTY),
+  };
+}
+
+function argsFor(pool, fn, values) {
+  return pool.interface.getFunction(fn).inputs.map((input) => {
+    if (!(input.name in values)) throw new Error(`gas-benchmark: unknown ${fn} argument '${input.name}'`);
+    return values[input.name];
+  });
+}
+
+async function gasOf(txPromise) {
+  const receipt = await (await txPromise).wait();
+  return receipt.gasUsed;
+}
+
+function report(label, single, batched) {
+  const perSingle  = single / BigInt(N);
+  if (batched === null) {
+    console.log(`${label.padEnd(8)} single: ${single} total, ${perSingle}/intent | batched: n/a`);
+    return;
+  }
+  const perBatched = batched / BigInt(N);
+  const saving     = Number(((perSingle - perBatched) * 1000n) / perSingle) / 10;
+  console.log(`${label.padEnd(8)} single: ${single} total, ${perSingle}/intent | ` +
+              `batched: ${batched} total, ${perBatched}/intent | saving ${saving}%`);
+}
+
+async function main() {
+  const [employer, worker] = await hre.ethers.getSigners();
+
+  const identity = await hre.ethers.deployContract("AgentIdentity");
+  const pool     = await hre.ethers.deployContract("IntentPool", [await identity.getAddress()]);
+  await (await identity.connect(worker).registerAgent("ipfs://bench")).wait();
+
+  const hasBatch = pool.interface.getFunction("publishIntents") !== null;
+
+  // ── Publish ──
+  const singleIds  = ids("single", N);
+  const batchedIds = ids("batched", N);
+
+  let publishSingle = 0n;
+  for (const id of singleIds) {
+    publishSingle += await gasOf(pool.publishIntent(...argsFor(pool, "publishIntent", singleArgs(id)), { value: BOUNTY }));
+  }
+  let publishBatched = null;
+  if (hasBatch) {
+    publishBatched = await gasOf(pool.publishIntents(
+      ...argsFor(pool, "publishIntents", batchArgs(batchedIds)), { value: BOUNTY * BigInt(N) },
+    ));
+  } else {
+    for (const id of batchedIds) {
+      await (await pool.publishIntent(...argsFor(pool, "publishIntent", singleArgs(id)), { value: BOUNTY })).wait();
+    }
+  }
+
+  // ── Submit ──
+  let submit = 0n;
+  for (const id of [...singleIds, ...batchedIds]) {
+    submit += await gasOf(pool.connect(worker).submitResult(id, "0xhash", "ipfs://result", { value: BOUNTY }));
+  }
+
+  // ── Settle ──
+  const challengePeriod = await pool.CHALLENGE_PERIOD();
+  await hre.network.provider.send("evm_increaseTime", [Number(challengePeriod) + 1]);
+  await hre.network.provider.send("evm_mine");
+
+  let settleSingle = 0n;
+  for (const id of singleIds) {
+    settleSingle += await gasOf(pool.autoSettle(id));
+  }
+  const settleBatched = hasBatch ? await gasOf(pool.settleMany(batchedIds)) : null;
+
+  console.log(`IntentPool gas, N=${N} intents`);
+  report("publish", publishSingle, publishBatched);
+  console.log(`${"submit".padEnd(8)} ${submit / BigInt(2 * N)}/intent`);
+  report("settle", settleSingle, settleBatched);
+}
+
+main().catch((error) => {
+  console.error(error);
+  process.exitCode = 1;
+});
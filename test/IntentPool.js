@@ -0,0 +1,234 @@
+// IntentPool behaviour on a local Hardhat EVM.
+//
+//   npm test
+
+const { expect } = require("chai");
+const { ethers } = require("hardhat");
+const { loadFixture, time } = require("@nomicfoundation/hardhat-toolbox/network-helpers");
+const { anyValue } = require("@nomicfoundation/hardhat-chai-matchers/withArgs");
+
+const BOUNTY    = ethers.parseEther("0.01");
+const TASK_TYPE = ethers.encodeBytes32String("API_INTEGRATION_TEST");
+const LEASE     = 600;   // seconds
+const PAYLOAD   = JSON.stringify({ task_type: "API_INTEGRATION_TEST", endpoint: "https://api.example.com/v1/health" });
+
+async function deployPool() {
+  const [employer, worker, other] = await ethers.getSigners();
+  const identity = await ethers.deployContract("AgentIdentity");
+  const pool     = await ethers.deployContract("IntentPool", [await identity.getAddress()]);
+  await identity.connect(worker).registerAgent("ipfs://worker");
+  await identity.connect(other).registerAgent("ipfs://other");
+  return { pool, identity, employer, worker, other };
+}
+
+function publish(pool, employer, id, claimLease = 0) {
+  return pool.connect(employer).publishIntent(id, TASK_TYPE, PAYLOAD, 0, claimLease, { value: BOUNTY });
+}
+
+function submit(pool, worker, id, value = BOUNTY) {
+  return pool.connect(worker).submitResult(id, "0xhash", "ipfs://result", { value });
+}
+
+async function bondFor(pool) {
+  return BOUNTY * (await pool.CLAIM_BOND_BPS()) / 10_000n;
+}
+
+async function passChallengePeriod(pool) {
+  await time.increase((await pool.CHALLENGE_PERIOD()) + 1n);
+}
+
+// ── Batch publish ────────────────────────────────────────────────────
+
+describe("publishIntents", function () {
+  function batch(n, bounty = BOUNTY) {
+    const ids = Array.from({ length: n }, (_, i) => ethers.id(`batch-${i}`));
+    return [ids, ids.map(() => TASK_TYPE), ids.map(() => PAYLOAD), ids.map(() => 0), ids.map(() => 0), ids.map(() => bounty)];
+  }
+
+  it("publishes every intent when the bounties sum to msg.value", async function () {
+    const { pool, employer } = await loadFixture(deployPool);
+    const args = batch(3);
+
+    await expect(pool.connect(employer).publishIntents(...args, { value: BOUNTY * 3n }))
+      .to.emit(pool, "IntentPublished").withArgs(args[0][2], employer.address, TASK_TYPE, BOUNTY, 0, 0, PAYLOAD);
+    for (const id of args[0]) {
+      expect((await pool.intents(id)).bounty).to.equal(BOUNTY);
+    }
+  });
+
+  it("reverts when the array lengths differ", async function () {
+    const { pool, employer } = await loadFixture(deployPool);
+
+    for (let field = 1; field < 6; field++) {
+      const args = batch(3);
+      args[field] = args[field].slice(1);
+      await expect(pool.connect(employer).publishIntents(...args, { value: BOUNTY * 3n }))
+        .to.be.revertedWith("Array length mismatch");
+    }
+  });
+
+  it("reverts when the bounties do not sum to msg.value", async function () {
+    const { pool, employer } = await loadFixture(deployPool);
+    const args = batch(3);
+
+    for (const value of [BOUNTY * 3n - 1n, BOUNTY * 3n + 1n, 0n]) {
+      await expect(pool.connect(employer).publishIntents(...args, { value }))
+        .to.be.revertedWith("Bounties must sum to msg.value");
+    }
+  });
+});
+
+// ── Batch settle ─────────────────────────────────────────────────────
+
+describe("settleMany", function () {
+  it("settles eligible intents and skips ineligible or unknown IDs", async function () {
+    const { pool, employer, worker } = await loadFixture(deployPool);
+    const [ready, settled, active, unsolved, unknown] = ["ready", "settled", "active", "unsolved", "unknown"].map(ethers.id);
+
+    for (const id of [ready, settled, active, unsolved]) {
+      await publish(pool, employer, id);
+    }
+    await submit(pool, worker, ready);
+    await submit(pool, worker, settled);
+    await passChallengePeriod(pool);
+    await submit(pool, worker, active);       // challenge window still open
+    await pool.autoSettle(settled);           // already resolved
+
+    const ids = [unknown, ready, settled, active, unsolved];
+    expect(await pool.settleMany.staticCall(ids)).to.equal(1n);
+
+    const tx = pool.settleMany(ids);
+    await expect(tx).to.emit(pool, "IntentSettled").withArgs(ready, worker.address, BOUNTY * 2n);
+    await expect(tx).to.changeEtherBalance(worker, BOUNTY * 2n);
+
+    expect((await pool.intents(ready)).isResolved).to.equal(true);
+    expect((await pool.intents(active)).isResolved).to.equal(false);
+    expect((await pool.intents(unsolved)).isResolved).to.equal(false);
+  });
+
+  it("credits a payout the worker cannot receive within the gas stipend", async function () {
+    const { pool, identity, employer } = await loadFixture(deployPool);
+    const hungry = await ethers.deployContract("GasHungryWorker", [await pool.getAddress()]);
+    await hungry.register(await identity.getAddress());
+    const id = ethers.id("gas-hungry");
+
+    await publish(pool, employer, id);
+    await hungry.submit(id, { value: BOUNTY });
+    await passChallengePeriod(pool);
+
+    await expect(pool.settleMany([id]))
+      .to.emit(pool, "IntentSettled").withArgs(id, await hungry.getAddress(), BOUNTY * 2n);
+    expect((await pool.intents(id)).isResolved).to.equal(true);
+    expect(await pool.credits(await hungry.getAddress())).to.equal(BOUNTY * 2n);
+    expect(await hungry.received()).to.equal(0n);
+
+    // withdrawCredits forwards all gas, so the credited payout can still be collected
+    await hungry.withdraw(false);
+    expect(await hungry.received()).to.equal(BOUNTY * 2n);
+    expect(await pool.credits(await hungry.getAddress())).to.equal(0n);
+  });
+});
+
+// ── Claims ───────────────────────────────────────────────────────────
+
+describe("claims", function () {
+  async function claimed() {
+    const fixture = await deployPool();
+    const id      = ethers.id("claimed");
+    const bond    = await bondFor(fixture.pool);
+    await publish(fixture.pool, fixture.employer, id, LEASE);
+    await fixture.pool.connect(fixture.worker).claimIntent(id, { value: bond });
+    return { ...fixture, id, bond };
+  }
+
+  it("requires a bond of exactly 10% of the bounty", async function () {
+    const { pool, employer, worker } = await loadFixture(deployPool);
+    const id   = ethers.id("bond");
+    const bond = await bondFor(pool);
+    expect(bond).to.equal(BOUNTY / 10n);
+    await publish(pool, employer, id, LEASE);
+
+    for (const value of [0n, bond - 1n, bond + 1n, BOUNTY]) {
+      await expect(pool.connect(worker).claimIntent(id, { value })).to.be.revertedWith("Must post the claim bond");
+    }
+    await expect(pool.connect(worker).claimIntent(id, { value: bond }))
+      .to.emit(pool, "IntentClaimed").withArgs(id, worker.address, anyValue, bond);
+  });
+
+  it("blocks other workers' submitResult while the lease runs", async function () {
+    const { pool, other, id } = await loadFixture(claimed);
+
+    await expect(submit(pool, other, id)).to.be.revertedWith("Intent leased to another worker");
+  });
+
+  it("counts the bond toward the claimant's stake", async function () {
+    const { pool, worker, id, bond } = await loadFixture(claimed);
+
+    await expect(submit(pool, worker, id, BOUNTY - bond - 1n)).to.be.revertedWith("Must stake amount equal to bounty");
+    await submit(pool, worker, id, BOUNTY - bond);
+
+    const core = await pool.intents(id);
+    expect(core.worker).to.equal(worker.address);
+    expect(core.stake).to.equal(BOUNTY);
+    expect((await pool.intentClaims(id)).claimant).to.equal(ethers.ZeroAddress);
+  });
+
+  it("forfeits a lapsed claimant's bond to the employer when the intent is re-claimed", async function () {
+    const { pool, employer, other, id, bond } = await loadFixture(claimed);
+
+    await expect(pool.connect(other).claimIntent(id, { value: bond })).to.be.revertedWith("Intent already leased");
+    await time.increase(LEASE + 1);
+    await pool.connect(other).claimIntent(id, { value: bond });
+
+    expect(await pool.credits(employer.address)).to.equal(bond);
+    expect((await pool.intentClaims(id)).claimant).to.equal(other.address);
+  });
+
+  it("forfeits a lapsed claimant's bond to the employer when another worker solves it", async function () {
+    const { pool, employer, other, id, bond } = await loadFixture(claimed);
+
+    await time.increase(LEASE + 1);
+    await submit(pool, other, id);
+
+    expect(await pool.credits(employer.address)).to.equal(bond);
+    expect((await pool.intents(id)).worker).to.equal(other.address);
+    expect((await pool.intents(id)).stake).to.equal(BOUNTY);
+  });
+
+  it("forfeits the bond in refundAndSlash when the claimant never delivers", async function () {
+    const { pool, employer, id, bond } = await loadFixture(claimed);
+
+    await time.increase(24 * 3600 + 1);
+    await expect(pool.connect(employer).refundAndSlash(id))
+      .to.changeEtherBalances([employer, pool], [BOUNTY + bond, -(BOUNTY + bond)]);
+    expect((await pool.intentClaims(id)).claimant).to.equal(ethers.ZeroAddress);
+  });
+
+  it("pays out credits once", async function () {
+    const { pool, employer, other, id, bond } = await loadFixture(claimed);
+    await time.increase(LEASE + 1);
+    await pool.connect(other).claimIntent(id, { value: bond });
+
+    await expect(pool.connect(employer).withdrawCredits()).to.changeEtherBalance(employer, bond);
+    expect(await pool.credits(employer.address)).to.equal(0n);
+    await expect(pool.connect(employer).withdrawCredits()).to.be.revertedWith("Nothing to withdraw");
+  });
+
+  it("zeroes credits before transferring them", async function () {
+    const { pool, identity, employer } = await loadFixture(deployPool);
+    const hungry = await ethers.deployContract("GasHungryWorker", [await pool.getAddress()]);
+    await hungry.register(await identity.getAddress());
+    const id = ethers.id("reentrant");
+
+    await publish(pool, employer, id);
+    await hungry.submit(id, { value: BOUNTY });
+    await passChallengePeriod(pool);
+    await pool.settleMany([id]);   // the stipend is too small, so the payout is credited
+
+    // receive() calls withdrawCredits again while the first withdrawal is paying out
+    await expect(hungry.withdraw(true)).to.changeEtherBalance(pool, -(BOUNTY * 2n));
+    expect(await hungry.reentered()).to.equal(false);
+    expect(await hungry.received()).to.equal(BOUNTY * 2n);
+    expect(await pool.credits(await hungry.getAddress())).to.equal(0n);
+  });
+});
@@ -0,0 +1,94 @@
+"""
+The worker and employer ship as flat script directories rather than
+packages, so both are put on ``sys.path`` here. Their ``chain_sync`` /
+``tx_manager`` copies are identical (see test_chain_sync), so whichever
+directory wins the import is fine.
+"""
+
+import os
+import sys
+
+import pytest
+from eth_abi import decode as abi_decode, encode as abi_encode
+from eth_utils import function_abi_to_4byte_selector
+from eth_utils.abi import collapse_if_tuple
+from hexbytes import HexBytes
+from web3.providers.base import JSONBaseProvider
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for component in ("employer_sdk", "worker_cli"):
+    sys.path.insert(0, os.path.join(ROOT, component))
+
+TEST_KEY = "0x" + "11" * 32
+
+
+class FakeRPC(JSONBaseProvider):
+    """
+    In-process JSON-RPC endpoint. ``handlers`` maps a method name to a
+    callable taking the params list; unknown methods raise so a test never
+    silently depends on the network.
+    """
+
+    def __init__(self, **handlers):
+        super().__init__()
+        self.block    = 100
+        self.batches  = 0
+        self.routes: dict[bytes, tuple[dict, object]] = {}   # selector → (function ABI, impl)
+        self.calls: list[tuple[str, list]] = []
+        self.handlers = {
+            "eth_blockNumber": lambda params: hex(self.block),
+            "eth_chainId":     lambda params: hex(10143),
+            "eth_gasPrice":    lambda params: hex(10**9),
+            "eth_getTransactionCount": lambda params: hex(0),
+            "eth_getLogs":     lambda params: [],
+            **handlers,
+        }
+
+    def make_request(self, method, params):
+        self.calls.append((method, list(params)))
+        if method not in self.handlers:
+            raise NotImplementedError(f"FakeRPC: unexpected {method}")
+        return {"jsonrpc": "2.0", "id": 1, "result": self.handlers[method](params)}
+
+    def make_batch_request(self, requests):
+        self.batches += 1
+        return [{**self.make_request(method, params), "id": i} for i, (method, params) in enumerate(requests)]
+
+    def serve(self, contract, **functions):
+        """
+        Answer ``eth_call`` for ``contract`` view functions: each keyword maps
+        a function name to a Python callable taking the decoded arguments.
+        Repeated calls add routes, so several contracts can be served.
+        """
+        for name, impl in functions.items():
+            abi = contract.get_function_by_name(name).abi
+            self.routes[function_abi_to_4byte_selector(abi)] = (abi, impl)
+        self.handlers["eth_call"] = self._eth_call
+
+    def _eth_call(self, params):
+        data = HexBytes(params[0].get("data") or params[0]["input"])
+        abi, impl = self.routes[bytes(data[:4])]
+        args = abi_decode([collapse_if_tuple(i) for i in abi["inputs"]], data[4:])
+        out_types = [collapse_if_tuple(o) for o in abi["outputs"]]
+        result = impl(*args)
+        return HexBytes(abi_encode(out_types, result if len(out_types) > 1 else [result])).to_0x_hex()
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
+
+@pytest.fixture
+def rpc():
+    return FakeRPC()
+
+
+@pytest.fixture
+def employer(rpc, tmp_path, monkeypatch):
+    """An EmployerAgent wired to ``rpc`` with its state file under tmp_path."""
+    import employer_daemon
+
+    monkeypatch.setattr(employer_daemon, "_STATE_PATH", str(tmp_path / "state.json"))
+    monkeypatch.setattr(employer_daemon.Web3, "HTTPProvider", lambda *a, **kw: rpc)
+    monkeypatch.setattr(employer_daemon, "WS_RPC_URL", "")
+    return employer_daemon.EmployerAgent(private_key=TEST_KEY)
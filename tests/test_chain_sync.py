@@ -0,0 +1,366 @@
+import json
+import queue
+import threading
+import time
+
+import pytest
+import requests
+from eth_utils import keccak
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.exceptions import ContractLogicError, Web3RPCError
+from websockets.sync.server import serve
+
+import chain_sync
+from chain_sync import AdaptiveRange, backfill_logs, is_range_error, is_rate_limited
+from conftest import FakeRPC
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record chain_sync sleeps instead of taking them."""
+    taken = []
+    monkeypatch.setattr(chain_sync.time, "sleep", taken.append)
+    return taken
+
+
+def _http_error(status: int) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} Client Error", response=response)
+
+
+# ── Error classification ─────────────────────────────────────────────
+
+@pytest.mark.parametrize("exc", [
+    _http_error(429),
+    ValueError({"code": -32005, "message": "rate limit exceeded"}),
+    ValueError("Too Many Requests"),
+    ValueError("request throttled, retry later"),
+])
+def test_rate_limits_are_not_range_errors(exc):
+    assert is_rate_limited(exc)
+    assert not is_range_error(exc)
+
+
+@pytest.mark.parametrize("exc", [
+    ValueError("query returned more than 10000 results"),
+    ValueError("block range too large"),
+    TimeoutError("read timed out"),
+])
+def test_range_errors(exc):
+    assert is_range_error(exc)
+    assert not is_rate_limited(exc)
+
+
+# ── AdaptiveRange ────────────────────────────────────────────────────
+
+def test_grows_while_responses_are_light():
+    ranger = AdaptiveRange(initial=10, maximum=80)
+    cursor = 0
+    for _ in range(5):
+        _, cursor = ranger.poll(lambda lo, hi: [], cursor, 10_000)
+    assert ranger.size == 80
+    assert cursor == 10 + 20 + 40 + 80 + 80
+
+
+def test_range_error_halves_and_sets_ceiling():
+    ranger = AdaptiveRange(initial=100)
+
+    def fetch(lo, hi):
+        raise ValueError("block range too large")
+
+    assert ranger.poll(fetch, 5, 1_000) == ([], 5)
+    assert (ranger.size, ranger.ceiling) == (50, 75)
+
+
+def test_rate_limit_backs_off_without_touching_the_range(sleeps):
+    ranger = AdaptiveRange(initial=100)
+
+    def throttled(lo, hi):
+        raise _http_error(429)
+
+    for _ in range(8):
+        assert ranger.poll(throttled, 5, 1_000) == ([], 5)
+    assert (ranger.size, ranger.ceiling) == (100, ranger.maximum)
+    assert sleeps == [1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 60.0, 60.0]
+
+    ranger.poll(lambda lo, hi: [], 5, 1_000)
+    assert ranger.backoff == 0
+
+
+def test_rate_limit_at_minimum_size_does_not_raise(sleeps):
+    ranger = AdaptiveRange(initial=1)
+
+    def throttled(lo, hi):
+        raise ValueError("429 Too Many Requests")
+
+    assert ranger.poll(throttled, 5, 1_000) == ([], 5)
+    assert len(sleeps) == 1
+
+
+def test_ceiling_recovers_after_healthy_polls():
+    ranger = AdaptiveRange(initial=400, maximum=2_000)
+
+    def rejected(lo, hi):
+        raise ValueError("block range too large")
+
+    _, cursor = ranger.poll(rejected, 0, 10**9)
+    assert ranger.ceiling == 300
+
+    for _ in range(chain_sync.CEILING_RECOVERY_POLLS):
+        _, cursor = ranger.poll(lambda lo, hi: [], cursor, 10**9)
+    assert ranger.ceiling == 600
+    assert ranger.size == 600
+
+
+# ── Backfill ─────────────────────────────────────────────────────────
+
+def test_backfill_retries_rate_limits_instead_of_bisecting(sleeps):
+    calls = []
+
+    def fetch(lo, hi):
+        calls.append((lo, hi))
+        if len(calls) <= 2:
+            raise _http_error(429)
+        return [hi]
+
+    assert list(backfill_logs(fetch, 1, 100, chunk=100)) == [([100], 100)]
+    assert calls == [(1, 100)] * 3
+    assert sleeps == [1.0, 2.0]
+
+
+def test_backfill_bisects_rejected_ranges():
+    def fetch(lo, hi):
+        if hi - lo >= 25:
+            raise ValueError("block range too large")
+        return [(lo, hi)]
+
+    (logs, end), = backfill_logs(fetch, 1, 100, chunk=100)
+    assert end == 100
+    assert logs[0][0] == 1 and logs[-1][1] == 100
+    assert all(hi - lo < 25 for lo, hi in logs)
+
+
+# ── WebSocket source ─────────────────────────────────────────────────
+
+def _raw_log(block: int, index: int = 0) -> dict:
+    return {
+        "address": "0x" + "ab" * 20,
+        "topics": ["0x" + "00" * 32],
+        "data": "0x",
+        "blockNumber": hex(block),
+        "blockHash": "0x" + f"{block:064x}",
+        "transactionHash": "0x" + f"{block * 1_000 + index:064x}",
+        "transactionIndex": "0x0",
+        "logIndex": hex(index),
+    }
+
+
+class FakeNode:
+    """Local ``eth_subscribe`` endpoint plus the ``eth_getLogs`` view of the same chain."""
+
+    def __init__(self, head: int):
+        self.head = head
+        self.logs: list[dict] = []
+        self.connections: list = []
+        self._server = serve(self._handle, "127.0.0.1", 0)
+        self.url = f"ws://127.0.0.1:{self._server.socket.getsockname()[1]}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def _handle(self, ws):
+        self.connections.append(ws)
+        for message in ws:
+            req = json.loads(message)
+            result = "0x1" if req["method"] == "eth_subscribe" else hex(self.head)
+            ws.send(json.dumps({"jsonrpc": "2.0", "id": req["id"], "result": result}))
+
+    def add(self, block: int, index: int = 0) -> dict:
+        raw = _raw_log(block, index)
+        self.logs.append(raw)
+        self.head = max(self.head, block)
+        return raw
+
+    def push(self, block: int, index: int = 0):
+        raw = self.add(block, index)
+        self.connections[-1].send(json.dumps({
+            "jsonrpc": "2.0",
+            "method": "eth_subscription",
+            "params": {"subscription": "0x1", "result": raw},
+        }))
+
+    def fetch(self, from_block: int, to_block: int) -> list:
+        logs = [chain_sync._format_log(r) for r in self.logs]
+        return sorted((log for log in logs if from_block <= log["blockNumber"] <= to_block), key=chain_sync._log_order)
+
+
+class FakePolling:
+    """Stands in for PollingEventSource, reading straight from the node."""
+
+    filters = [{"address": "0x" + "ab" * 20, "topics": []}]
+    lag     = 0
+
+    def __init__(self, node: FakeNode):
+        self.fetch = node.fetch
+        self.node  = node
+
+    def batches(self, cursor: int):
+        while True:
+            head   = self.node.head
+            logs   = self.fetch(cursor + 1, head) if head > cursor else []
+            cursor = max(cursor, head)
+            yield logs, cursor
+            time.sleep(0.01)
+
+
+class Stream:
+    """Consumes an event source on a background thread."""
+
+    def __init__(self, source, cursor: int):
+        self.source    = source
+        self.cursor    = cursor
+        self.delivered: list[tuple[int, int]] = []
+        self._items    = queue.Queue()
+        self._stop     = threading.Event()
+        threading.Thread(target=self._run, args=(source, cursor), daemon=True).start()
+
+    def _run(self, source, cursor):
+        for item in source.batches(cursor):
+            if self._stop.is_set():
+                return
+            self._items.put(item)
+
+    def drain(self, until=lambda: False, timeout: float = 5.0):
+        deadline = time.monotonic() + timeout
+        while not until():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                logs, cursor = self._items.get(timeout=remaining)
+            except queue.Empty:
+                return
+            assert cursor >= self.cursor, "cursor went backwards"
+            self.cursor = cursor
+            self.delivered += [(log["blockNumber"], log["logIndex"]) for log in logs]
+
+    def stop(self):
+        self._stop.set()
+
+
+@pytest.fixture
+def node():
+    node = FakeNode(head=10)
+    yield node
+    node._server.shutdown()
+
+
+@pytest.fixture
+def stream(node):
+    streams = []
+
+    def start(cursor: int, **kw):
+        source = chain_sync.WebSocketEventSource(
+            node.url, FakePolling(node), idle_timeout=0.05, heartbeat=0.05, reconnect_delay=0.05, **kw,
+        )
+        streams.append(Stream(source, cursor))
+        return streams[-1]
+
+    yield start
+    for s in streams:
+        s.stop()
+
+
+def test_ws_gap_fills_from_cursor(node, stream):
+    node.add(5)
+    node.add(8, 0)
+    node.add(8, 1)
+    s = stream(cursor=3)
+    s.drain(until=lambda: s.cursor >= 10)
+    assert s.delivered == [(5, 0), (8, 0), (8, 1)]
+    assert s.cursor == 10
+
+
+def test_ws_heartbeat_stops_short_of_head(node, stream):
+    s = stream(cursor=10)
+    s.drain(until=lambda: s.source.connected)
+    node.head = 20
+    s.drain(until=lambda: s.cursor >= 19)
+    s.drain(timeout=0.3)
+    assert s.cursor == 19
+
+
+def test_ws_idle_flush_keeps_newest_block_open_across_reconnect(node, stream):
+    s = stream(cursor=10)
+    s.drain(until=lambda: s.source.connected)
+
+    node.push(21, 0)
+    s.drain(until=lambda: (21, 0) in s.delivered)
+    assert s.cursor == 20
+
+    # A second log in block 21 never reaches the socket before it drops
+    node.add(21, 1)
+    node.connections[-1].close()
+    s.drain(until=lambda: len(node.connections) == 2 and (21, 1) in s.delivered)
+
+    assert len(node.connections) == 2
+    assert s.delivered == [(21, 0), (21, 1)]
+    node.push(22)
+    s.drain(until=lambda: (22, 0) in s.delivered)
+    assert s.delivered == [(21, 0), (21, 1), (22, 0)]
+
+
+# ── Task-type topics and deployment check ────────────────────────────
+
+def test_task_type_topic_matches_encode_bytes32_string():
+    assert chain_sync.task_type_topic("SMART_CONTRACT_AUDIT") == HexBytes(b"SMART_CONTRACT_AUDIT".ljust(32, b"\0"))
+    assert chain_sync.task_type_topic("") == HexBytes(bytes(32))
+    long_name = "X" * 32
+    assert chain_sync.task_type_topic(long_name) == HexBytes(keccak(text=long_name))
+
+
+def test_log_filter_ors_task_types_in_the_fourth_topic():
+    audit, review = chain_sync.task_type_topic("AUDIT"), chain_sync.task_type_topic("REVIEW")
+    f = chain_sync.log_filter("0xPool", b"\x01" * 32, None, None, [audit, review])
+    assert f == {"address": "0xPool", "topics": ["0x" + "01" * 32, None, None, [audit.to_0x_hex(), review.to_0x_hex()]]}
+
+
+@pytest.mark.parametrize("answer, current", [
+    (lambda params: "0x" + "00" * 29 + "015180", True),   # MAX_CLAIM_LEASE() = 1 day
+    (lambda params: "0x", False),                         # no code at the address
+    ("revert", False),                                    # pre-claims IntentPool
+])
+def test_deployment_probe(answer, current):
+    def revert(params):
+        raise ContractLogicError("execution reverted")
+
+    rpc = FakeRPC(eth_call=revert if answer == "revert" else answer)
+    assert chain_sync.is_current_deployment(Web3(rpc), "0x" + "1a" * 20) is current
+    [call] = [params[0] for method, params in rpc.calls if method == "eth_call"]
+    assert call["data"] == "0x" + keccak(text="MAX_CLAIM_LEASE()")[:4].hex()
+
+
+@pytest.mark.parametrize("error", [
+    requests.Timeout("read timed out"),
+    requests.ConnectionError("connection refused"),
+    requests.HTTPError("502 Server Error: Bad Gateway"),
+    Web3RPCError("internal error"),
+])
+def test_deployment_probe_reports_an_unreachable_node(error):
+    def fail(params):
+        raise error
+
+    w3 = Web3(FakeRPC(eth_call=fail))
+    with pytest.raises(RuntimeError, match="could not verify deployment"):
+        chain_sync.is_current_deployment(w3, "0x" + "1a" * 20)
+
+    problem = chain_sync.deployment_problem(w3, "0x" + "1a" * 20)
+    assert problem.startswith("[!] IntentPool check failed — could not verify deployment")
+
+
+def test_deployment_problem_names_the_variable_to_set():
+    outdated = Web3(FakeRPC(eth_call=lambda params: "0x"))
+    assert "export INTENTPOOL_ADDRESS=" in chain_sync.deployment_problem(outdated, "0x" + "1a" * 20)
+
+    current = Web3(FakeRPC(eth_call=lambda params: "0x" + "00" * 29 + "015180"))
+    assert chain_sync.deployment_problem(current, "0x" + "1a" * 20) is None
@@ -0,0 +1,515 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+from hexbytes import HexBytes
+
+import employer_daemon
+
+
+def _read_state(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# ── State file ───────────────────────────────────────────────────────
+
+def test_state_file_drops_final_intents(employer):
+    open_id, done_id, refunded_id = (bytes([i]) * 32 for i in (1, 2, 3))
+    employer.active_intents.update({open_id: "Pending", done_id: "Settled", refunded_id: "Refunded"})
+    employer.last_scanned_block = 120
+    employer._save_state()
+
+    data = _read_state(employer_daemon._STATE_PATH)
+    assert data["block"] == 120
+    assert data["state"]["active_intents"] == {open_id.hex(): "Pending"}
+    assert set(employer.active_intents) == {open_id}
+
+
+def test_unchanged_state_is_not_rewritten(employer, monkeypatch):
+    writes = []
+    save = employer.cursor.save
+    monkeypatch.setattr(employer.cursor, "save", lambda *a, **kw: (writes.append(a), save(*a, **kw)))
+
+    employer.active_intents[b"\x01" * 32] = "Pending"
+    employer._save_state()
+    employer._save_state()
+    assert len(writes) == 1
+
+    # A cursor-only advance waits for STATE_SAVE_INTERVAL ...
+    employer.last_scanned_block += 1
+    employer._save_state()
+    assert len(writes) == 1
+    # ... but an intent transition is written straight away
+    employer.active_intents[b"\x01" * 32] = "Settling"
+    employer._save_state()
+    assert len(writes) == 2
+    assert writes[-1][0] == employer.last_scanned_block
+
+    employer.last_scanned_block += 1
+    employer._save_state(force=True)
+    assert len(writes) == 3
+
+
+def test_restart_restores_only_open_intents(employer, rpc):
+    employer.cursor.save(rpc.block, {
+        "employer": employer.account.address,
+        "active_intents": {
+            (b"\x01" * 32).hex(): "Settling",
+            (b"\x02" * 32).hex(): "Settled",
+        },
+    })
+    restarted = employer_daemon.EmployerAgent(private_key=employer.private_key)
+    assert restarted.active_intents == {b"\x01" * 32: "Pending"}
+    assert os.path.exists(employer_daemon._STATE_PATH)
+
+
+# ── Batched state reads ──────────────────────────────────────────────
+
+EMPLOYER_ADDR = "0x" + "ee" * 20
+WORKER_ADDR   = "0x" + "0a" * 20
+
+
+def _core(iid: bytes, solved=False, resolved=False):
+    n = iid[0]
+    return [EMPLOYER_ADDR, WORKER_ADDR, 10**15 + n, 10**14, 80, solved, resolved, 1_000 + n, 90_000 + n]
+
+
+def _dispute(iid: bytes, disputed=False):
+    return [5_000 + iid[0], disputed, 0, 0, 9_000 + iid[0] if disputed else 0]
+
+
+def test_intent_states_are_read_in_batches(employer, rpc):
+    rpc.serve(employer.contract, intents=_core, intentDisputes=_dispute)
+    ids = [bytes([i % 256, i // 256]) * 16 for i in range(250)]
+
+    states = employer.read_intent_states(ids)
+
+    assert rpc.batches == 3   # READ_BATCH_SIZE = 100
+    core, dispute = states[ids[7]]
+    assert isinstance(core, employer_daemon.IntentCore)
+    assert (core.bounty, core.min_score, core.deadline) == (10**15 + 7, 80, 90_007)
+    assert dispute.challenge_period_end == 5_007 and not dispute.is_disputed
+
+
+def test_intent_states_fall_back_to_sequential_calls(employer, rpc, monkeypatch):
+    rpc.serve(employer.contract, intents=_core, intentDisputes=_dispute)
+
+    def unsupported(requests):
+        raise ValueError("batch requests are not supported")
+
+    monkeypatch.setattr(rpc, "make_batch_request", unsupported)
+    ids = [bytes([i]) * 32 for i in range(3)]
+    states = employer.read_intent_states(ids)
+
+    assert not employer._batch_reads
+    assert [states[iid][0].bounty for iid in ids] == [10**15, 10**15 + 1, 10**15 + 2]
+    assert sum(1 for method, _ in rpc.calls if method == "eth_call") == 6
+
+
+# ── Event-driven state machine ───────────────────────────────────────
+
+def _event(name: str, iid: bytes, block: int = 200, **args) -> dict:
+    return {"event": name, "blockNumber": block, "args": {"intentId": iid, **args}}
+
+
+def _timers(agent) -> list[tuple[float, bytes, str]]:
+    return sorted(agent._timers)
+
+
+@pytest.fixture
+def machine(employer, monkeypatch):
+    """The employer with block timestamps pinned and settlement calls recorded."""
+    employer._block_times[200] = 1_000_000
+    actions = []
+    monkeypatch.setattr(employer, "start_settlement", lambda iid, url, h: actions.append(("settle", iid, url)))
+    monkeypatch.setattr(employer, "_auto_settle_many", lambda ids: actions.append(("auto_settle", ids)))
+    monkeypatch.setattr(employer, "_try_finalize_dispute", lambda iid: actions.append(("finalize", iid)))
+    monkeypatch.setattr(employer, "_refund_expired", lambda iid: actions.append(("refund", iid)))
+    employer.actions = actions
+    return employer
+
+
+def test_events_advance_status_and_arm_deadlines(machine):
+    iid, slack = b"\x01" * 32, employer_daemon.TIMER_SLACK
+
+    machine._on_event(_event("IntentPublished", iid))
+    assert machine.active_intents[iid] == "Pending"
+    assert _timers(machine) == [(1_000_000 + employer_daemon.INTENT_TTL + slack, iid, "refund")]
+
+    machine._on_event(_event("IntentSolved", iid, dataUrl="ipfs://cid", resultHash="0xab"))
+    assert machine.actions == [("settle", iid, "ipfs://cid")]
+    assert (1_000_000 + employer_daemon.CHALLENGE_PERIOD + slack, iid, "auto_settle") in machine._timers
+
+    machine._on_event(_event("ResultChallenged", iid))
+    assert machine.active_intents[iid] == "Disputed"
+    assert (1_000_000 + employer_daemon.VOTE_PERIOD + slack, iid, "finalize") in machine._timers
+
+    machine._on_event(_event("DisputeResolved", iid))
+    assert machine.active_intents[iid] == "Settled"
+
+
+def test_events_for_untracked_intents_are_ignored(machine):
+    machine._on_event(_event("IntentSolved", b"\x09" * 32, dataUrl="ipfs://x", resultHash="0x"))
+    machine._on_event(None)
+    assert machine.actions == [] and machine._timers == []
+
+
+def test_due_timers_fire_once_their_deadline_passes(machine, monkeypatch):
+    a, b, busy, done = (bytes([i]) * 32 for i in (1, 2, 3, 4))
+    machine.active_intents.update({a: "Pending", b: "Pending", busy: "Settling", done: "Settled"})
+    for iid in (a, b, busy, done):
+        machine._schedule(500, iid, "auto_settle")
+    machine._schedule(600, a, "refund")
+    machine._schedule(10_000, b, "refund")
+
+    monkeypatch.setattr(employer_daemon.time, "time", lambda: 600 + employer_daemon.TIMER_SLACK)
+    machine._fire_due_timers()
+
+    assert machine.actions == [("refund", a), ("auto_settle", [a, b])]
+    assert [action for _, _, action in machine._timers] == ["refund"]
+
+
+def test_reconcile_rebuilds_timers_from_chain_state(machine, rpc):
+    solved, disputed, unpublished = (bytes([i]) * 32 for i in (1, 2, 3))
+    cores = {
+        solved: _core(solved, solved=True),
+        disputed: _core(disputed, solved=True),
+        unpublished: ["0x" + "00" * 20, "0x" + "00" * 20, 0, 0, 0, False, False, 0, 0],
+    }
+    rpc.serve(
+        machine.contract,
+        intents=lambda iid: cores[iid],
+        intentDisputes=lambda iid: _dispute(iid, disputed=iid == disputed),
+    )
+    machine.active_intents.update({solved: "Pending", disputed: "Pending", unpublished: "Pending"})
+
+    machine._reconcile([solved, disputed, unpublished])
+
+    slack = employer_daemon.TIMER_SLACK
+    assert machine.active_intents == {solved: "Pending", disputed: "Disputed"}
+    assert set(machine._timers) == {
+        (5_001 + slack, solved, "auto_settle"), (90_001 + slack, solved, "refund"),
+        (9_002 + slack, disputed, "finalize"), (90_002 + slack, disputed, "refund"),
+    }
+
+
+# ── Settlement pipeline ──────────────────────────────────────────────
+
+def test_key_requests_for_one_gateway_share_a_handshake(employer, monkeypatch):
+    monkeypatch.setattr(employer_daemon, "KEY_BATCH_WINDOW", 0.05)
+    handshakes = []
+
+    def fetch_keys(batch_url, intent_ids):
+        handshakes.append(sorted(intent_ids))
+        return {iid: iid[:1] * 32 for iid in intent_ids if iid != b"\x03" * 32}
+
+    monkeypatch.setattr(employer, "_fetch_keys", fetch_keys)
+    ids = [bytes([i]) * 32 for i in (1, 2, 3)]
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        keys = list(pool.map(lambda iid: employer._batched_key("http://gw/keys", iid), ids))
+
+    assert handshakes == [ids]
+    assert keys == [b"\x01" * 32, b"\x02" * 32, None]
+
+
+def test_unfinished_settlement_falls_back_to_the_timers(employer, monkeypatch):
+    iid = b"\x05" * 32
+    employer.active_intents[iid] = "Pending"
+    started = threading.Event()
+
+    def process(intent_id, url, expected):
+        started.set()
+        raise requests.ConnectionError("gateway unreachable")
+
+    monkeypatch.setattr(employer, "process_settlement", process)
+    monkeypatch.setattr(employer_daemon.time, "time", lambda: 1_000)
+
+    employer.start_settlement(iid, "ipfs://cid", "ab" * 32)
+    assert started.wait(5)
+    employer._settle_pool.shutdown(wait=True)
+
+    assert employer.active_intents[iid] == "Pending"
+    assert employer._timers == [(1_000 + employer_daemon.TIMER_RETRY + employer_daemon.TIMER_SLACK, iid, "reconcile")]
+
+
+# ── Bulk dispatch ────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("bounty, score, lease, error", [
+    (0.01, 85, 0, None),
+    (True, 85, 0, "bad bounty_eth"),
+    (0, 85, 0, "bad bounty_eth"),
+    (float("inf"), 85, 0, "bad bounty_eth"),
+    (1e-30, 85, 0, "less than 1 wei"),
+    (2**96, 85, 0, "uint96"),
+    (0.01, True, 0, "bad min_score"),
+    (0.01, 2**64, 0, "bad min_score"),
+    (0.01, -1, 0, "bad min_score"),
+    (0.01, 85, False, "bad claim_lease"),
+    (0.01, 85, employer_daemon.MAX_CLAIM_LEASE + 1, "bad claim_lease"),
+])
+def test_bulk_tasks_are_validated_against_contract_limits(bounty, score, lease, error):
+    result = employer_daemon._task_error({"task_type": "AUDIT"}, bounty, score, lease)
+    assert (result is None) if error is None else (error in result)
+
+
+@pytest.fixture
+def publisher(employer, monkeypatch):
+    """Replace the publish calls: payloads with "boom" raise before broadcast, the rest land at once."""
+    batches = []
+
+    def dispatch_intents(tasks, on_result=None):
+        batches.append(len(tasks))
+        if any("boom" in payload for payload, *_ in tasks):
+            raise RuntimeError("pin failed")
+        ids = [bytes([len(batches), i]) * 16 for i in range(len(tasks))]
+        on_result(ids, {"status": 1, "transactionHash": HexBytes(b"\x01" * 32)})
+        return ids
+
+    def dispatch_intent(payload, min_score, bounty_eth, claim_lease=None, on_result=None):
+        ids = dispatch_intents([(payload, min_score, bounty_eth, claim_lease)],
+                               on_result=lambda iids, receipt: on_result(iids[0], receipt))
+        return ids[0]
+
+    monkeypatch.setattr(employer, "dispatch_intents", dispatch_intents)
+    monkeypatch.setattr(employer, "dispatch_intent", dispatch_intent)
+    employer.batches = batches
+    return employer
+
+
+def _bulk(agent, tmp_path, tasks: list, **kw) -> tuple[dict, list[dict]]:
+    path, out = tmp_path / "tasks.jsonl", tmp_path / "outcomes.jsonl"
+    path.write_text("".join(json.dumps(t) + "\n" for t in tasks))
+    result = {}
+    runner = threading.Thread(target=lambda: result.update(agent.dispatch_bulk(str(path), str(out), **kw)))
+    runner.start()
+    runner.join(10)
+    assert not runner.is_alive(), "dispatch_bulk never got its publish slots back"
+    return result, [json.loads(line) for line in out.read_text().splitlines()]
+
+
+def test_bulk_dispatch_reports_bad_tasks_individually(publisher, tmp_path):
+    tasks = [
+        {"task_type": "A"},
+        {"payload": {"task_type": "B"}, "min_score": True},
+        {"payload": {"task_type": "C"}, "min_score": 2**64},
+        {"payload": {"boom": 1}},
+        {"task_type": "D"},
+    ]
+    counts, outcomes = _bulk(publisher, tmp_path, tasks, concurrency=1, batch_size=10)
+
+    assert counts == {"published": 2, "invalid": 2, "failed": 1}
+    status = {o["source"].rsplit(":", 1)[1]: o["status"] for o in outcomes}
+    assert status == {"1": "published", "2": "invalid", "3": "invalid", "4": "failed", "5": "published"}
+    assert "pin failed" in next(o["error"] for o in outcomes if o["status"] == "failed")
+    assert publisher.batches == [3, 1, 1, 1]   # the failed batch is retried task by task
+
+
+def test_bulk_dispatch_skips_published_tasks_on_rerun(publisher, tmp_path):
+    tasks = [{"task_type": str(i)} for i in range(5)]
+    _bulk(publisher, tmp_path, tasks, concurrency=2, batch_size=2)
+    counts, _ = _bulk(publisher, tmp_path, tasks + [{"task_type": "new"}], concurrency=2, batch_size=2)
+    assert counts == {"skipped": 5, "published": 1}
+
+
+# ── Batched auto-settle ──────────────────────────────────────────────
+
+@pytest.fixture
+def settler(employer, monkeypatch):
+    """The employer with transactions recorded instead of sent; ``broadcast`` toggles send failures."""
+    employer.sent, employer.broadcast = [], True
+
+    def send_tx(fn_call, gas=150_000, value=0, on_receipt=None):
+        employer.sent.append((fn_call.fn_name, fn_call.args[0], on_receipt))
+        return "0xabc" if employer.broadcast else None
+
+    monkeypatch.setattr(employer, "_send_tx", send_tx)
+    monkeypatch.setattr(employer_daemon.time, "time", lambda: 1_000)
+    return employer
+
+
+@pytest.mark.parametrize("receipt", [None, {"status": 0, "logs": []}])
+def test_failed_settle_batch_falls_back_to_auto_settle(settler, receipt):
+    ids = [bytes([i]) * 32 for i in (1, 2, 3)]
+    settler.active_intents.update({iid: "Pending" for iid in ids})
+    settler._auto_settle_many(ids)
+
+    [(name, batch, on_receipt)] = settler.sent
+    assert (name, batch) == ("settleMany", ids)
+    assert all(settler.active_intents[iid] == "Settling" for iid in ids)
+
+    on_receipt(receipt)
+    assert [(name, arg) for name, arg, _ in settler.sent[1:]] == [("autoSettle", iid) for iid in ids]
+    assert all(settler.active_intents[iid] == "Settling" for iid in ids)
+
+    for _, _, on_single in settler.sent[1:]:
+        on_single({"status": 1, "transactionHash": HexBytes(b"\x01" * 32)})
+    assert all(settler.active_intents[iid] == "Settled" for iid in ids)
+
+
+def test_unbroadcast_settle_batch_falls_back_to_auto_settle(settler):
+    ids = [bytes([i]) * 32 for i in (1, 2)]
+    settler.active_intents.update({iid: "Pending" for iid in ids})
+    settler.broadcast = False
+    settler._auto_settle_many(ids)
+
+    assert [(name, arg) for name, arg, _ in settler.sent] == [("settleMany", ids)] + [("autoSettle", iid) for iid in ids]
+    assert all(settler.active_intents[iid] == "Pending" for iid in ids)
+    assert sorted(settler._timers) == sorted((1_000 + employer_daemon.TIMER_RETRY + employer_daemon.TIMER_SLACK, iid, "reconcile") for iid in ids)
+
+
+def test_skipped_ids_in_a_settled_batch_are_reconciled(settler, monkeypatch):
+    done, skipped = b"\x01" * 32, b"\x02" * 32
+    settler.active_intents.update({done: "Pending", skipped: "Pending"})
+    monkeypatch.setattr(settler, "_decode", lambda log: {"event": "IntentSettled", "args": {"intentId": log}})
+    settler._auto_settle_many([done, skipped])
+
+    settler.sent[0][2]({"status": 1, "logs": [done]})
+    assert len(settler.sent) == 1
+    assert settler.active_intents == {done: "Settled", skipped: "Pending"}
+    assert settler._timers == [(1_000 + employer_daemon.TIMER_RETRY + employer_daemon.TIMER_SLACK, skipped, "reconcile")]
+
+
+# ── Off-chain payloads ───────────────────────────────────────────────
+
+@pytest.fixture
+def pinned(monkeypatch):
+    """Payloads pinned through ``upload_payload``, by URI."""
+    store = {}
+
+    def upload(data: bytes, api_url: str = "") -> str:
+        store[f"ipfs://Qm{len(store)}"] = data
+        return f"ipfs://Qm{len(store) - 1}"
+
+    monkeypatch.setattr(employer_daemon, "upload_payload", upload)
+    monkeypatch.setattr(employer_daemon, "PAYLOAD_IPFS_API", "http://ipfs:5001")
+    return store
+
+
+def test_upload_payload_ignores_proxy_settings(monkeypatch):
+    sent = []
+
+    class _Reply:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"Hash": "QmPinned"}
+
+    def post(url, **kwargs):
+        sent.append(url)
+        return _Reply()
+
+    monkeypatch.setenv("HTTP_PROXY", "http://127.0.0.1:9")
+    monkeypatch.setattr(employer_daemon._http, "post", post)
+
+    assert employer_daemon.upload_payload(b"{}", "http://ipfs:5001/") == "ipfs://QmPinned"
+    assert sent == ["http://ipfs:5001/api/v0/add"]
+    assert employer_daemon._http.trust_env is False
+
+
+def test_large_payloads_are_published_as_descriptors(employer, pinned):
+    small = {"task_type": "AUDIT", "source": "x"}
+    large = {"task_type": "AUDIT", "source": "x" * employer_daemon.OFFCHAIN_MIN_BYTES}
+
+    assert json.loads(employer._intent_json(small))["source"] == "x"
+    descriptor = json.loads(employer._intent_json(large))
+    data = pinned["ipfs://Qm0"]
+
+    assert descriptor == {"task_type": "AUDIT", "payload_ref": {
+        "uri": "ipfs://Qm0", "sha256": hashlib.sha256(data).hexdigest(), "size": len(data),
+    }}
+    assert json.loads(data)["source"] == large["source"]
+
+
+def test_offchain_mode_can_be_forced_either_way(employer, pinned):
+    small = {"task_type": "AUDIT"}
+    large = {"task_type": "AUDIT", "source": "x" * employer_daemon.OFFCHAIN_MIN_BYTES}
+
+    assert "payload_ref" in json.loads(employer._intent_json(small, offchain=True))
+    assert "payload_ref" not in json.loads(employer._intent_json(large, offchain=False))
+    employer.offchain = "never"
+    assert "payload_ref" not in json.loads(employer._intent_json(large))
+    assert len(pinned) == 1
+
+
+def test_auto_mode_stays_inline_without_an_ipfs_api(employer, pinned, monkeypatch):
+    monkeypatch.setattr(employer_daemon, "PAYLOAD_IPFS_API", "")
+    large = {"task_type": "AUDIT", "source": "x" * employer_daemon.OFFCHAIN_MIN_BYTES}
+    assert "payload_ref" not in json.loads(employer._intent_json(large))
+    assert pinned == {}
+
+
+# ── Task-type topic ──────────────────────────────────────────────────
+
+def test_published_intents_carry_their_task_type_tag(employer, monkeypatch):
+    calls = []
+    monkeypatch.setattr(employer, "_send_tx", lambda fn_call, **kw: calls.append((fn_call.fn_name, fn_call.args)) or "0xabc")
+
+    employer.dispatch_intent({"task_type": "SMART_CONTRACT_AUDIT"})
+    employer.dispatch_intents([({"task_type": "AUDIT"}, 80, 0.01, 0), ({"source": "untagged"}, 80, 0.01, 0)])
+
+    (single, (_, tag, *_)), (batch, (_, tags, *_)) = calls
+    assert (single, batch) == ("publishIntent", "publishIntents")
+    assert tag == b"SMART_CONTRACT_AUDIT".ljust(32, b"\0")
+    assert tags == [b"AUDIT".ljust(32, b"\0"), bytes(32)]
+
+
+# ── Claim mode ───────────────────────────────────────────────────────
+
+def test_claim_lease_defaults_to_the_agent_and_can_be_overridden(employer, monkeypatch):
+    calls = []
+    monkeypatch.setattr(employer, "_send_tx", lambda fn_call, **kw: calls.append(fn_call.args[-1]) or "0xabc")
+    employer.claim_lease = 1800
+
+    employer.dispatch_intent({"task_type": "AUDIT"})
+    employer.dispatch_intent({"task_type": "AUDIT"}, claim_lease=0)
+    assert calls == [1800, 0]
+
+
+def test_claim_lease_is_bounded(employer):
+    with pytest.raises(ValueError):
+        employer_daemon.EmployerAgent(private_key=employer.private_key, claim_lease=employer_daemon.MAX_CLAIM_LEASE + 1)
+
+
+@pytest.mark.parametrize("status, ok", [(1, True), (0, False)])
+def test_withdraw_credits_waits_for_the_receipt(employer, rpc, monkeypatch, status, ok):
+    rpc.serve(employer.contract, credits=lambda address: 10**15)
+    tx_hash = HexBytes(b"\x0d" * 32)
+    sent = []
+    monkeypatch.setattr(employer.tx, "send", lambda fn_call, **kw: sent.append(fn_call.fn_name) or tx_hash)
+    employer.tx._done[bytes(tx_hash)] = {"status": status}
+
+    assert employer.withdraw_credits() is ok
+    assert sent == ["withdrawCredits"]
+
+
+def test_nothing_to_withdraw_sends_nothing(employer, rpc, monkeypatch):
+    rpc.serve(employer.contract, credits=lambda address: 0)
+    monkeypatch.setattr(employer.tx, "send", lambda *a, **kw: pytest.fail("sent a transaction"))
+    assert employer.withdraw_credits()
+
+
+# ── Startup ──────────────────────────────────────────────────────────
+
+def test_main_checks_the_deployment_through_the_proxy_free_session(monkeypatch, capsys):
+    sessions = []
+    provider = employer_daemon.Web3.HTTPProvider
+
+    def recording_provider(url, **kwargs):
+        sessions.append(kwargs.get("session"))
+        return provider(url, **kwargs)
+
+    monkeypatch.setattr(employer_daemon.Web3, "HTTPProvider", recording_provider)
+    monkeypatch.setattr(employer_daemon, "deployment_problem", lambda w3, address: "[!] outdated pool")
+    monkeypatch.setattr(sys, "argv", ["employer_daemon.py", "withdraw"])
+    with pytest.raises(SystemExit):
+        employer_daemon.main()
+
+    assert sessions == [employer_daemon._http]
+    assert "[!] outdated pool" in capsys.readouterr().out
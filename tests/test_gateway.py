@@ -0,0 +1,212 @@
+import pytest
+import requests
+from eth_account import Account
+from eth_account.messages import encode_defunct
+from web3 import Web3
+
+import worker_gateway
+from conftest import FakeRPC
+
+WORKER_KEY = "22" * 32
+EMPLOYER   = Account.from_key("0x" + "33" * 32)
+STRANGER   = Account.from_key("0x" + "44" * 32)
+
+
+def _row(employer: str = EMPLOYER.address, solved: bool = True) -> list:
+    return [employer, "0x" + "0a" * 20, 10**16, 10**16, 80, solved, False, 0, 10**10]
+
+
+def _sign(account, message: str) -> str:
+    return account.sign_message(encode_defunct(text=message)).signature.hex()
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    """Gateway wired to a FakeRPC; ``chain.rows`` maps intent id → intents() row."""
+    rpc = FakeRPC()
+    w3  = Web3(rpc)
+    monkeypatch.setattr(worker_gateway, "w3", w3)
+    monkeypatch.setattr(worker_gateway, "contract", w3.eth.contract(
+        address=worker_gateway.CONTRACT_ADDRESS, abi=worker_gateway.CONTRACT_ABI,
+    ))
+    monkeypatch.setattr(worker_gateway, "_solved_intents", worker_gateway.SolvedIntentCache())
+    monkeypatch.setattr(worker_gateway, "_WORKER_PRIVATE_KEY", WORKER_KEY)
+    rpc.rows = {}
+    rpc.serve(worker_gateway.contract, intents=lambda iid: rpc.rows.get(iid, _row("0x" + "00" * 20, solved=False)))
+    return rpc
+
+
+@pytest.fixture
+def client(chain):
+    return worker_gateway.app.test_client()
+
+
+def _reads(rpc: FakeRPC) -> int:
+    return sum(1 for method, _ in rpc.calls if method == "eth_call")
+
+
+# ── Solved-intent cache ──────────────────────────────────────────────
+
+def test_solved_intents_are_read_from_chain_once(chain):
+    iid = b"\x01" * 32
+    chain.rows[iid] = _row()
+    cache = worker_gateway.SolvedIntentCache()
+    assert cache.employer_of(iid) == EMPLOYER.address
+    assert cache.employer_of(iid) == EMPLOYER.address
+    assert _reads(chain) == 1
+
+
+def test_unsolved_answers_expire(chain, monkeypatch):
+    iid, now = b"\x01" * 32, [1_000.0]
+    monkeypatch.setattr(worker_gateway.time, "monotonic", lambda: now[0])
+    cache = worker_gateway.SolvedIntentCache(negative_ttl=5)
+
+    assert cache.employer_of(iid) is None
+    chain.rows[iid] = _row()
+    assert cache.employer_of(iid) is None      # still trusted
+    now[0] += 6
+    assert cache.employer_of(iid) == EMPLOYER.address
+    assert _reads(chain) == 2
+
+
+def test_prewarmed_intents_never_touch_the_chain(chain):
+    cache = worker_gateway.SolvedIntentCache(max_entries=2)
+    for i in range(3):
+        cache.put_solved(bytes([i]) * 32, EMPLOYER.address)
+    assert cache.employer_of(b"\x02" * 32) == EMPLOYER.address
+    assert _reads(chain) == 0
+    assert cache.employer_of(b"\x00" * 32) is None   # evicted, re-read as unsolved
+
+
+def test_cache_misses_are_read_in_one_batch(chain):
+    ids = [bytes([i]) * 32 for i in range(4)]
+    chain.rows.update({iid: _row() for iid in ids[:3]})
+    cache = worker_gateway.SolvedIntentCache()
+    cache.put_solved(ids[0], EMPLOYER.address)
+
+    employers = cache.employers_of(ids)
+    assert employers == {ids[0]: EMPLOYER.address, ids[1]: EMPLOYER.address, ids[2]: EMPLOYER.address, ids[3]: None}
+    assert chain.batches == 1 and _reads(chain) == 3
+
+
+# ── GET /key ─────────────────────────────────────────────────────────
+
+def test_key_handshake(client, chain):
+    iid_hex = "ab" * 32
+    chain.rows[bytes.fromhex(iid_hex)] = _row()
+
+    challenge = client.get(f"/key/{iid_hex}")
+    assert challenge.status_code == 402
+    assert challenge.headers["WWW-Authenticate"] == f'x402 challenge="Unlock_Key_{iid_hex}"'
+
+    reply = client.get(f"/key/{iid_hex}", headers={"Authorization": f"x402 {_sign(EMPLOYER, f'Unlock_Key_{iid_hex}')}"})
+    assert reply.status_code == 200
+    assert reply.json["key"] == worker_gateway.derive_aes_key(WORKER_KEY, bytes.fromhex(iid_hex)).hex()
+
+
+def test_key_refused_to_other_signers_and_unsolved_intents(client, chain):
+    solved, unsolved = "ab" * 32, "cd" * 32
+    chain.rows[bytes.fromhex(solved)] = _row()
+
+    reply = client.get(f"/key/{solved}", headers={"Authorization": f"x402 {_sign(STRANGER, f'Unlock_Key_{solved}')}"})
+    assert reply.status_code == 403
+    reply = client.get(f"/key/{unsolved}", headers={"Authorization": f"x402 {_sign(EMPLOYER, f'Unlock_Key_{unsolved}')}"})
+    assert reply.status_code == 400
+
+
+# ── Serving mode ─────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("bad", ["zz" * 32, "ab" * 31, "ab" * 33, "0x" + "ab" * 31])
+def test_malformed_intent_id_is_a_client_error(client, bad):
+    assert client.get(f"/key/{bad}").status_code == 400
+    assert client.get(f"/key/{bad}", headers={"Authorization": "x402 0x00"}).status_code == 400
+
+
+def test_gunicorn_worker_timeout_is_passed_through(monkeypatch):
+    gunicorn_base = pytest.importorskip("gunicorn.app.base")
+    settings = {}
+
+    def run(self):
+        self.load_config()
+        settings.update({k: v.get() for k, v in self.cfg.settings.items()})
+
+    monkeypatch.setattr(gunicorn_base.BaseApplication, "run", run)
+    monkeypatch.setattr(worker_gateway.os, "setsid", lambda: None)
+    monkeypatch.setattr(worker_gateway, "_WORKER_PRIVATE_KEY", "")   # start_gateway sets it
+    worker_gateway.start_gateway(port=5999, server="gunicorn", workers=3, threads=4, worker_timeout=45, keepalive=7)
+
+    assert (settings["workers"], settings["threads"], settings["timeout"], settings["keepalive"]) == (3, 4, 45, 7)
+    assert settings["worker_class"] == "gthread"
+
+
+
+def test_rpc_timeout_is_applied_to_chain_reads(monkeypatch):
+    monkeypatch.setattr(worker_gateway, "w3", Web3())
+    monkeypatch.setattr(worker_gateway.app, "run", lambda **kw: None)
+    monkeypatch.setattr(worker_gateway, "_WORKER_PRIVATE_KEY", "")
+    worker_gateway.start_gateway(port=5999, rpc_timeout=2.5)
+    assert worker_gateway.w3.provider.get_request_kwargs()["timeout"] == 2.5
+
+
+def test_slow_chain_lookup_fails_fast_with_504(client, chain):
+    def timeout(params):
+        raise requests.Timeout("read timed out")
+
+    chain.handlers["eth_call"] = timeout
+    iid_hex = "05" * 32
+    reply = client.get(f"/key/{iid_hex}", headers={"Authorization": f"x402 {_sign(EMPLOYER, f'Unlock_Key_{iid_hex}')}"})
+    assert reply.status_code == 504
+
+    chain.calls.clear()
+    assert _post_keys(client, [iid_hex, "06" * 32], signer=EMPLOYER).status_code == 504
+    assert _reads(chain) == 1   # the batch timed out; no one-by-one retry after it
+
+# ── POST /keys ───────────────────────────────────────────────────────
+
+def _post_keys(client, ids_hex: list[str], signer=None):
+    headers = {}
+    if signer is not None:
+        challenge = worker_gateway.keys_challenge([bytes.fromhex(h) for h in ids_hex])
+        headers["Authorization"] = f"x402 {_sign(signer, challenge)}"
+    return client.post("/keys", json={"intent_ids": ids_hex}, headers=headers)
+
+
+def test_batch_challenge_is_order_independent(client):
+    ids_hex = ["01" * 32, "02" * 32]
+    first  = _post_keys(client, ids_hex)
+    second = _post_keys(client, ids_hex[::-1])
+    assert first.status_code == second.status_code == 402
+    assert first.headers["WWW-Authenticate"] == second.headers["WWW-Authenticate"]
+
+
+def test_batch_delivers_owned_solved_keys_and_reports_the_rest(client, chain):
+    mine, theirs, unsolved = "01" * 32, "02" * 32, "03" * 32
+    chain.rows[bytes.fromhex(mine)]   = _row()
+    chain.rows[bytes.fromhex(theirs)] = _row(STRANGER.address)
+
+    reply = _post_keys(client, [mine, theirs, unsolved], signer=EMPLOYER)
+
+    assert reply.status_code == 200
+    assert reply.json["keys"] == {mine: worker_gateway.derive_aes_key(WORKER_KEY, bytes.fromhex(mine)).hex()}
+    assert reply.json["errors"] == {theirs: "Unauthorized: signature mismatch", unsolved: "Intent not solved yet"}
+    assert chain.batches == 1
+
+
+def test_batch_signature_covers_exactly_the_requested_ids(client, chain):
+    ids_hex = ["01" * 32, "02" * 32]
+    chain.rows.update({bytes.fromhex(h): _row() for h in ids_hex})
+    signature = _sign(EMPLOYER, worker_gateway.keys_challenge([bytes.fromhex(ids_hex[0])]))
+
+    reply = client.post("/keys", json={"intent_ids": ids_hex}, headers={"Authorization": f"x402 {signature}"})
+    assert reply.json["keys"] == {}
+
+
+@pytest.mark.parametrize("body", [
+    {},
+    {"intent_ids": []},
+    {"intent_ids": "01" * 32},
+    {"intent_ids": ["01" * 32] * (worker_gateway.MAX_BATCH_KEYS + 1)},
+    {"intent_ids": [42]},
+])
+def test_batch_rejects_malformed_requests(client, body):
+    assert client.post("/keys", json=body).status_code == 400
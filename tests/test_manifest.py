@@ -0,0 +1,147 @@
+"""Worker-produced result manifests read back by the employer's decoder."""
+
+import hashlib
+import io
+import json
+import os
+import zlib
+
+import pytest
+from Crypto.Cipher import AES
+
+import employer_daemon
+import worker
+
+KEY = bytes(range(32))
+
+
+class _Response:
+    def __init__(self, body: bytes):
+        self.raw = io.BytesIO(body)
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _Session:
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def get(self, url, **kw):
+        return _Response(self.body)
+
+
+@pytest.fixture
+def opener(employer, monkeypatch):
+    """``open(manifest_bytes) -> (header, decrypt)`` through the employer's download path."""
+    def open_manifest(body: bytes):
+        monkeypatch.setattr(employer, "_session", lambda url: _Session(body))
+        _, header, decrypt = employer._open_manifest("http://ipfs/cid")
+        return header, decrypt
+    return open_manifest
+
+
+def _manifest(plaintext: bytes, chunk_size: int = 16, **kw) -> bytes:
+    manifest = worker.EncryptedManifest(KEY, io.BytesIO(plaintext), len(plaintext), "http://gw/key", chunk_size, **kw)
+    body = b"".join(manifest)
+    assert len(body) == len(manifest)
+    return body
+
+
+# ── v2 manifest ──────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("size", [0, 1, 16, 17, 16 * 5 + 3])
+def test_v2_manifest_round_trip(opener, size):
+    plaintext = os.urandom(size)
+    header, decrypt = opener(_manifest(plaintext, key_batch_url="http://gw/keys"))
+
+    assert header["key_gateway"] == "http://gw/key"
+    assert header["key_batch_url"] == "http://gw/keys"
+    assert b"".join(decrypt(KEY)) == plaintext
+
+
+@pytest.mark.parametrize("tamper", [
+    lambda body: body[:-1] + bytes([body[-1] ^ 1]),                 # flipped tag bit
+    lambda body: body[:-(5 + 3 + 16)],                              # final segment dropped
+    lambda body: body.replace(b"http://gw/key", b"http://gx/key"),  # header swapped
+    lambda body: body + b"\x00",                                    # trailing garbage
+])
+def test_v2_manifest_rejects_tampering(opener, tamper):
+    header, decrypt = opener(tamper(_manifest(os.urandom(16 * 2 + 3))))
+    with pytest.raises(ValueError):
+        b"".join(decrypt(KEY))
+
+
+def test_v2_manifest_rejects_the_wrong_key(opener):
+    _, decrypt = opener(_manifest(b"result"))
+    with pytest.raises(ValueError):
+        b"".join(decrypt(bytes(32)))
+
+
+def test_v1_json_manifest_still_decrypts(opener):
+    nonce  = os.urandom(16)
+    ct, tag = AES.new(KEY, AES.MODE_GCM, nonce=nonce).encrypt_and_digest(b"legacy result")
+    body   = json.dumps({"version": "1.0", "key_gateway": "http://gw/key", "encrypted_data": (nonce + tag + ct).hex()})
+
+    header, decrypt = opener(body.encode())
+    assert header == {"key_gateway": "http://gw/key"}
+    assert b"".join(decrypt(KEY)) == b"legacy result"
+
+
+# ── Compressed payloads ──────────────────────────────────────────────
+
+def _captured(data: bytes) -> worker.CapturedOutput:
+    output = worker.CapturedOutput()
+    output.write(data)
+    return output
+
+
+def test_small_or_incompressible_results_are_sent_as_is():
+    for data in (b"tiny" * 10, os.urandom(64 * 1024)):
+        output = _captured(data)
+        payload, codec = worker.compress_output(output)
+        assert (payload, codec) == (output, "none")
+
+
+@pytest.mark.parametrize("codec", ["zlib", "zstd"])
+def test_compressed_manifest_round_trip(opener, monkeypatch, codec):
+    if codec == "zlib":
+        monkeypatch.setattr(worker, "zstandard", None)
+    else:
+        pytest.importorskip("zstandard")
+    plaintext = b"".join(b"finding %d: reentrancy in withdraw()\n" % i for i in range(20_000))
+    output = _captured(plaintext)
+
+    payload, used = worker.compress_output(output)
+    assert used == codec
+    assert payload.size < output.size * worker.COMPRESS_MIN_GAIN
+    assert output.hexdigest() == hashlib.sha256(plaintext).hexdigest()   # attestation covers plaintext
+
+    manifest = worker.EncryptedManifest(KEY, payload.open(), payload.size, "http://gw/key", 4096, codec=used)
+    header, decrypt = opener(b"".join(manifest))
+    assert header["codec"] == codec
+    assert b"".join(decrypt(KEY)) == plaintext
+
+
+def test_unknown_codec_is_refused(opener):
+    manifest = worker.EncryptedManifest(KEY, io.BytesIO(b"x"), 1, "http://gw/key", codec="brotli")
+    _, decrypt = opener(b"".join(manifest))
+    with pytest.raises(ValueError, match="brotli"):
+        b"".join(decrypt(KEY))
+
+
+def test_decompression_is_bounded_per_step(monkeypatch):
+    monkeypatch.setattr(employer_daemon, "DECOMPRESS_CHUNK", 1024)
+    bomb = zlib.compress(b"\x00" * 10**6, 9)
+    sizes = [len(block) for block in employer_daemon._decompress(iter([bomb]), "zlib")]
+    assert sum(sizes) == 10**6
+    assert max(sizes) <= 1024
@@ -0,0 +1,28 @@
+"""
+The worker and employer ship as separate directories, so modules they share
+are copied into both. Any module present in both must stay byte-identical.
+"""
+
+import filecmp
+import os
+
+import pytest
+
+ROOT   = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHARED = sorted(
+    set(f for f in os.listdir(os.path.join(ROOT, "worker_cli")) if f.endswith(".py"))
+    & set(f for f in os.listdir(os.path.join(ROOT, "employer_sdk")) if f.endswith(".py"))
+)
+
+
+def test_shared_modules_are_found():
+    assert {"chain_sync.py", "tx_manager.py"} <= set(SHARED)
+
+
+@pytest.mark.parametrize("module", SHARED)
+def test_shared_copies_are_identical(module):
+    assert filecmp.cmp(
+        os.path.join(ROOT, "worker_cli", module),
+        os.path.join(ROOT, "employer_sdk", module),
+        shallow=False,
+    ), f"worker_cli/{module} and employer_sdk/{module} have diverged — copy the edited one over the other"
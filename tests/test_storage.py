@@ -0,0 +1,187 @@
+import io
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import worker
+import worker_gateway
+from ipfs_cid import cid_of
+
+
+def _manifest(size: int = 300_000) -> worker.EncryptedManifest:
+    plaintext = os.urandom(size)
+    return worker.EncryptedManifest(bytes(32), io.BytesIO(plaintext), size, "http://gw/key")
+
+
+class _PinningHandler(BaseHTTPRequestHandler):
+    """Answers like a pinning API: parses the multipart upload and returns the file's CID."""
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        boundary = self.headers["Content-Type"].split("boundary=")[1].encode()
+        parts = {}
+        for part in body.split(b"--" + boundary)[1:-1]:
+            head, _, value = part.partition(b"\r\n\r\n")
+            name = head.split(b'name="')[1].split(b'"')[0].decode()
+            parts[name] = value[:-2]   # strip the CRLF before the next boundary
+        self.server.requests.append((self.path, dict(self.headers), parts))
+        cid = cid_of([parts["file"]])
+        reply = json.dumps({"Hash": cid, "IpfsHash": cid}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def pinning_api():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PinningHandler)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def _url(server) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# ── Storage backends ─────────────────────────────────────────────────
+
+def test_ipfs_node_upload_streams_the_manifest(pinning_api):
+    manifest = _manifest()
+    storage  = worker.IpfsApiStorage(api_url=_url(pinning_api), gateway_url="http://gw/ipfs/")
+
+    assert storage.put(manifest, "x.a2am") == cid_of(manifest)
+    path, headers, parts = pinning_api.requests[0]
+    assert path.startswith("/api/v0/add?cid-version=0")
+    assert "chunked" not in headers.get("Transfer-Encoding", "")
+    assert storage.url("Qm1") == "http://gw/ipfs/Qm1"
+
+
+def test_pinata_upload_pins_cidv0(pinning_api, monkeypatch):
+    monkeypatch.setenv("PINATA_JWT", "jwt")
+    monkeypatch.setattr(worker, "PINATA_API", _url(pinning_api) + "/pinning/pinFileToIPFS")
+    manifest = _manifest(1_000)
+
+    assert worker.PinataStorage().put(manifest, "x.a2am") == cid_of(manifest)
+    _, headers, parts = pinning_api.requests[0]
+    assert headers["Authorization"] == "Bearer jwt"
+    assert json.loads(parts["pinataOptions"]) == {"cidVersion": 0}
+
+
+def test_pinata_requires_a_jwt(monkeypatch):
+    monkeypatch.delenv("PINATA_JWT", raising=False)
+    with pytest.raises(ValueError):
+        worker.PinataStorage().put(b"data", "x")
+
+
+def test_local_store_is_served_by_the_gateway(tmp_path, monkeypatch):
+    manifest = _manifest()
+    cid = worker.LocalStorage(str(tmp_path)).put(manifest, "x.a2am")
+    assert cid == cid_of(manifest)
+
+    monkeypatch.setattr(worker_gateway, "LOCAL_STORE_DIR", str(tmp_path))
+    client = worker_gateway.app.test_client()
+    reply = client.get(f"/ipfs/{cid}")
+    assert reply.status_code == 200
+    assert reply.data == b"".join(manifest)
+    assert client.get("/ipfs/..%2Fetc").status_code == 404
+    assert client.get("/ipfs/Qm" + "1" * 44).status_code == 404
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        worker.make_storage("s3")
+
+
+class _FlakyStorage(worker.StorageBackend):
+    name = "flaky"
+
+    def __init__(self, failures: int, cid: str):
+        self.failures = failures
+        self.cid      = cid
+        self.puts     = 0
+
+    def put(self, data, filename):
+        self.puts += 1
+        if self.puts <= self.failures:
+            raise ConnectionError("pinning service unavailable")
+        return self.cid
+
+    def url(self, cid):
+        return cid
+
+
+MANIFEST = b"A2AM manifest bytes"
+
+
+@pytest.fixture
+def upload_queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(worker, "UPLOAD_BACKOFF", 0)
+
+    def make(storage):
+        return worker.UploadQueue(storage, directory=str(tmp_path / "queue"))
+    return make
+
+
+@pytest.mark.parametrize("failures, stored", [(2, True), (worker.UPLOAD_ATTEMPTS, False)])
+def test_background_upload_retries_then_closes_the_output(upload_queue, capsys, failures, stored):
+    cid = cid_of([MANIFEST])
+    storage, metrics = _FlakyStorage(failures, cid), worker.StageMetrics()
+    queue  = upload_queue(storage)
+    output = worker.CapturedOutput.from_text("result")
+
+    worker._upload_in_background(queue, b"\x01" * 32, MANIFEST, cid, output, metrics)
+
+    assert storage.puts == min(failures + 1, worker.UPLOAD_ATTEMPTS)
+    assert ("CID verified" in capsys.readouterr().out) is stored
+    assert len(queue.entries()) == (0 if stored else 1)
+    assert output._file.closed
+    assert metrics.depth["upload"] == 0
+
+
+def test_a_cid_mismatch_keeps_the_manifest_queued(upload_queue, capsys):
+    storage = _FlakyStorage(0, "QmSomethingElse")
+    queue   = upload_queue(storage)
+
+    worker._upload_in_background(
+        queue, b"\x02" * 32, MANIFEST, cid_of([MANIFEST]), worker.CapturedOutput.from_text("r"), worker.StageMetrics(),
+    )
+
+    assert "CID mismatch" in capsys.readouterr().out
+    [path] = queue.entries()
+    with open(path, "rb") as f:
+        assert f.read() == MANIFEST
+
+
+def test_queued_manifests_survive_a_restart(tmp_path, monkeypatch):
+    monkeypatch.setattr(worker, "UPLOAD_BACKOFF", 0)
+    directory, cid = str(tmp_path / "queue"), cid_of([MANIFEST])
+    worker.UploadQueue(_FlakyStorage(0, cid), directory).enqueue(b"\x03" * 32, MANIFEST, cid)
+
+    # A fresh process; the retry thread is not started, so passes are driven by hand
+    storage = _FlakyStorage(1, cid)
+    queue   = worker.UploadQueue(storage, directory)
+    assert queue.resume() == 1
+
+    assert queue.retry_due() is not None   # first attempt fails, the entry backs off
+    queue._retry = {path: (0.0, delay) for path, (_, delay) in queue._retry.items()}
+    assert queue.retry_due() is None
+
+    assert storage.puts == 2
+    assert queue.entries() == []
+
+
+def test_enqueue_rejects_a_manifest_that_does_not_match_its_cid(tmp_path):
+    queue = worker.UploadQueue(_FlakyStorage(0, "QmX"), str(tmp_path))
+    with pytest.raises(ValueError):
+        queue.enqueue(b"\x04" * 32, MANIFEST, "QmX")
+    assert os.listdir(tmp_path) == []
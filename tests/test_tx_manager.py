@@ -0,0 +1,213 @@
+import pytest
+from eth_utils import keccak
+from hexbytes import HexBytes
+from web3 import Web3
+
+import tx_manager
+from conftest import TEST_KEY, FakeRPC
+from tx_manager import NonceManager, TxPipeline
+
+TARGET  = Web3.to_checksum_address("0x" + "ab" * 20)
+ACCOUNT = Web3.to_checksum_address("0x" + "cd" * 20)
+
+
+class FakeCall:
+    """Contract call stand-in; ``fail`` makes the next build raise."""
+
+    def __init__(self):
+        self.nonces: list[int] = []
+        self.fail = False
+
+    def build_transaction(self, params: dict) -> dict:
+        if self.fail:
+            self.fail = False
+            raise ValueError("execution reverted")
+        self.nonces.append(params["nonce"])
+        return {
+            "to": TARGET,
+            "data": "0x",
+            "chainId": 10143,
+            **{k: v for k, v in params.items() if k != "from"},
+        }
+
+
+def _receipt(tx_hash, sender: str) -> dict:
+    return {
+        "transactionHash": HexBytes(tx_hash).to_0x_hex(),
+        "status": "0x1",
+        "blockNumber": "0x65",
+        "blockHash": "0x" + "00" * 32,
+        "transactionIndex": "0x0",
+        "from": sender,
+        "to": TARGET,
+        "cumulativeGasUsed": "0x5208",
+        "gasUsed": "0x5208",
+        "logs": [],
+        "logsBloom": "0x" + "00" * 256,
+        "contractAddress": None,
+        "effectiveGasPrice": "0x1",
+        "type": "0x0",
+    }
+
+
+@pytest.fixture
+def chain():
+    rpc = FakeRPC(eth_getTransactionCount=lambda params: hex(7))
+    rpc.handlers["eth_sendRawTransaction"] = lambda params: "0x" + keccak(HexBytes(params[0])).hex()
+    return rpc
+
+
+@pytest.fixture
+def pipeline(chain):
+    return TxPipeline(Web3(chain), TEST_KEY)
+
+
+def _count(rpc: FakeRPC, method: str) -> int:
+    return sum(1 for m, _ in rpc.calls if m == method)
+
+
+# ── NonceManager ─────────────────────────────────────────────────────
+
+def test_nonces_are_local_after_the_first_allocation(chain):
+    nonces = NonceManager(Web3(chain), ACCOUNT)
+    assert [nonces.allocate() for _ in range(3)] == [7, 8, 9]
+    assert _count(chain, "eth_getTransactionCount") == 1
+
+
+def test_release_of_the_last_nonce_rewinds(chain):
+    nonces = NonceManager(Web3(chain), ACCOUNT)
+    nonces.allocate()
+    nonces.release(nonces.allocate())
+    assert nonces.allocate() == 8
+    assert _count(chain, "eth_getTransactionCount") == 1
+
+
+def test_release_behind_later_nonces_reseeds(chain):
+    nonces = NonceManager(Web3(chain), ACCOUNT)
+    first = nonces.allocate()
+    nonces.allocate()
+    nonces.release(first)
+    assert nonces.allocate() == 7
+    assert _count(chain, "eth_getTransactionCount") == 2
+
+
+# ── TxPipeline.send ──────────────────────────────────────────────────
+
+def test_failed_build_does_not_leak_the_nonce(pipeline, monkeypatch):
+    monkeypatch.setattr(pipeline, "_ensure_tracker", lambda: None)
+    call = FakeCall()
+    pipeline.send(call)
+    call.fail = True
+    with pytest.raises(ValueError):
+        pipeline.send(call)
+    pipeline.send(call)
+    assert call.nonces == [7, 8]
+
+
+def test_failed_signing_does_not_leak_the_nonce(pipeline, monkeypatch):
+    monkeypatch.setattr(pipeline, "_ensure_tracker", lambda: None)
+    call = FakeCall()
+    sign = pipeline.w3.eth.account.sign_transaction
+    failures = [TypeError("bad transaction field")]
+
+    def flaky_sign(tx, private_key):
+        if failures:
+            raise failures.pop()
+        return sign(tx, private_key=private_key)
+
+    monkeypatch.setattr(pipeline.w3.eth.account, "sign_transaction", flaky_sign)
+    with pytest.raises(TypeError):
+        pipeline.send(call)
+    pipeline.send(call)
+    assert call.nonces == [7, 7]
+
+
+def test_gas_price_failure_allocates_nothing(pipeline, chain, monkeypatch):
+    monkeypatch.setattr(pipeline, "_ensure_tracker", lambda: None)
+    gas_price = chain.handlers.pop("eth_gasPrice")
+    with pytest.raises(NotImplementedError):
+        pipeline.send(FakeCall())
+    chain.handlers["eth_gasPrice"] = gas_price
+
+    call = FakeCall()
+    pipeline.send(call)
+    assert call.nonces == [7]
+
+
+def test_nonce_rejection_resyncs_and_retries(pipeline, chain, monkeypatch):
+    monkeypatch.setattr(pipeline, "_ensure_tracker", lambda: None)
+    broadcast = chain.handlers["eth_sendRawTransaction"]
+    rejected  = []
+
+    def send_raw(params):
+        if not rejected:
+            rejected.append(params)
+            raise ValueError("nonce too low")
+        return broadcast(params)
+
+    chain.handlers["eth_sendRawTransaction"] = send_raw
+    chain.handlers["eth_getTransactionCount"] = lambda params: hex(7 + len(rejected))
+    call = FakeCall()
+    pipeline.send(call)
+    assert call.nonces == [7, 8]
+
+
+def test_receipts_are_delivered(pipeline, chain, monkeypatch):
+    monkeypatch.setattr(tx_manager, "RECEIPT_POLL", 0.01)
+    receipts = {}
+
+    def get_receipt(params):
+        return receipts.get(params[0])
+
+    chain.handlers["eth_getTransactionReceipt"] = get_receipt
+    seen = []
+    tx_hash = pipeline.send(FakeCall(), on_receipt=seen.append)
+    receipts[HexBytes(tx_hash).to_0x_hex()] = _receipt(tx_hash, pipeline.address)
+    receipt = pipeline.wait(tx_hash, timeout=5)
+    assert receipt["status"] == 1
+    assert seen and seen[0]["status"] == 1
+
+
+# ── Overdue transactions ─────────────────────────────────────────────
+
+@pytest.fixture
+def overdue(pipeline, chain, monkeypatch):
+    """A broadcast (nonce 7) that never gets a receipt until ``chain.mined`` is set."""
+    monkeypatch.setattr(tx_manager, "RECEIPT_POLL", 0.01)
+    monkeypatch.setattr(tx_manager, "RECEIPT_TIMEOUT", 0.05)
+    chain.latest, chain.mempool, chain.mined = 7, True, False
+    chain.handlers["eth_getTransactionCount"] = lambda params: hex(chain.latest if params[1] == "latest" else 7)
+    chain.handlers["eth_getTransactionReceipt"] = (
+        lambda params: _receipt(params[0], pipeline.address) if chain.mined else None
+    )
+    chain.handlers["eth_getTransactionByHash"] = lambda params: {
+        "hash": params[0], "nonce": "0x7", "from": pipeline.address, "to": TARGET, "value": "0x0",
+        "gas": "0x5208", "gasPrice": "0x1", "input": "0x", "blockHash": None, "blockNumber": None,
+        "transactionIndex": None, "type": "0x0", "v": "0x0", "r": "0x0", "s": "0x0",
+    } if chain.mempool else None
+    seen = []
+    chain.tx_hash = pipeline.send(FakeCall(), on_receipt=seen.append)
+    chain.seen = seen
+    return chain
+
+
+def test_slow_transaction_is_not_given_up_on(pipeline, overdue):
+    assert pipeline.wait(overdue.tx_hash, timeout=0.5) is None   # several RECEIPT_TIMEOUTs
+    assert overdue.seen == []
+
+    overdue.mined = True
+    assert pipeline.wait(overdue.tx_hash, timeout=5)["status"] == 1
+    assert overdue.seen[0]["status"] == 1
+
+
+def test_transaction_dropped_from_the_mempool_fails(pipeline, overdue):
+    overdue.mempool = False
+    assert pipeline.wait(overdue.tx_hash, timeout=5) is None
+    assert overdue.seen == [None]
+    assert pipeline.nonces._next is None   # resynced
+
+
+def test_replaced_transaction_fails(pipeline, overdue):
+    overdue.latest = 8
+    assert pipeline.wait(overdue.tx_hash, timeout=5) is None
+    assert overdue.seen == [None]
@@ -0,0 +1,571 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from web3 import Web3
+
+import worker
+from conftest import TEST_KEY, FakeRPC
+
+TEST_ADDRESS = Web3().eth.account.from_key(TEST_KEY).address
+
+
+def _job(block: int, tag: str = "") -> dict:
+    return {"blockNumber": block, "tag": tag}
+
+
+def _eventually(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+# ── Execution pool ───────────────────────────────────────────────────
+
+def test_pool_runs_jobs_concurrently_up_to_its_size():
+    release, lock = threading.Event(), threading.Lock()
+    running, peak, done = [0], [0], threading.Semaphore(0)
+
+    def handler(job, metrics):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        release.wait(5)
+        with lock:
+            running[0] -= 1
+        done.release()
+
+    pool = worker.ExecutionPool(handler, concurrency=3)
+    for block in range(6):
+        pool.submit(_job(block))
+    assert _eventually(lambda: running[0] == 3)
+    release.set()
+    for _ in range(6):
+        assert done.acquire(timeout=5)
+    assert peak[0] == 3
+
+
+def test_pool_low_watermark_tracks_oldest_unfinished_block():
+    gates = {10: threading.Event(), 12: threading.Event()}
+    finished = threading.Semaphore(0)
+
+    def handler(job, metrics):
+        gates[job["blockNumber"]].wait(5)
+        finished.release()
+
+    pool = worker.ExecutionPool(handler, concurrency=2)
+    assert pool.low_watermark() is None
+    pool.submit(_job(12))
+    pool.submit(_job(10))
+    assert pool.low_watermark() == 10
+
+    gates[10].set()
+    assert finished.acquire(timeout=5)
+    assert _eventually(lambda: pool.low_watermark() == 12)
+
+    gates[12].set()
+    assert finished.acquire(timeout=5)
+    assert _eventually(lambda: pool.low_watermark() is None)
+
+
+def test_pool_counts_handler_errors_and_keeps_running():
+    handled = threading.Semaphore(0)
+
+    def handler(job, metrics):
+        handled.release()
+        if job["tag"] == "boom":
+            raise RuntimeError("boom")
+
+    pool = worker.ExecutionPool(handler, concurrency=1)
+    pool.submit(_job(1, "boom"))
+    pool.submit(_job(2))
+    assert handled.acquire(timeout=5) and handled.acquire(timeout=5)
+    assert _eventually(lambda: pool.low_watermark() is None)
+    assert pool.metrics.failed == 1
+
+
+def test_stage_metrics_track_depth_and_outcomes():
+    metrics = worker.StageMetrics()
+    with metrics.stage("execute"):
+        assert metrics.depth["execute"] == 1
+    assert metrics.depth["execute"] == 0
+    metrics.count("completed")
+    metrics.count("lost")
+    assert "done=1" in metrics.summary() and "lost=1" in metrics.summary()
+    with pytest.raises(KeyError):
+        metrics.enter("no-such-stage")
+
+
+# ── Output capture ───────────────────────────────────────────────────
+
+def test_captured_output_spills_to_disk_and_hashes_incrementally():
+    output = worker.CapturedOutput(spool_bytes=64)
+    data = b"".join(bytes([i]) * 10 for i in range(20))
+    output.write(data[:50])
+    output.write(data[50:])
+    output.write("é")   # text is stored UTF-8 encoded
+
+    assert output.size == len(data) + 2
+    assert output._file._rolled   # spilled to a temp file past spool_bytes
+    assert output.hexdigest() == hashlib.sha256(data + "é".encode()).hexdigest()
+    assert output.open().read() == data + "é".encode()
+
+
+@pytest.fixture
+def openclaw(tmp_path, monkeypatch):
+    """Put a fake ``openclaw`` CLI on PATH; ``openclaw(script)`` sets its body."""
+    path = tmp_path / "openclaw"
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+    def install(body: str):
+        path.write_text("#!/bin/sh\n" + body)
+        path.chmod(0o755)
+    return install
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="shell script executor")
+def test_openclaw_output_is_captured_and_attested(openclaw):
+    openclaw('for i in 1 2 3; do echo "finding $i"; done\n')
+    result_hash, output = worker.OpenClawExecutor().execute(json.dumps({"target_code": "contract C {}"}))
+
+    expected = b"finding 1\nfinding 2\nfinding 3\n"
+    assert output.open().read() == expected
+    assert result_hash == hashlib.sha256(expected).hexdigest()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="shell script executor")
+def test_openclaw_failure_skips_the_intent(openclaw):
+    openclaw("echo partial; exit 3\n")
+    assert worker.OpenClawExecutor().execute("{}") == (None, None)
+
+
+# ── Result cache ─────────────────────────────────────────────────────
+
+class CountingExecutor(worker.BaseExecutor):
+    def __init__(self, output: str | None = "report", delay: float = 0.0):
+        self.output = output
+        self.delay  = delay
+        self.runs   = 0
+        self.tasks  = []
+
+    @property
+    def name(self) -> str:
+        return "Counting"
+
+    def execute(self, intent_json_str):
+        self.runs += 1
+        self.tasks.append(intent_json_str)
+        time.sleep(self.delay)
+        if self.output is None:
+            return None, None
+        return hashlib.sha256(self.output.encode()).hexdigest(), self.output
+
+
+def test_cache_key_ignores_volatile_fields_and_tracks_executor_version():
+    executor = CountingExecutor()
+    key = worker.task_cache_key('{"a": 1, "timestamp": 5}', executor)
+    assert key == worker.task_cache_key('{"timestamp": 9, "a": 1}', executor)
+    assert key != worker.task_cache_key('{"a": 2}', executor)
+    executor.version = "2"
+    assert key != worker.task_cache_key('{"a": 1}', executor)
+
+
+def test_result_cache_round_trip_and_corruption(tmp_path):
+    cache  = worker.ResultCache(str(tmp_path))
+    output = worker.CapturedOutput.from_text("audit report")
+    cache.put("k", output.hexdigest(), output)
+
+    result_hash, cached = cache.get("k")
+    assert result_hash == output.hexdigest()
+    assert cached.open().read() == b"audit report"
+
+    (tmp_path / "k.out").write_bytes(b"tampered")
+    assert cache.get("k") is None
+    assert not (tmp_path / "k.out").exists()
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path):
+    cache = worker.ResultCache(str(tmp_path), max_bytes=25)
+    for i, key in enumerate("abc"):
+        output = worker.CapturedOutput.from_text(key * 10)
+        cache.put(key, output.hexdigest(), output)
+        os.utime(tmp_path / f"{key}.out", (i, i))
+        if key == "b":
+            assert cache.get("a")   # refreshes a's mtime past b's
+
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c")
+    assert cache.evictions == 1
+
+
+def test_caching_executor_runs_concurrent_duplicates_once(tmp_path):
+    inner    = CountingExecutor(delay=0.1)
+    executor = worker.CachingExecutor(inner, worker.ResultCache(str(tmp_path)))
+    results  = []
+    threads  = [threading.Thread(target=lambda: results.append(executor.execute('{"a": 1}'))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+    assert inner.runs == 1
+    assert {h for h, _ in results} == {hashlib.sha256(b"report").hexdigest()}
+
+
+# ── Admission policy ─────────────────────────────────────────────────
+
+BOUNTY      = 10**16
+GAS_RESERVE = worker.SUBMIT_GAS * 10**9   # FakeRPC gas price is 1 gwei
+IDENTITY    = "0x" + "1d" * 20
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    """Point the worker's module-level web3 and contract at a FakeRPC."""
+    rpc = FakeRPC()
+    w3  = Web3(rpc)
+    monkeypatch.setattr(worker, "w3", w3)
+    monkeypatch.setattr(worker, "contract", w3.eth.contract(address=worker.CONTRACT_ADDRESS, abi=worker.CONTRACT_ABI))
+    rpc.serve(worker.contract, identityContract=lambda: IDENTITY)
+    rpc.serve(w3.eth.contract(address=Web3.to_checksum_address(IDENTITY), abi=worker.IDENTITY_ABI), getScore=lambda a: 90)
+    return rpc
+
+
+def _intent(bounty: int = BOUNTY, min_score: int = 80, payload: str = '{"task_type": "AUDIT"}') -> dict:
+    return {"args": {"bounty": bounty, "minScore": min_score, "rawJsonSchema": payload}}
+
+
+@pytest.fixture
+def policy(chain):
+    chain.balance = 2 * BOUNTY + GAS_RESERVE
+    chain.handlers["eth_getBalance"] = lambda params: hex(chain.balance)
+    policy = worker.AdmissionPolicy(TEST_ADDRESS, {"task_types": ["AUDIT"], "min_bounty_eth": 0.001})
+    policy.refresh()
+    return policy
+
+
+def test_admission_filters_before_queueing(policy):
+    assert policy.score == 90
+    assert policy.admit(_intent(bounty=10**14)) == "bounty"
+    assert policy.admit(_intent(min_score=95)) == "score"
+    assert policy.admit(_intent(payload='{"task_type": "OTHER"}')) == "task_type"
+    assert policy.admit(_intent(payload="not json")) == "malformed"
+    assert policy.rejected == {"bounty": 1, "score": 1, "task_type": 1, "malformed": 1}
+
+
+def test_stakes_are_reserved_against_the_balance(policy):
+    assert policy.admit(_intent()) is None
+    assert policy.admit(_intent()) is None
+    assert policy.admit(_intent()) == "balance"
+
+
+def test_released_stake_stays_reserved_until_the_balance_refreshes(policy, chain):
+    policy.admit(_intent())
+    policy.admit(_intent())
+
+    # The first intent submitted its stake; the cached balance does not show it yet
+    policy.release(BOUNTY)
+    assert policy.admit(_intent()) == "balance"
+
+    chain.balance -= BOUNTY
+    policy.refresh()
+    assert policy.admit(_intent()) == "balance"
+
+    # The second intent was lost without staking: its stake is free after a refresh
+    policy.release(BOUNTY)
+    policy.refresh()
+    assert policy.admit(_intent()) is None
+
+
+def test_release_during_refresh_waits_for_the_next_one(policy, chain):
+    policy.admit(_intent())
+    policy.admit(_intent())
+
+    def balance_then_release(params):
+        balance = hex(chain.balance)
+        policy.release(BOUNTY)   # staked after the balance above was read
+        return balance
+
+    chain.handlers["eth_getBalance"] = balance_then_release
+    policy.refresh()
+    assert policy.admit(_intent()) == "balance"
+
+
+# ── Race-aware cancellation ──────────────────────────────────────────
+
+def _core(solved: bool = False, resolved: bool = False, deadline: int | None = None) -> list:
+    deadline = int(time.time()) + 3600 if deadline is None else deadline
+    return [IDENTITY, "0x" + "00" * 20, BOUNTY, 0, 80, solved, resolved, 0, deadline]
+
+
+def _published(iid: bytes = b"\x07" * 32, claim_lease: int = 0, payload: str = '{"task_type": "AUDIT"}') -> dict:
+    return {"args": {
+        "intentId": iid, "employer": IDENTITY, "bounty": BOUNTY, "minScore": 80,
+        "rawJsonSchema": payload, "claimLease": claim_lease,
+    }}
+
+
+@pytest.mark.parametrize("core", [_core(solved=True), _core(resolved=True), _core(deadline=1)])
+def test_closed_intent_is_dropped_before_execution(chain, core):
+    chain.serve(worker.contract, intents=lambda iid: core)
+    executor, metrics = CountingExecutor(), worker.StageMetrics()
+
+    worker.process_intent(_published(), TEST_KEY, metrics, executor, storage=object())
+
+    assert executor.runs == 0
+    assert metrics.lost == 1
+
+
+def test_cancelled_intent_skips_the_chain_check(chain):
+    executor, metrics, cancel = CountingExecutor(), worker.StageMetrics(), threading.Event()
+    cancel.set()
+
+    worker.process_intent(_published(), TEST_KEY, metrics, executor, cancel, storage=object())
+
+    assert executor.runs == 0 and metrics.lost == 1
+    assert not any(method == "eth_call" for method, _ in chain.calls)
+
+
+def test_open_intent_is_executed(chain):
+    chain.serve(worker.contract, intents=lambda iid: _core())
+    executor, metrics = CountingExecutor(output=None), worker.StageMetrics()
+
+    worker.process_intent(_published(), TEST_KEY, metrics, executor, storage=object())
+
+    assert executor.runs == 1
+    assert metrics.skipped == 1
+
+
+# ── Off-chain payloads ───────────────────────────────────────────────
+
+PAYLOAD = json.dumps({"task_type": "AUDIT", "source": "contract A {}" * 500}).encode()
+
+
+def _descriptor(data: bytes = PAYLOAD, uri: str = "ipfs://QmPayload", **ref) -> str:
+    ref = {"uri": uri, "sha256": hashlib.sha256(data).hexdigest(), "size": len(data), **ref}
+    return json.dumps({"task_type": "AUDIT", "payload_ref": ref})
+
+
+class _GatewayHandler(BaseHTTPRequestHandler):
+    """Serves ``server.files`` by path, counting hits."""
+
+    def do_GET(self):
+        self.server.hits.append(self.path)
+        if self.path in self.server.redirects:
+            self.send_response(302)
+            self.send_header("Location", self.server.redirects[self.path])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = self.server.files.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def gateway():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _GatewayHandler)
+    server.files, server.hits, server.redirects = {"/QmPayload": PAYLOAD}, [], {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def payloads(gateway, tmp_path, monkeypatch):
+    store = worker.PayloadStore(str(tmp_path / "payloads"), gateway=f"http://127.0.0.1:{gateway.server_address[1]}")
+    monkeypatch.setattr(worker, "PAYLOADS", store)
+    return store
+
+
+def test_payload_ref_parses_descriptors_only():
+    ref = worker.payload_ref(_descriptor(sha256=hashlib.sha256(PAYLOAD).hexdigest().upper()))
+    assert ref == {"uri": "ipfs://QmPayload", "sha256": hashlib.sha256(PAYLOAD).hexdigest(), "size": len(PAYLOAD)}
+    assert worker.payload_ref('{"task_type": "AUDIT"}') is None
+    assert worker.payload_ref("not json") is None
+    for bad in (_descriptor(sha256="zz" * 32), _descriptor(sha256="ab"), _descriptor(size=-1),
+                '{"payload_ref": {"uri": "ipfs://Qm"}}'):
+        with pytest.raises(ValueError):
+            worker.payload_ref(bad)
+
+
+def test_payload_store_verifies_and_caches_by_hash(payloads, gateway):
+    ref = worker.payload_ref(_descriptor())
+    assert payloads.get(ref) == PAYLOAD.decode()
+    assert payloads.get(ref) == PAYLOAD.decode()
+    assert gateway.hits == ["/QmPayload"]
+
+    # A fresh store (new process) is served from the disk cache
+    again = worker.PayloadStore(payloads.directory, gateway=payloads.gateway)
+    assert again.get(ref) == PAYLOAD.decode()
+    assert gateway.hits == ["/QmPayload"]
+
+
+@pytest.mark.parametrize("served", [PAYLOAD[:-1] + b"!", PAYLOAD + b" ", PAYLOAD[:-1]])
+def test_payload_store_rejects_content_that_does_not_match(payloads, gateway, served):
+    gateway.files["/QmPayload"] = served
+    with pytest.raises(ValueError):
+        payloads.get(worker.payload_ref(_descriptor()))
+    assert os.listdir(payloads.directory) == []
+
+
+def test_failed_prefetch_is_retried(payloads, gateway):
+    ref = worker.payload_ref(_descriptor(uri="ipfs://QmLater"))
+    with pytest.raises(Exception):
+        payloads.get(ref)
+    gateway.files["/QmLater"] = PAYLOAD
+    assert payloads.get(ref) == PAYLOAD.decode()
+
+
+def test_payload_uris_are_limited_to_ipfs_and_allowed_gateways(payloads, monkeypatch):
+    monkeypatch.setattr(worker, "PAYLOAD_ALLOWED_URLS", ("https://payloads.example.com/tasks/",))
+    gw = payloads.gateway
+
+    assert payloads.url("ipfs://QmPayload") == f"{gw}/QmPayload"
+    for ok in (f"{gw}/QmPayload", "https://payloads.example.com/tasks/a.json", "https://PAYLOADS.example.com/tasks/a.json"):
+        assert payloads.url(ok) == ok
+    for bad in (
+        "http://169.254.169.254/latest/meta-data", "https://payloads.example.com/other/a.json",
+        "https://payloads.example.com/tasks-evil/a.json", "https://payloads.example.com.evil.io/tasks/a.json",
+        "http://payloads.example.com/tasks/a.json", "file:///etc/passwd",
+    ):
+        with pytest.raises(ValueError):
+            payloads.url(bad)
+
+
+def test_payload_redirects_are_not_followed(payloads, gateway):
+    gateway.redirects["/QmMoved"] = "http://169.254.169.254/latest/meta-data"
+    with pytest.raises(ValueError, match="redirected"):
+        payloads.get(worker.payload_ref(_descriptor(uri="ipfs://QmMoved")))
+    assert gateway.hits == ["/QmMoved"]
+
+
+def test_admission_rejects_payloads_off_the_allowed_gateways(policy):
+    assert policy.admit(_intent(payload=_descriptor(uri="http://10.0.0.1/payload.json"))) == "payload_uri"
+    assert policy.admit(_intent(payload=_descriptor(uri=f"{worker.PAYLOAD_GATEWAY}/QmPayload"))) is None
+
+
+def test_admission_uses_the_declared_payload_size(policy):
+    policy.max_payload_bytes = 10_000
+    assert policy.admit(_intent(payload=_descriptor())) is None
+    assert policy.admit(_intent(payload=_descriptor(size=10_001))) == "payload_size"
+    assert policy.admit(_intent(payload=_descriptor(sha256="nope"))) == "malformed"
+
+
+def test_only_admitted_intents_are_prefetched(policy, payloads, gateway):
+    pool, races = worker.ExecutionPool(lambda job, metrics: None, concurrency=1), worker.RaceTracker(TEST_ADDRESS)
+    cheap = _published(payload=_descriptor())
+    cheap["args"]["bounty"] = 10**14
+    worker._intake({"event": "IntentPublished", "blockNumber": 1, **cheap}, policy, pool, races)
+    assert policy.rejected == {"bounty": 1}
+    assert gateway.hits == []
+
+    worker._intake({"event": "IntentPublished", "blockNumber": 1, **_published(payload=_descriptor())}, policy, pool, races)
+    assert _eventually(lambda: gateway.hits == ["/QmPayload"])
+
+
+def test_executor_receives_the_verified_payload(chain, payloads):
+    chain.serve(worker.contract, intents=lambda iid: _core())
+    executor, metrics = CountingExecutor(output=None), worker.StageMetrics()
+
+    worker.process_intent(_published(payload=_descriptor()), TEST_KEY, metrics, executor, storage=object())
+
+    assert executor.tasks == [PAYLOAD.decode()]
+
+
+# ── Claims ───────────────────────────────────────────────────────────
+
+RIVAL = "0x" + "2b" * 20
+
+
+class FakePipeline:
+    """Stands in for the worker's TxPipeline: records sends, answers with ``receipt``."""
+
+    def __init__(self, receipt: dict | None = None, error: Exception | None = None):
+        self.address = TEST_ADDRESS
+        self.receipt = receipt
+        self.error   = error
+        self.sent    = []
+
+    def send(self, fn_call, gas=150_000, value=0, on_receipt=None):
+        if self.error:
+            raise self.error
+        self.sent.append((fn_call.fn_name, fn_call.args, value))
+        return b"\x0c" * 32
+
+    def wait(self, tx_hash, timeout=None):
+        return self.receipt
+
+
+@pytest.fixture
+def claims(chain, monkeypatch):
+    """Serve ``intentClaims`` from ``chain.lease`` and route transactions to a FakePipeline."""
+    chain.lease = ("0x" + "00" * 20, 0)
+    chain.serve(worker.contract, intentClaims=lambda iid: chain.lease)
+    chain.pipeline = FakePipeline({"status": 1})
+    monkeypatch.setattr(worker, "_get_tx_pipeline", lambda key: chain.pipeline)
+    return chain
+
+
+def test_claim_bond_is_a_tenth_of_the_bounty():
+    assert worker.claim_bond(BOUNTY) == BOUNTY // 10
+    assert worker.claim_bond(9) == 0
+
+
+def test_free_intent_is_claimed_with_the_bond(claims):
+    assert worker.claim_intent(b"\x07" * 32, BOUNTY, TEST_KEY)
+    assert claims.pipeline.sent == [("claimIntent", (b"\x07" * 32,), BOUNTY // 10)]
+
+
+@pytest.mark.parametrize("claimant, claimed", [(RIVAL, False), (TEST_ADDRESS, True)])
+def test_live_lease_is_respected_without_a_transaction(claims, claimant, claimed):
+    claims.lease = (claimant, int(time.time()) + 600)
+    assert worker.claim_intent(b"\x07" * 32, BOUNTY, TEST_KEY) is claimed
+    assert claims.pipeline.sent == []
+
+
+def test_lapsed_lease_is_claimed_again(claims):
+    claims.lease = (RIVAL, int(time.time()) - 1)
+    assert worker.claim_intent(b"\x07" * 32, BOUNTY, TEST_KEY)
+    assert len(claims.pipeline.sent) == 1
+
+
+@pytest.mark.parametrize("pipeline", [FakePipeline({"status": 0}), FakePipeline(None), FakePipeline(error=ValueError("nonce"))])
+def test_unconfirmed_claim_skips_the_intent(claims, pipeline):
+    claims.pipeline = pipeline
+    assert not worker.claim_intent(b"\x07" * 32, BOUNTY, TEST_KEY)
+
+
+def test_lost_claim_never_runs_the_executor(claims):
+    claims.serve(worker.contract, intents=lambda iid: _core())
+    claims.pipeline = FakePipeline({"status": 0})
+    executor, metrics = CountingExecutor(), worker.StageMetrics()
+
+    worker.process_intent(_published(claim_lease=600), TEST_KEY, metrics, executor, storage=object())
+
+    assert executor.runs == 0 and metrics.lost == 1
+
+
+def test_rival_claim_cancels_a_queued_run():
+    races  = worker.RaceTracker(TEST_ADDRESS)
+    cancel = races.watch(b"\x07" * 32)
+    assert not races.taken({"args": {"intentId": b"\x07" * 32, "worker": TEST_ADDRESS}})
+    assert races.taken({"args": {"intentId": b"\x07" * 32, "worker": RIVAL}})
+    assert cancel.is_set()
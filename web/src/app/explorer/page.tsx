@@ -6,13 +6,13 @@ import { useState, useEffect, useCallback } from "react";
 import { ethers } from "ethers";
 
 const RPC_URL          = "https://testnet-rpc.monad.xyz";
-const CONTRACT_ADDRESS = "0x1a8d74e1ADf1Be715e20d39ccF7637b8486b5899";
+const CONTRACT_ADDRESS = process.env.NEXT_PUBLIC_INTENTPOOL_ADDRESS || "0x1a8d74e1ADf1Be715e20d39ccF7637b8486b5899";
 const EXPLORER_BASE    = "https://monad-testnet.socialscan.io";
 const BATCH_SIZE       = 100;
 const HISTORY_DEPTH    = 2000;
 
 const CONTRACT_ABI = [
-  "event IntentPublished(bytes32 indexed intentId, address indexed employer, uint256 bounty, uint256 minScore, string rawJsonSchema)",
+  "event IntentPublished(bytes32 indexed intentId, address indexed employer, bytes32 indexed taskType, uint256 bounty, uint256 minScore, uint256 claimLease, string rawJsonSchema)",
   "event IntentSolved(bytes32 indexed intentId, address indexed worker, string resultHash, string dataUrl)",
   "event IntentSettled(bytes32 indexed intentId, address indexed worker, uint256 payout)",
 ];
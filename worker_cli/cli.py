@@ -16,8 +16,17 @@ import time
 
 from eth_account import Account
 
-from worker import listen_for_intents
-from worker_gateway import start_gateway
+from chain_sync import deployment_problem
+from worker import CONTRACT_ADDRESS, DEFAULT_CONCURRENCY, STORAGE_BACKENDS, listen_for_intents, w3
+from worker_gateway import (
+    GATEWAY_KEEPALIVE,
+    GATEWAY_RPC_TIMEOUT,
+    GATEWAY_THREADS,
+    GATEWAY_WORKER_TIMEOUT,
+    GATEWAY_WORKERS,
+    GRACEFUL_TIMEOUT,
+    start_gateway,
+)
 
 KEYSTORE_PATH = os.path.expanduser("~/.openclaw/keystore.json")
 CONFIG_PATH   = os.path.expanduser("~/.openclaw/config.json")
@@ -171,19 +180,28 @@ def unlock_keystore() -> str:
 
 # ── Commands ─────────────────────────────────────────────────────────
 
-def cmd_start(_args):
+def cmd_start(args):
     banner()
 
+    if problem := deployment_problem(w3, CONTRACT_ADDRESS):
+        print(problem)
+        sys.exit(1)
+
     if not os.path.exists(KEYSTORE_PATH):
         run_init_flow()
 
     gateway_port = 5000
     cfg = load_config()
-    cfg = ensure_pinata_jwt(cfg)
+    storage = getattr(args, "storage", None) or cfg.get("storage") or "pinata"
+    if storage == "pinata":
+        cfg = ensure_pinata_jwt(cfg)
+        os.environ["PINATA_JWT"] = cfg["pinata_jwt"]
     cfg = ensure_gateway_url(cfg, port=gateway_port)
 
-    os.environ["PINATA_JWT"]         = cfg["pinata_jwt"]
+    os.environ["WORKER_STORAGE"]     = storage
     os.environ["GATEWAY_PUBLIC_URL"] = cfg["gateway_public_url"]
+    if getattr(args, "ws_url", None):
+        os.environ["WS_RPC_URL"] = args.ws_url
 
     print("[*] Unlocking keystore...")
     private_key = unlock_keystore()
@@ -191,11 +209,28 @@ def cmd_start(_args):
     account = Account.from_key(private_key)
     print(f"[+] Node address: {account.address}\n")
 
-    gw = multiprocessing.Process(target=start_gateway, args=(gateway_port, private_key))
+    # Listener → gateway: employers of our confirmed submissions, pre-warming its intent cache
+    prewarm = multiprocessing.Queue()
+
+    gw = multiprocessing.Process(
+        target=start_gateway,
+        args=(gateway_port, private_key, prewarm),
+        kwargs={
+            "server":         getattr(args, "gateway_server", "dev"),
+            "workers":        getattr(args, "gateway_workers", GATEWAY_WORKERS),
+            "threads":        getattr(args, "gateway_threads", GATEWAY_THREADS),
+            "worker_timeout": getattr(args, "gateway_worker_timeout", GATEWAY_WORKER_TIMEOUT),
+            "keepalive":      getattr(args, "gateway_keepalive", GATEWAY_KEEPALIVE),
+            "rpc_timeout":    getattr(args, "gateway_rpc_timeout", GATEWAY_RPC_TIMEOUT),
+        },
+    )
     gw.daemon = True
     gw.start()
 
-    listener = multiprocessing.Process(target=listen_for_intents, args=(private_key,))
+    concurrency = getattr(args, "concurrency", None) or DEFAULT_CONCURRENCY
+    listener = multiprocessing.Process(
+        target=listen_for_intents, args=(private_key, concurrency, cfg.get("admission"), prewarm)
+    )
     listener.daemon = True
     listener.start()
 
@@ -208,7 +243,10 @@ def cmd_start(_args):
         print("\n[*] Shutting down worker agent...")
         gw.terminate()
         listener.terminate()
-        gw.join()
+        gw.join(GRACEFUL_TIMEOUT + 5)
+        if gw.is_alive():
+            gw.kill()
+            gw.join()
         listener.join()
         print("[*] Node stopped.")
         sys.exit(0)
@@ -244,7 +282,47 @@ def main():
     parser = argparse.ArgumentParser(description="A2A IntentPool Worker CLI")
     subs = parser.add_subparsers(dest="command")
 
-    subs.add_parser("start", help="Start the worker agent (auto-initializes on first run)")
+    start_p = subs.add_parser("start", help="Start the worker agent (auto-initializes on first run)")
+    start_p.add_argument(
+        "--concurrency", type=int, default=None,
+        help=f"Max intents executed in parallel (default: {DEFAULT_CONCURRENCY}, env WORKER_CONCURRENCY)",
+    )
+    start_p.add_argument(
+        "--storage", choices=sorted(STORAGE_BACKENDS), default=None,
+        help="Where result manifests are published: pinata (default), ipfs (local node API, "
+             "env IPFS_API_URL / IPFS_GATEWAY_URL) or local (served by this node's gateway)",
+    )
+    start_p.add_argument(
+        "--gateway-server", choices=["dev", "gunicorn"], default="dev",
+        help="Key gateway server: Flask development server (default) or gunicorn for production",
+    )
+    start_p.add_argument(
+        "--gateway-workers", type=int, default=GATEWAY_WORKERS,
+        help=f"gunicorn worker processes (default: {GATEWAY_WORKERS})",
+    )
+    start_p.add_argument(
+        "--gateway-threads", type=int, default=GATEWAY_THREADS,
+        help=f"Threads per gunicorn worker (default: {GATEWAY_THREADS})",
+    )
+    start_p.add_argument(
+        "--gateway-worker-timeout", type=int, default=GATEWAY_WORKER_TIMEOUT,
+        help="Seconds a gunicorn worker may go silent before it is restarted; a liveness "
+             f"watchdog, not a per-request limit (default: {GATEWAY_WORKER_TIMEOUT})",
+    )
+    start_p.add_argument(
+        "--gateway-rpc-timeout", type=float, default=GATEWAY_RPC_TIMEOUT,
+        help="Seconds each chain read inside a key request may take before the request "
+             f"fails with 504 (default: {GATEWAY_RPC_TIMEOUT:g}, env GATEWAY_RPC_TIMEOUT)",
+    )
+    start_p.add_argument(
+        "--gateway-keepalive", type=int, default=GATEWAY_KEEPALIVE,
+        help=f"Seconds to hold idle keep-alive connections (default: {GATEWAY_KEEPALIVE})",
+    )
+    start_p.add_argument(
+        "--ws-url", default=None,
+        help="WebSocket RPC endpoint for push-based intent delivery (env WS_RPC_URL); "
+             "falls back to polling when unreachable",
+    )
 
     reset_p = subs.add_parser("reset", help="Reset configuration (keystore / jwt / gateway / all)")
     reset_p.add_argument(
@@ -0,0 +1,117 @@
+"""
+Local IPFS CID computation — rebuilds the UnixFS dag-pb DAG that ``ipfs add``
+and Pinata produce by default (256 KiB fixed-size chunks, balanced layout with
+174 links per node, CIDv0), so a file's CID is known before it is uploaded.
+"""
+
+import hashlib
+
+CHUNK_SIZE = 256 * 1024
+MAX_LINKS  = 174
+
+_B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_UNIXFS_FILE  = 2
+
+
+# ── Protobuf / multiformats encoding ─────────────────────────────────
+
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _varint_field(num: int, value: int) -> bytes:
+    return _varint(num << 3) + _varint(value)
+
+
+def _bytes_field(num: int, data: bytes) -> bytes:
+    return _varint(num << 3 | 2) + _varint(len(data)) + data
+
+
+def _unixfs_file(data: bytes, filesize: int, blocksizes: list[int] = ()) -> bytes:
+    """UnixFS ``Data`` message for a file node (leaf when ``data`` is set, inner node otherwise)."""
+    out = _varint_field(1, _UNIXFS_FILE)
+    if data:
+        out += _bytes_field(2, data)
+    out += _varint_field(3, filesize)
+    for size in blocksizes:
+        out += _varint_field(4, size)
+    return out
+
+
+def _dag_pb(data: bytes, links: list[tuple[bytes, int]] = ()) -> bytes:
+    """dag-pb ``PBNode``: links first, then data (canonical field order)."""
+    out = b""
+    for multihash, tsize in links:
+        out += _bytes_field(2, _bytes_field(1, multihash) + _bytes_field(2, b"") + _varint_field(3, tsize))
+    return out + _bytes_field(1, data)
+
+
+def _multihash(block: bytes) -> bytes:
+    return b"\x12\x20" + hashlib.sha256(block).digest()
+
+
+def _base58(data: bytes) -> str:
+    n   = int.from_bytes(data, "big")
+    out = ""
+    while n:
+        n, rem = divmod(n, 58)
+        out = _B58_ALPHABET[rem] + out
+    pad = len(data) - len(data.lstrip(b"\0"))
+    return "1" * pad + out
+
+
+# ── DAG builder ──────────────────────────────────────────────────────
+
+class CIDv0Builder:
+    """
+    Incremental CIDv0 of a file: ``update()`` with its bytes in any pieces,
+    then ``cid()``. Only one chunk plus a hash per chunk is held in memory.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._leaves: list[tuple[bytes, int, int]] = []   # (multihash, tsize, file bytes)
+
+    def update(self, data: bytes):
+        self._buf += data
+        while len(self._buf) >= CHUNK_SIZE:
+            self._add_leaf(bytes(self._buf[:CHUNK_SIZE]))
+            del self._buf[:CHUNK_SIZE]
+
+    def _add_leaf(self, chunk: bytes):
+        block = _dag_pb(_unixfs_file(chunk, len(chunk)))
+        self._leaves.append((_multihash(block), len(block), len(chunk)))
+
+    @staticmethod
+    def _parent(children: list[tuple[bytes, int, int]]) -> tuple[bytes, int, int]:
+        sizes = [size for _, _, size in children]
+        block = _dag_pb(
+            _unixfs_file(b"", sum(sizes), sizes),
+            [(multihash, tsize) for multihash, tsize, _ in children],
+        )
+        return _multihash(block), len(block) + sum(tsize for _, tsize, _ in children), sum(sizes)
+
+    def cid(self) -> str:
+        if self._buf or not self._leaves:
+            self._add_leaf(bytes(self._buf))
+            self._buf.clear()
+        level = self._leaves
+        while len(level) > 1:
+            level = [self._parent(level[i:i + MAX_LINKS]) for i in range(0, len(level), MAX_LINKS)]
+        return _base58(level[0][0])
+
+
+def cid_of(chunks) -> str:
+    """CIDv0 of the bytes yielded by ``chunks`` (e.g. an ``EncryptedManifest``)."""
+    builder = CIDv0Builder()
+    for chunk in chunks:
+        builder.update(chunk)
+    return builder.cid()
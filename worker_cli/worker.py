@@ -10,22 +10,77 @@ OpenClaw ships as the default implementation; third-party agents can subclass
 import hashlib
 import json
 import os
+import queue
 import subprocess
+import tempfile
+import threading
 import time
+import uuid
+import zlib
 from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
 
 import requests
 from Crypto.Cipher import AES
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from web3 import Web3
+from web3.exceptions import ContractLogicError
+
+try:
+    import zstandard
+except ImportError:   # in requirements.txt; without it results fall back to zlib
+    zstandard = None
+
+from chain_sync import (
+    BlockCursor,
+    backfill_logs,
+    event_decoder,
+    event_topic,
+    log_filter,
+    make_event_source,
+    resume_block,
+    task_type_topic,
+)
+from ipfs_cid import CIDv0Builder, cid_of
+from tx_manager import TxPipeline
 
 # ── Configuration ────────────────────────────────────────────────────
 
 RPC_URL          = "https://testnet-rpc.monad.xyz"
-CONTRACT_ADDRESS = "0x1a8d74e1ADf1Be715e20d39ccF7637b8486b5899"
+CONTRACT_ADDRESS = Web3.to_checksum_address(os.environ.get("INTENTPOOL_ADDRESS") or "0x1a8d74e1ADf1Be715e20d39ccF7637b8486b5899")
+CURSOR_PATH      = os.path.expanduser("~/.openclaw/cursor.json")
+
+RESULT_CACHE_DIR = os.path.expanduser("~/.openclaw/result_cache")
+RESULT_CACHE_MB  = int(os.environ.get("WORKER_RESULT_CACHE_MB") or 1024)   # 0 disables the cache
+VOLATILE_FIELDS  = ("timestamp",)   # payload fields that never change the task itself
 
 CONTRACT_ABI = [
-    {"anonymous": False, "inputs": [{"indexed": True, "internalType": "bytes32", "name": "intentId", "type": "bytes32"}, {"indexed": True, "internalType": "address", "name": "employer", "type": "address"}, {"indexed": False, "internalType": "uint256", "name": "bounty", "type": "uint256"}, {"indexed": False, "internalType": "uint256", "name": "minScore", "type": "uint256"}, {"indexed": False, "internalType": "string", "name": "rawJsonSchema", "type": "string"}], "name": "IntentPublished", "type": "event"},
+    {"anonymous": False, "inputs": [{"indexed": True, "internalType": "bytes32", "name": "intentId", "type": "bytes32"}, {"indexed": True, "internalType": "address", "name": "employer", "type": "address"}, {"indexed": True, "internalType": "bytes32", "name": "taskType", "type": "bytes32"}, {"indexed": False, "internalType": "uint256", "name": "bounty", "type": "uint256"}, {"indexed": False, "internalType": "uint256", "name": "minScore", "type": "uint256"}, {"indexed": False, "internalType": "uint256", "name": "claimLease", "type": "uint256"}, {"indexed": False, "internalType": "string", "name": "rawJsonSchema", "type": "string"}], "name": "IntentPublished", "type": "event"},
+    {"anonymous": False, "inputs": [{"indexed": True, "internalType": "bytes32", "name": "intentId", "type": "bytes32"}, {"indexed": True, "internalType": "address", "name": "worker", "type": "address"}, {"indexed": False, "internalType": "string", "name": "resultHash", "type": "string"}, {"indexed": False, "internalType": "string", "name": "dataUrl", "type": "string"}], "name": "IntentSolved", "type": "event"},
+    {"anonymous": False, "inputs": [{"indexed": True, "internalType": "bytes32", "name": "intentId", "type": "bytes32"}, {"indexed": True, "internalType": "address", "name": "worker", "type": "address"}, {"indexed": False, "internalType": "uint256", "name": "leaseEnd", "type": "uint256"}, {"indexed": False, "internalType": "uint256", "name": "bond", "type": "uint256"}], "name": "IntentClaimed", "type": "event"},
+    {"inputs": [{"internalType": "bytes32", "name": "", "type": "bytes32"}], "name": "intents", "outputs": [
+        {"internalType": "address", "name": "employer",   "type": "address"},
+        {"internalType": "address", "name": "worker",     "type": "address"},
+        {"internalType": "uint256", "name": "bounty",     "type": "uint256"},
+        {"internalType": "uint256", "name": "stake",      "type": "uint256"},
+        {"internalType": "uint256", "name": "minScore",   "type": "uint256"},
+        {"internalType": "bool",    "name": "isSolved",   "type": "bool"},
+        {"internalType": "bool",    "name": "isResolved", "type": "bool"},
+        {"internalType": "uint256", "name": "createdAt",  "type": "uint256"},
+        {"internalType": "uint256", "name": "deadline",   "type": "uint256"}
+    ], "stateMutability": "view", "type": "function"},
     {"inputs": [{"internalType": "bytes32", "name": "intentId", "type": "bytes32"}, {"internalType": "string", "name": "resultHash", "type": "string"}, {"internalType": "string", "name": "dataUrl", "type": "string"}], "name": "submitResult", "outputs": [], "stateMutability": "payable", "type": "function"},
+    {"inputs": [{"internalType": "bytes32", "name": "intentId", "type": "bytes32"}], "name": "claimIntent", "outputs": [], "stateMutability": "payable", "type": "function"},
+    {"inputs": [{"internalType": "bytes32", "name": "", "type": "bytes32"}], "name": "intentClaims", "outputs": [{"internalType": "address", "name": "claimant", "type": "address"}, {"internalType": "uint40", "name": "leaseEnd", "type": "uint40"}], "stateMutability": "view", "type": "function"},
+    {"inputs": [], "name": "identityContract", "outputs": [{"internalType": "contract IAgentIdentity", "name": "", "type": "address"}], "stateMutability": "view", "type": "function"},
+]
+
+IDENTITY_ABI = [
+    {"inputs": [{"internalType": "address", "name": "agent", "type": "address"}], "name": "getScore", "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}], "stateMutability": "view", "type": "function"},
 ]
 
 _session = requests.Session()
@@ -41,37 +96,399 @@ def derive_aes_key(private_key_hex: str, intent_id: bytes) -> bytes:
     return hashlib.sha256(bytes.fromhex(private_key_hex) + intent_id).digest()
 
 
-def aes_encrypt(key: bytes, plaintext: bytes) -> bytes:
-    """AES-256-GCM encrypt. Output: nonce(16) | tag(16) | ciphertext."""
-    cipher = AES.new(key, AES.MODE_GCM)
-    ct, tag = cipher.encrypt_and_digest(plaintext)
-    return cipher.nonce + tag + ct
+# ── Result compression ───────────────────────────────────────────────
 
+COMPRESS_MIN_BYTES = 512      # smaller results are sent as-is
+COMPRESS_MIN_GAIN  = 0.9      # keep compression only if it saves at least 10%
+COMPRESS_READ_SIZE = 1024 * 1024
 
-# ── IPFS upload ──────────────────────────────────────────────────────
 
-def upload_to_ipfs(data: bytes, filename: str) -> str:
-    """Pin bytes to IPFS via Pinata and return a public gateway URL."""
-    jwt = os.environ.get("PINATA_JWT", "")
-    if not jwt:
-        raise ValueError("PINATA_JWT not configured. Run 'python cli.py start' to set up.")
+def _compressor(codec: str, size: int):
+    """Streaming compressor for ``codec``; the level drops as the payload grows."""
+    if codec == "zstd":
+        level = 9 if size < 1 << 20 else 3 if size < 64 << 20 else 1
+        return zstandard.ZstdCompressor(level=level).compressobj()
+    level = 9 if size < 1 << 20 else 6 if size < 64 << 20 else 1
+    return zlib.compressobj(level)
 
-    s = requests.Session()
-    s.trust_env = False
-    resp = s.post(
-        "https://api.pinata.cloud/pinning/pinFileToIPFS",
-        headers={"Authorization": f"Bearer {jwt}"},
-        files={"file": (filename, data, "application/octet-stream")},
-    )
-    resp.raise_for_status()
-    cid = resp.json()["IpfsHash"]
-    return f"https://gateway.pinata.cloud/ipfs/{cid}"
+
+def compress_output(output: "CapturedOutput") -> tuple["CapturedOutput", str]:
+    """
+    Compress a captured result for upload: zstd when available, else zlib.
+    Returns ``(payload, codec)``. The payload is ``output`` itself (codec
+    "none") when the result is tiny or does not compress. The result hash
+    always covers the uncompressed plaintext.
+    """
+    if output.size < COMPRESS_MIN_BYTES:
+        return output, "none"
+
+    codec      = "zstd" if zstandard is not None else "zlib"
+    compressor = _compressor(codec, output.size)
+    packed     = CapturedOutput(digest=False)
+    src        = output.open()
+    while chunk := src.read(COMPRESS_READ_SIZE):
+        packed.write(compressor.compress(chunk))
+    packed.write(compressor.flush())
+
+    if packed.size >= output.size * COMPRESS_MIN_GAIN:
+        packed.close()
+        return output, "none"
+    return packed, codec
+
+
+# ── Result manifest (v2, streaming) ──────────────────────────────────
+
+MANIFEST_MAGIC      = b"A2AM"
+MANIFEST_VERSION    = 2
+MANIFEST_CHUNK_SIZE = 64 * 1024
+SEGMENT_FINAL       = 0x01
+
+
+def _segment_nonce(prefix: bytes, index: int, final: bool) -> bytes:
+    """12-byte GCM nonce: prefix(7) | segment index(4) | final flag(1)."""
+    return prefix + index.to_bytes(4, "big") + bytes([final])
+
+
+class EncryptedManifest:
+    """
+    Binary v2 result manifest, produced lazily while it is uploaded:
+
+        "A2AM" | version(1) | header_len(4) | header JSON
+        per segment: flags(1) | length(4) | ciphertext(length) | tag(16)
+
+    Every segment is AES-256-GCM over at most ``chunk_size`` plaintext bytes,
+    with the header as associated data and the segment index and final flag
+    bound into the nonce. Segments therefore cannot be reordered, dropped or
+    truncated, and the header cannot be swapped. Memory stays bounded by one
+    chunk. The total length is known up front so uploads need no chunked encoding.
+    """
+
+    def __init__(
+        self,
+        key: bytes,
+        source,
+        size: int,
+        key_gateway: str,
+        chunk_size: int = MANIFEST_CHUNK_SIZE,
+        key_batch_url: str | None = None,
+        codec: str = "none",
+    ):
+        self._key    = key
+        self._source = source
+        self._size   = size
+        self._chunk  = chunk_size
+        self._prefix = os.urandom(7)
+        header = {
+            "version": "2.0",
+            "key_gateway": key_gateway,
+            "chunk_size": chunk_size,
+            "nonce_prefix": self._prefix.hex(),
+            "codec": codec,
+        }
+        if key_batch_url:
+            header["key_batch_url"] = key_batch_url
+        self.header = json.dumps(header).encode("utf-8")
+
+    def __len__(self) -> int:
+        segments = max(1, -(-self._size // self._chunk))
+        return 9 + len(self.header) + segments * (5 + 16) + self._size
+
+    def __iter__(self):
+        self._source.seek(0)
+        yield MANIFEST_MAGIC + bytes([MANIFEST_VERSION]) + len(self.header).to_bytes(4, "big") + self.header
+
+        index = 0
+        chunk = self._source.read(self._chunk)
+        while True:
+            nxt   = self._source.read(self._chunk) if len(chunk) == self._chunk else b""
+            final = not nxt
+            cipher = AES.new(self._key, AES.MODE_GCM, nonce=_segment_nonce(self._prefix, index, final))
+            cipher.update(self.header)
+            ct, tag = cipher.encrypt_and_digest(chunk)
+            yield bytes([SEGMENT_FINAL if final else 0]) + len(chunk).to_bytes(4, "big") + ct + tag
+            if final:
+                return
+            chunk, index = nxt, index + 1
+
+
+# ── Result upload ────────────────────────────────────────────────────
+
+UPLOAD_WORKERS   = 4
+UPLOAD_ATTEMPTS  = 5
+UPLOAD_BACKOFF   = 5      # seconds, doubled after every failed attempt
+UPLOAD_RETRY_MAX = 3600   # seconds between background retries of a queued manifest, at most
+UPLOAD_QUEUE_DIR = os.path.expanduser(os.environ.get("WORKER_UPLOAD_QUEUE_DIR") or "~/.openclaw/upload_queue")
+
+# One pooled client for every storage backend. urllib3 retries connection
+# failures and idempotent requests; uploads are retried by the caller.
+_http = requests.Session()
+_http.trust_env = False
+_http_adapter = HTTPAdapter(
+    pool_maxsize=UPLOAD_WORKERS * 2,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 502, 503, 504)),
+)
+_http.mount("http://", _http_adapter)
+_http.mount("https://", _http_adapter)
+
+
+class _MultipartBody:
+    """multipart/form-data body: text fields, then one file streamed from a sized iterable of bytes."""
+
+    def __init__(self, field: str, filename: str, payload, fields: dict[str, str] | None = None):
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self._payload = payload
+        text_parts = "".join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+            for name, value in (fields or {}).items()
+        )
+        self._prelude = (
+            text_parts +
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            "Content-Type: application/octet-stream\r\n\r\n"
+        ).encode("utf-8")
+        self._epilogue = f"\r\n--{boundary}--\r\n".encode("utf-8")
+
+    def __len__(self) -> int:
+        return len(self._prelude) + len(self._payload) + len(self._epilogue)
+
+    def __iter__(self):
+        yield self._prelude
+        yield from self._payload
+        yield self._epilogue
+
+
+_upload_pool = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="ipfs-upload")
+
+
+class _FileChunks:
+    """Sized iterable over a file's bytes, so a queued manifest streams like ``EncryptedManifest``."""
+
+    def __init__(self, path: str, chunk_size: int = MANIFEST_CHUNK_SIZE):
+        self.path   = path
+        self._chunk = chunk_size
+
+    def __len__(self) -> int:
+        return os.path.getsize(self.path)
+
+    def __iter__(self):
+        with open(self.path, "rb") as f:
+            while chunk := f.read(self._chunk):
+                yield chunk
+
+
+class UploadQueue:
+    """
+    Manifests whose CID is already on-chain but not yet held by the storage backend.
+
+    Each entry is ``<intent id>-<cid>.a2am`` under ``directory``, written before
+    the first upload attempt and removed only once the backend returns the
+    submitted CID. Failed uploads and CID mismatches stay on disk and are
+    retried with exponential backoff (capped at ``UPLOAD_RETRY_MAX``); entries
+    left over from a previous run are picked up again by ``resume``.
+    """
+
+    def __init__(self, storage: "StorageBackend", directory: str = UPLOAD_QUEUE_DIR):
+        self.storage   = storage
+        self.directory = directory
+        self._retry: dict[str, tuple[float, float]] = {}   # path → (next attempt, current delay)
+        self._lock     = threading.Lock()
+        self._wake     = threading.Event()
+        self._thread: threading.Thread | None = None
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def enqueue(self, intent_id: bytes, manifest, cid: str) -> str:
+        """Write ``manifest`` to the queue and return the entry's path; its CID must match ``cid``."""
+        builder = CIDv0Builder()
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in ((manifest,) if isinstance(manifest, (bytes, bytearray)) else manifest):
+                    f.write(chunk)
+                    builder.update(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            if builder.cid() != cid:
+                raise ValueError(f"queued manifest hashes to {builder.cid()}, expected {cid}")
+            path = os.path.join(self.directory, f"{intent_id.hex()}-{cid}.a2am")
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        return path
+
+    def entries(self) -> list[str]:
+        """Paths of every queued manifest, oldest first."""
+        paths = [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory) if name.endswith(".a2am")
+        ]
+        return sorted(paths, key=os.path.getmtime)
+
+    def upload(self, path: str) -> bool:
+        """One upload attempt; the entry is removed once the backend returns its CID."""
+        intent_hex, cid = os.path.basename(path)[:-len(".a2am")].split("-", 1)
+        tag = intent_hex[:8]
+        try:
+            remote_cid = self.storage.put(_FileChunks(path), filename=f"{intent_hex}.a2am")
+        except Exception as e:
+            print(f"[IPFS]  Intent {tag}... upload failed ({e})")
+            return False
+        if remote_cid != cid:
+            print(f"[!] Intent {tag}... CID mismatch — submitted {cid}, {self.storage.name} returned {remote_cid}")
+            return False
+        os.unlink(path)
+        with self._lock:
+            self._retry.pop(path, None)
+        print(f"[IPFS]  Intent {tag}... stored on {self.storage.name}, CID verified: {cid}")
+        return True
+
+    def defer(self, path: str, delay: float | None = None):
+        """Schedule ``path`` for the retry thread, first attempt after ``delay`` seconds."""
+        delay = UPLOAD_BACKOFF * 2 ** UPLOAD_ATTEMPTS if delay is None else delay
+        with self._lock:
+            self._retry[path] = (time.monotonic() + delay, min(max(delay, UPLOAD_BACKOFF), UPLOAD_RETRY_MAX))
+        self._wake.set()
+
+    def resume(self) -> int:
+        """Schedule every entry left on disk by an earlier run; returns how many there were."""
+        paths = self.entries()
+        for path in paths:
+            self.defer(path, delay=0)
+        return len(paths)
+
+    def retry_due(self) -> float | None:
+        """Attempt every entry whose backoff has elapsed; returns seconds until the next one, if any."""
+        now = time.monotonic()
+        with self._lock:
+            due = [path for path, (at, _) in self._retry.items() if at <= now]
+        for path in due:
+            if not os.path.exists(path):
+                with self._lock:
+                    self._retry.pop(path, None)
+            elif not self.upload(path):
+                with self._lock:
+                    _, delay = self._retry[path]
+                    self._retry[path] = (time.monotonic() + delay, min(delay * 2, UPLOAD_RETRY_MAX))
+        with self._lock:
+            if not self._retry:
+                return None
+            return max(0.0, min(at for at, _ in self._retry.values()) - time.monotonic())
+
+    def start(self):
+        """Start the retry thread (once)."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="upload-retry", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            wait = self.retry_due()
+            self._wake.wait(timeout=wait)
+            self._wake.clear()
+
+
+_upload_queue: UploadQueue | None = None
+_upload_queue_lock = threading.Lock()
+
+
+def upload_queue(storage: "StorageBackend") -> UploadQueue:
+    """Process-wide upload queue, created on first use."""
+    global _upload_queue
+    with _upload_queue_lock:
+        if _upload_queue is None:
+            _upload_queue = UploadQueue(storage)
+            _upload_queue.start()
+        return _upload_queue
+
+
+def _upload_in_background(queue: UploadQueue, intent_id: bytes, manifest, cid: str, output, metrics):
+    """
+    Store a manifest whose CID is already on-chain. It is queued on disk
+    first, retried with backoff, and left to the queue's retry thread if the
+    backend still does not hold the submitted CID.
+    """
+    tag = intent_id.hex()[:8]
+    try:
+        with metrics.stage("upload"):
+            path = queue.enqueue(intent_id, manifest, cid)
+            output.close()
+            for attempt in range(UPLOAD_ATTEMPTS):
+                if queue.upload(path):
+                    return
+                if attempt < UPLOAD_ATTEMPTS - 1:
+                    delay = UPLOAD_BACKOFF * 2 ** attempt
+                    print(f"[IPFS]  Intent {tag}... retrying in {delay}s")
+                    time.sleep(delay)
+            print(f"[!] Intent {tag}... not stored after {UPLOAD_ATTEMPTS} attempts — "
+                  f"kept in {queue.directory}, retrying in the background")
+            queue.defer(path)
+    except Exception as e:
+        print(f"[!] Intent {tag}... could not queue the manifest for upload: {e}")
+    finally:
+        output.close()
 
 
 # ══════════════════════════════════════════════════════════════════════
 #  Executor Interface — pluggable agent backends
 # ══════════════════════════════════════════════════════════════════════
 
+# ── Output capture ───────────────────────────────────────────────────
+
+CAPTURE_SPOOL_BYTES = 8 * 1024 * 1024   # output kept in memory before spilling to a temp file
+
+
+class CapturedOutput:
+    """
+    Write-once sink for executor output.
+
+    Data is held in memory up to ``spool_bytes`` and spills to an anonymous
+    temp file beyond that. SHA-256 is computed as data is written, so neither
+    hashing nor the later encrypt/upload stages ever need the whole output as
+    one string.
+    """
+
+    def __init__(self, spool_bytes: int = CAPTURE_SPOOL_BYTES, digest: bool = True):
+        self._file = tempfile.SpooledTemporaryFile(max_size=spool_bytes)
+        self._hash = hashlib.sha256() if digest else None
+        self.size  = 0
+
+    @classmethod
+    def from_text(cls, text: str) -> "CapturedOutput":
+        output = cls()
+        output.write(text)
+        return output
+
+    def write(self, data: str | bytes) -> int:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self._file.write(data)
+        if self._hash is not None:
+            self._hash.update(data)
+        self.size += len(data)
+        return len(data)
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+    def open(self):
+        """Rewind and return a readable binary stream over the captured output."""
+        self._file.seek(0)
+        return self._file
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
 class BaseExecutor(ABC):
     """
     Abstract interface for task execution engines.
@@ -80,6 +497,16 @@ class BaseExecutor(ABC):
     can integrate with the A2A IntentPool protocol by implementing this interface.
     """
 
+    # Bump ``version`` whenever a change would alter output for the same task,
+    # so cached results from the old behaviour stop matching. Executors whose
+    # output is not a pure function of the task set ``cacheable = False``.
+    # Executors with ``supports_cancel = True`` are called with a ``cancel``
+    # threading.Event and should stop early (returning (None, None)) once it
+    # is set, i.e. when another worker has already solved the intent.
+    version: str          = "1"
+    cacheable: bool       = True
+    supports_cancel: bool = False
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -87,13 +514,14 @@ class BaseExecutor(ABC):
         ...
 
     @abstractmethod
-    def execute(self, intent_json_str: str) -> tuple[str | None, str | None]:
+    def execute(self, intent_json_str: str) -> tuple[str | None, "CapturedOutput | str | None"]:
         """
         Execute a task described by the raw JSON intent schema.
 
         Returns:
-            (result_hash, full_output) — SHA-256 hex digest and the full
-            plaintext output. Return (None, None) to skip this intent.
+            (result_hash, output) — SHA-256 hex digest and the plaintext
+            output, either as a ``CapturedOutput`` (preferred for large
+            outputs) or a ``str``. Return (None, None) to skip this intent.
         """
         ...
 
@@ -104,11 +532,26 @@ class OpenClawExecutor(BaseExecutor):
     Requires the ``openclaw`` CLI to be available on PATH.
     """
 
+    supports_cancel = True
+
     @property
     def name(self) -> str:
         return "OpenClaw"
 
-    def execute(self, intent_json_str: str) -> tuple[str | None, str | None]:
+    @staticmethod
+    def _terminate_on_cancel(proc: subprocess.Popen, cancel: threading.Event):
+        while proc.poll() is None:
+            if cancel.wait(0.5):
+                proc.terminate()
+                try:
+                    proc.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                return
+
+    def execute(
+        self, intent_json_str: str, cancel: threading.Event | None = None,
+    ) -> tuple[str | None, CapturedOutput | None]:
         print(f"\n[{self.name}] Task detected — waking execution engine...")
 
         intent_data  = json.loads(intent_json_str)
@@ -122,6 +565,7 @@ class OpenClawExecutor(BaseExecutor):
             "Do not use any external web search or fetch tools."
         )
 
+        output = CapturedOutput()
         try:
             print(f"[{self.name}] Starting local compute engine...")
             print("-" * 40 + f" {self.name} Agent Logs " + "-" * 40)
@@ -132,143 +576,1150 @@ class OpenClawExecutor(BaseExecutor):
                 stderr=subprocess.STDOUT,
                 text=True,
             )
+            if cancel is not None:
+                threading.Thread(
+                    target=self._terminate_on_cancel, args=(proc, cancel), name="openclaw-cancel", daemon=True
+                ).start()
 
-            full_log = ""
             for line in proc.stdout:
                 print(line, end="")
-                full_log += line
+                output.write(line)
 
             proc.wait()
             print("-" * 101)
 
+            if cancel is not None and cancel.is_set():
+                print(f"[{self.name}] Run cancelled — intent solved by another worker.")
+                output.close()
+                return None, None
+
             if proc.returncode != 0:
                 print(f"[{self.name}] Execution failed. Skipping this intent.")
+                output.close()
                 return None, None
 
-            print(f"\n[{self.name}] Task complete. Hashing output...")
-            result_hash = hashlib.sha256(full_log.encode()).hexdigest()
+            result_hash = output.hexdigest()
+            print(f"\n[{self.name}] Task complete ({output.size} bytes captured)")
             print(f"[{self.name}] SHA-256 attestation: 0x{result_hash[:10]}...")
-            return result_hash, full_log
+            return result_hash, output
 
         except FileNotFoundError:
             print(f"[!] '{self.name}' CLI not found on PATH. Is it installed?")
-            return None, None
         except Exception as e:
             print(f"[!] Execution error: {e}")
-            return None, None
+        output.close()
+        return None, None
+
+
+# ── Result cache ─────────────────────────────────────────────────────
+
+def task_cache_key(intent_json_str: str, executor: BaseExecutor) -> str:
+    """SHA-256 over the canonical task payload (volatile fields removed) and executor identity."""
+    try:
+        payload = json.loads(intent_json_str)
+        if isinstance(payload, dict):
+            payload = {k: v for k, v in payload.items() if k not in VOLATILE_FIELDS}
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    except ValueError:
+        canonical = intent_json_str
+    return hashlib.sha256(f"{executor.name}\0{executor.version}\0{canonical}".encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    On-disk store of executor outputs keyed by ``task_cache_key``.
+
+    Each entry is ``<key>.out`` (raw output) plus ``<key>.json`` (hash, size).
+    Hits refresh the entry's mtime, and eviction removes the least recently
+    used entries once the store exceeds ``max_bytes``.
+    """
+
+    def __init__(self, directory: str = RESULT_CACHE_DIR, max_bytes: int = RESULT_CACHE_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+        self._lock     = threading.Lock()
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def _paths(self, key: str) -> tuple[str, str]:
+        base = os.path.join(self.directory, key)
+        return base + ".out", base + ".json"
+
+    def get(self, key: str) -> tuple[str, CapturedOutput] | None:
+        out_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            output = CapturedOutput()
+            with open(out_path, "rb") as f:
+                while chunk := f.read(1024 * 1024):
+                    output.write(chunk)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if output.hexdigest() != meta.get("sha256"):
+            output.close()
+            self._remove(key)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        os.utime(out_path)
+        with self._lock:
+            self.hits += 1
+        return meta["sha256"], output
+
+    def put(self, key: str, result_hash: str, output: CapturedOutput):
+        out_path, meta_path = self._paths(key)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                src = output.open()
+                while chunk := src.read(1024 * 1024):
+                    f.write(chunk)
+            os.replace(tmp, out_path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"sha256": result_hash, "size": output.size}, f)
+        self._evict()
+
+    def _remove(self, key: str):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        entries, total = [], 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".out"):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.name[:-4]))
+                    total += st.st_size
+        for _, size, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(key)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def summary(self) -> str:
+        with self._lock:
+            return f"cache hits={self.hits} misses={self.misses} evictions={self.evictions}"
+
+
+class CachingExecutor(BaseExecutor):
+    """
+    Memoizes another executor through a ``ResultCache``.
+
+    Concurrent intents with the same key wait for the first run instead of
+    executing the task twice.
+    """
+
+    def __init__(self, inner: BaseExecutor, cache: ResultCache):
+        self.inner     = inner
+        self.cache     = cache
+        self.version   = inner.version
+        self.supports_cancel = inner.supports_cancel
+        self._lock     = threading.Lock()
+        self._inflight: dict[str, threading.Lock] = {}
+
+    @property
+    def name(self) -> str:
+        return self.inner.name
+
+    def execute(
+        self, intent_json_str: str, cancel: threading.Event | None = None,
+    ) -> tuple[str | None, CapturedOutput | str | None]:
+        key = task_cache_key(intent_json_str, self.inner)
+        with self._lock:
+            key_lock = self._inflight.setdefault(key, threading.Lock())
+
+        with key_lock:
+            try:
+                cached = self.cache.get(key)
+                if cached:
+                    print(f"[Cache] Hit {key[:10]}... — reusing {self.name} output ({cached[1].size} bytes)")
+                    return cached
+
+                result_hash, output = run_executor(self.inner, intent_json_str, cancel)
+                if result_hash:
+                    if isinstance(output, str):
+                        output = CapturedOutput.from_text(output)
+                    try:
+                        self.cache.put(key, result_hash, output)
+                    except Exception as e:
+                        print(f"[!] Result cache write failed (continuing): {e}")
+                return result_hash, output
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+
+
+def run_executor(executor: BaseExecutor, intent_json_str: str, cancel: threading.Event | None = None):
+    """Call ``executor.execute``, passing ``cancel`` only to executors that accept it."""
+    if executor.supports_cancel:
+        return executor.execute(intent_json_str, cancel=cancel)
+    return executor.execute(intent_json_str)
+
+
+def make_executor(executor: BaseExecutor) -> BaseExecutor:
+    """Wrap ``executor`` in the result cache unless it opted out or the cache is disabled."""
+    if RESULT_CACHE_MB <= 0 or not executor.cacheable:
+        return executor
+    return CachingExecutor(executor, ResultCache())
 
 
 # Active executor instance — swap this to use a different agent backend
 EXECUTOR: BaseExecutor = OpenClawExecutor()
 
 
+# ══════════════════════════════════════════════════════════════════════
+#  Storage Interface — pluggable result stores
+# ══════════════════════════════════════════════════════════════════════
+
+PINATA_API     = "https://api.pinata.cloud/pinning/pinFileToIPFS"
+PINATA_GATEWAY = "https://gateway.pinata.cloud/ipfs"
+PINATA_OPTIONS = json.dumps({"cidVersion": 0})   # must match ipfs_cid's DAG parameters
+
+IPFS_API_URL     = os.environ.get("IPFS_API_URL", "http://127.0.0.1:5001")
+IPFS_GATEWAY_URL = os.environ.get("IPFS_GATEWAY_URL", "http://127.0.0.1:8080/ipfs")
+LOCAL_STORE_DIR  = os.path.expanduser(os.environ.get("WORKER_STORE_DIR") or "~/.openclaw/ipfs_store")
+
+
+class StorageBackend(ABC):
+    """
+    Where encrypted result manifests are published.
+
+    Backends must address content by the same CIDv0 that ``ipfs_cid`` computes,
+    because the worker submits ``url(cid)`` on-chain before ``put`` runs.
+    """
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        """Human-readable name of the backend, shown in logs."""
+        ...
+
+    @abstractmethod
+    def put(self, data, filename: str) -> str:
+        """
+        Store ``data`` (bytes, or a sized iterable of byte chunks such as
+        ``EncryptedManifest``, streamed without buffering) and return its CID.
+        """
+        ...
+
+    @abstractmethod
+    def url(self, cid: str) -> str:
+        """Public URL employers download ``cid`` from."""
+        ...
+
+
+def _post_file(url: str, data, filename: str, headers: dict | None = None, fields: dict | None = None):
+    headers = dict(headers or {})
+    if isinstance(data, (bytes, bytearray)):
+        resp = _http.post(url, headers=headers, files={"file": (filename, data, "application/octet-stream")}, data=fields)
+    else:
+        body = _MultipartBody("file", filename, data, fields=fields)
+        headers["Content-Type"] = body.content_type
+        resp = _http.post(url, headers=headers, data=body)
+    resp.raise_for_status()
+    return resp.json()
+
+
+class PinataStorage(StorageBackend):
+    """Pinata pinning service (requires PINATA_JWT)."""
+
+    @property
+    def name(self) -> str:
+        return "Pinata"
+
+    def put(self, data, filename: str) -> str:
+        jwt = os.environ.get("PINATA_JWT", "")
+        if not jwt:
+            raise ValueError("PINATA_JWT not configured. Run 'python cli.py start' to set up.")
+        reply = _post_file(
+            PINATA_API, data, filename,
+            headers={"Authorization": f"Bearer {jwt}"}, fields={"pinataOptions": PINATA_OPTIONS},
+        )
+        return reply["IpfsHash"]
+
+    def url(self, cid: str) -> str:
+        return f"{PINATA_GATEWAY}/{cid}"
+
+
+class IpfsApiStorage(StorageBackend):
+    """A local or private IPFS node (Kubo HTTP RPC API), pinned with ``ipfs add`` defaults."""
+
+    def __init__(self, api_url: str = IPFS_API_URL, gateway_url: str = IPFS_GATEWAY_URL):
+        self.api_url     = api_url.rstrip("/")
+        self.gateway_url = gateway_url.rstrip("/")
+
+    @property
+    def name(self) -> str:
+        return "IPFS node"
+
+    def put(self, data, filename: str) -> str:
+        query = "cid-version=0&raw-leaves=false&chunker=size-262144&pin=true"
+        return _post_file(f"{self.api_url}/api/v0/add?{query}", data, filename)["Hash"]
+
+    def url(self, cid: str) -> str:
+        return f"{self.gateway_url}/{cid}"
+
+
+class LocalStorage(StorageBackend):
+    """
+    Content-addressed files under ``LOCAL_STORE_DIR``, served by this
+    worker's own gateway at ``/ipfs/<cid>``. Needs no external service, which
+    makes it suitable for private deployments and local testing.
+    """
+
+    def __init__(self, directory: str = LOCAL_STORE_DIR):
+        self.directory = directory
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    @property
+    def name(self) -> str:
+        return "local store"
+
+    def put(self, data, filename: str) -> str:
+        builder = CIDv0Builder()
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in ((data,) if isinstance(data, (bytes, bytearray)) else data):
+                    f.write(chunk)
+                    builder.update(chunk)
+            cid = builder.cid()
+            os.replace(tmp, os.path.join(self.directory, cid))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        return cid
+
+    def url(self, cid: str) -> str:
+        gateway_url = os.environ.get("GATEWAY_PUBLIC_URL", "http://127.0.0.1:5000")
+        return f"{gateway_url}/ipfs/{cid}"
+
+
+STORAGE_BACKENDS = {"pinata": PinataStorage, "ipfs": IpfsApiStorage, "local": LocalStorage}
+
+# Active storage backend — None selects one from WORKER_STORAGE (default: pinata) at startup
+STORAGE: StorageBackend | None = None
+
+
+def make_storage(name: str | None = None) -> StorageBackend:
+    name = name or os.environ.get("WORKER_STORAGE") or "pinata"
+    if name not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend '{name}' (choose from {', '.join(STORAGE_BACKENDS)})")
+    return STORAGE_BACKENDS[name]()
+
+
 # ── On-chain submission ──────────────────────────────────────────────
 
+_tx_pipeline: TxPipeline | None = None
+_tx_lock = threading.Lock()
+_gateway_prewarm = None   # multiprocessing queue into the key gateway's intent cache
+
+
+def _get_tx_pipeline(private_key: str) -> TxPipeline:
+    """Process-wide pipeline so every submission shares one local nonce counter."""
+    global _tx_pipeline
+    with _tx_lock:
+        if _tx_pipeline is None:
+            _tx_pipeline = TxPipeline(w3, private_key)
+        return _tx_pipeline
+
+
 def submit_to_chain(
     intent_id: bytes,
     result_hash: str,
     data_url: str,
     bounty_wei: int,
     private_key: str,
+    employer: str | None = None,
 ):
-    """Submit result hash + stake to the IntentPool contract."""
-    account = w3.eth.account.from_key(private_key)
-    balance = w3.eth.get_balance(account.address)
+    """
+    Submit result hash + stake to the IntentPool contract (confirmation tracked
+    asynchronously). Once confirmed, the gateway is told the intent's employer.
+    """
+    pipeline = _get_tx_pipeline(private_key)
+    balance  = w3.eth.get_balance(pipeline.address)
 
-    print(f"\n[Chain] Signer: {account.address}")
+    print(f"\n[Chain] Signer: {pipeline.address}")
     print(f"[Chain] Balance: {w3.from_wei(balance, 'ether')} MON | Stake required: {w3.from_wei(bounty_wei, 'ether')} MON")
 
     if balance < bounty_wei:
         print("[Chain] Insufficient balance for stake — skipping intent. Please top up.")
         return
 
-    print("[Chain] Building transaction...")
-    tx = contract.functions.submitResult(
-        intent_id, result_hash, data_url
-    ).build_transaction({
-        "from": account.address,
-        "value": bounty_wei,
-        "nonce": w3.eth.get_transaction_count(account.address),
-        "gas": 300_000,
-        "gasPrice": w3.eth.gas_price,
-    })
-
-    signed = w3.eth.account.sign_transaction(tx, private_key=private_key)
-    print("[Chain] Broadcasting...")
-    tx_hash = w3.eth.send_raw_transaction(signed.raw_transaction)
+    def on_receipt(receipt):
+        if receipt is None:
+            print(f"[Chain] Intent {intent_id.hex()[:8]}... submission dropped before confirmation.")
+        elif receipt["status"] == 1:
+            print(f"[Chain] Intent {intent_id.hex()[:8]}... confirmed. Awaiting employer settlement.")
+            if _gateway_prewarm is not None and employer:
+                _gateway_prewarm.put((bytes(intent_id), employer))
+        else:
+            print(f"[Chain] Intent {intent_id.hex()[:8]}... submission reverted (likely solved by another worker).")
 
+    print("[Chain] Broadcasting...")
+    tx_hash = pipeline.send(
+        contract.functions.submitResult(intent_id, result_hash, data_url),
+        gas=300_000,
+        value=bounty_wei,
+        on_receipt=on_receipt,
+    )
     print(f"[Chain] Submitted | tx: {tx_hash.hex()}")
-    w3.eth.wait_for_transaction_receipt(tx_hash)
-    print("[Chain] Confirmed. Awaiting employer settlement.")
+    return tx_hash
 
 
-# ── Main listener loop ───────────────────────────────────────────────
+def intent_still_open(intent_id: bytes) -> bool:
+    """Cheap pre-flight read: False once the intent is solved, resolved or past its deadline."""
+    try:
+        core = contract.functions.intents(intent_id).call()
+    except Exception as e:
+        print(f"[!] Pre-flight check failed (proceeding): {e}")
+        return True
+    is_solved, is_resolved, deadline = core[5], core[6], core[8]
+    return not (is_solved or is_resolved) and time.time() <= deadline
 
-def listen_for_intents(private_key: str | None = None):
-    if not private_key:
-        raise ValueError("No private key provided. Start via 'python cli.py start'.")
 
-    account = w3.eth.account.from_key(private_key)
-    print(f"[Worker] Node online | executor: {EXECUTOR.name} | address: {account.address}")
-    print(f"[Worker] Listening on contract {CONTRACT_ADDRESS} (polling)...\n")
+# ── Claims ───────────────────────────────────────────────────────────
+
+CLAIM_BOND_BPS = 1000      # mirrors IntentPool.sol — bond = 10% of the bounty, credited to the stake
+CLAIM_GAS      = 150_000
+
+
+def claim_bond(bounty_wei: int) -> int:
+    return bounty_wei * CLAIM_BOND_BPS // 10_000
+
+
+def claim_intent(intent_id: bytes, bounty_wei: int, private_key: str) -> bool:
+    """
+    Lease a claim-mode intent before executing it. Blocks until the claim is
+    mined; returns False if another worker holds the lease or the claim
+    reverted (someone else got there first), so the intent should be skipped.
+    """
+    pipeline = _get_tx_pipeline(private_key)
+    try:
+        claimant, lease_end = contract.functions.intentClaims(intent_id).call()
+    except Exception as e:
+        print(f"[!] Claim pre-flight failed (claiming anyway): {e}")
+    else:
+        if lease_end >= time.time():
+            if claimant == pipeline.address:
+                return True   # still ours, e.g. claimed before a restart
+            print(f"[Claim] Intent {intent_id.hex()[:8]}... leased by {claimant} — skipping")
+            return False
+
+    try:
+        tx_hash = pipeline.send(contract.functions.claimIntent(intent_id), gas=CLAIM_GAS, value=claim_bond(bounty_wei))
+    except Exception as e:
+        print(f"[!] Claim for {intent_id.hex()[:8]}... failed: {e}")
+        return False
+    receipt = pipeline.wait(tx_hash)
+    if receipt is None or receipt["status"] != 1:
+        print(f"[Claim] Intent {intent_id.hex()[:8]}... claim not confirmed (leased by another worker or dropped)")
+        return False
+    print(f"[Claim] Intent {intent_id.hex()[:8]}... leased | tx: {tx_hash.hex()}")
+    return True
+
+
+# ── Race tracking ────────────────────────────────────────────────────
+
+class RaceTracker:
+    """
+    Cancel flags for the intents this node has queued or is executing.
+
+    A flag is set when an ``IntentSolved`` or ``IntentClaimed`` from another
+    worker arrives for that intent, which aborts the run at its next checkpoint
+    (or immediately, for executors that support cancellation).
+    """
+
+    def __init__(self, address: str):
+        self.address = address
+        self._lock   = threading.Lock()
+        self._active: dict[bytes, threading.Event] = {}
+
+    def watch(self, intent_id: bytes) -> threading.Event:
+        with self._lock:
+            return self._active.setdefault(bytes(intent_id), threading.Event())
+
+    def get(self, intent_id: bytes) -> threading.Event | None:
+        with self._lock:
+            return self._active.get(bytes(intent_id))
+
+    def taken(self, event) -> bool:
+        """Record a rival's IntentSolved / IntentClaimed; returns True if it cancelled one of our runs."""
+        args = event["args"]
+        if args["worker"] == self.address:
+            return False
+        cancel = self.get(args["intentId"])
+        if cancel is None or cancel.is_set():
+            return False
+        cancel.set()
+        return True
+
+    def done(self, intent_id: bytes):
+        with self._lock:
+            self._active.pop(bytes(intent_id), None)
+
+
+# ── Off-chain task payloads ──────────────────────────────────────────
+
+PAYLOAD_CACHE_DIR = os.path.expanduser("~/.openclaw/payload_cache")
+PAYLOAD_CACHE_MB  = int(os.environ.get("WORKER_PAYLOAD_CACHE_MB") or 256)
+PAYLOAD_GATEWAY   = os.environ.get("PAYLOAD_GATEWAY_URL", PINATA_GATEWAY)   # resolves ipfs:// payload URIs
+PAYLOAD_MAX_BYTES = 16 * 1024 * 1024
+PAYLOAD_FETCHERS  = 4
+PAYLOAD_TIMEOUT   = (5, 30)   # (connect, read) seconds
+# http(s) payload URIs are fetched only from PAYLOAD_GATEWAY or under one of these URL prefixes (comma-separated)
+PAYLOAD_ALLOWED_URLS = tuple(u.strip() for u in os.environ.get("PAYLOAD_ALLOWED_URLS", "").split(",") if u.strip())
 
-    last_block = w3.eth.block_number
 
-    while True:
+def payload_ref(raw_json: str) -> dict | None:
+    """
+    The payload descriptor of an off-chain intent, or None for an inline one.
+    Off-chain intents publish only
+
+        {"task_type": "...", "payload_ref": {"uri": "ipfs://Qm...", "sha256": "<hex>", "size": 1234}}
+
+    Raises ValueError when the descriptor is present but malformed.
+    """
+    if '"payload_ref"' not in raw_json:
+        return None
+    try:
+        ref = json.loads(raw_json).get("payload_ref")
+    except (ValueError, AttributeError):
+        return None
+    if ref is None:
+        return None
+    try:
+        ref = {"uri": str(ref["uri"]), "sha256": str(ref["sha256"]).lower(), "size": int(ref["size"])}
+        bytes.fromhex(ref["sha256"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"malformed payload_ref: {e}") from None
+    if len(ref["sha256"]) != 64 or ref["size"] < 0:
+        raise ValueError("malformed payload_ref")
+    return ref
+
+
+def _under(url: str, prefix: str) -> bool:
+    """Same scheme and host as ``prefix``, with a path at or below its path."""
+    u, p = urlsplit(url), urlsplit(prefix)
+    base = p.path.rstrip("/")
+    return (
+        u.scheme == p.scheme and u.netloc.lower() == p.netloc.lower()
+        and (u.path == base or u.path.startswith(base + "/"))
+    )
+
+
+def payload_uri_allowed(uri: str, gateway: str = PAYLOAD_GATEWAY) -> bool:
+    """``ipfs://`` URIs, and http(s) URLs under ``gateway`` or one of PAYLOAD_ALLOWED_URLS."""
+    if uri.startswith("ipfs://"):
+        return True
+    if not uri.startswith(("https://", "http://")):
+        return False
+    return any(_under(uri, prefix) for prefix in (gateway, *PAYLOAD_ALLOWED_URLS))
+
+
+class PayloadStore:
+    """
+    Fetches off-chain task payloads, verifies them against their descriptor's
+    sha256 and size, and keeps them on disk keyed by hash (LRU by mtime).
+    ``prefetch`` starts the download when an intent is admitted, so it overlaps
+    the queue wait; ``get`` then returns the verified payload text.
+    """
+
+    def __init__(
+        self,
+        directory: str = PAYLOAD_CACHE_DIR,
+        max_bytes: int = PAYLOAD_CACHE_MB * 1024 * 1024,
+        gateway: str = PAYLOAD_GATEWAY,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.gateway   = gateway.rstrip("/")
+        self._lock     = threading.Lock()
+        self._fetches: dict[str, Future] = {}   # sha256 → download in progress or done
+        self._pool     = ThreadPoolExecutor(max_workers=PAYLOAD_FETCHERS, thread_name_prefix="payload-fetch")
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def url(self, uri: str) -> str:
+        if uri.startswith("ipfs://"):
+            return f"{self.gateway}/{uri.removeprefix('ipfs://')}"
+        if payload_uri_allowed(uri, self.gateway):
+            return uri
+        raise ValueError(f"payload URI not on an allowed gateway (see PAYLOAD_ALLOWED_URLS): {uri}")
+
+    def prefetch(self, ref: dict) -> Future:
+        with self._lock:
+            future = self._fetches.get(ref["sha256"])
+            if future is None or (future.done() and future.exception() is not None):
+                future = self._pool.submit(self._download, ref)
+                self._fetches[ref["sha256"]] = future
+            if len(self._fetches) > 1_000:
+                self._fetches = {k: f for k, f in self._fetches.items() if not f.done()}
+            return future
+
+    def get(self, ref: dict) -> str:
+        """Verified payload text; raises if it cannot be fetched or does not match."""
+        path = self.prefetch(ref).result()
+        with open(path, "rb") as f:
+            data = f.read()
+        if hashlib.sha256(data).hexdigest() != ref["sha256"]:
+            os.remove(path)
+            raise ValueError("cached payload is corrupt")
+        os.utime(path)
+        return data.decode("utf-8")
+
+    def _download(self, ref: dict) -> str:
+        path = os.path.join(self.directory, ref["sha256"] + ".json")
+        if os.path.exists(path):
+            return path
+
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        digest, size = hashlib.sha256(), 0
         try:
-            head = w3.eth.block_number
-            if head > last_block:
-                batch_end = min(last_block + 10, head)
-                logs = contract.events.IntentPublished.get_logs(
-                    from_block=last_block + 1, to_block=batch_end
+            with os.fdopen(fd, "wb") as f, _http.get(
+                self.url(ref["uri"]), stream=True, timeout=PAYLOAD_TIMEOUT, allow_redirects=False,
+            ) as resp:
+                # A redirect could lead off the allowed gateways
+                if resp.is_redirect:
+                    raise ValueError(f"payload gateway redirected to {resp.headers.get('Location')}")
+                resp.raise_for_status()
+                for chunk in resp.iter_content(64 * 1024):
+                    size += len(chunk)
+                    if size > ref["size"]:
+                        raise ValueError(f"payload exceeds its declared {ref['size']} bytes")
+                    digest.update(chunk)
+                    f.write(chunk)
+            if size != ref["size"] or digest.hexdigest() != ref["sha256"]:
+                raise ValueError("payload does not match its on-chain hash")
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        print(f"[Task]  Fetched off-chain payload {ref['sha256'][:10]}... ({size} bytes)")
+        self._evict()
+        return path
+
+    def _evict(self):
+        entries, total = [], 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".json"):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+                    total += st.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+PAYLOADS: PayloadStore | None = None
+_payloads_lock = threading.Lock()
+
+
+def payload_store() -> PayloadStore:
+    global PAYLOADS
+    with _payloads_lock:
+        if PAYLOADS is None:
+            PAYLOADS = PayloadStore()
+        return PAYLOADS
+
+
+# ── Admission policy ─────────────────────────────────────────────────
+
+ADMISSION_REFRESH = 60         # seconds between reputation / balance refreshes
+SUBMIT_GAS        = 300_000
+
+
+class AdmissionPolicy:
+    """
+    Decides, before any work is queued, whether an intent is worth taking.
+
+    Configured from the ``admission`` section of ``~/.openclaw/config.json``:
+
+        {"task_types": ["SMART_CONTRACT_AUDIT"], "min_bounty_eth": 0.001,
+         "max_payload_bytes": 65536}
+
+    Every key is optional. The node's own reputation score and balance are
+    refreshed in the background, so ``admit`` never touches the RPC. Stakes of
+    admitted intents are reserved against the balance until they are released,
+    and released stakes stay reserved until the next balance refresh, which
+    is the first one that can reflect a stake sent on-chain.
+    """
+
+    def __init__(self, address: str, config: dict | None = None):
+        config = config or {}
+        self.address           = address
+        self.task_types        = frozenset(config.get("task_types") or ()) or None
+        self.min_bounty        = Web3.to_wei(config.get("min_bounty_eth", 0), "ether")
+        self.max_payload_bytes = int(config.get("max_payload_bytes") or 0)
+
+        self.score: int | None   = None   # None until fetched; -1 if not registered
+        self.balance: int | None = None
+        self.gas_reserve = 0
+        self.rejected    = Counter()
+        self._reserved   = 0   # stakes of intents still in the pipeline
+        self._released   = 0   # stakes released since the cached balance was fetched
+        self._lock       = threading.Lock()
+        self._identity   = None
+
+    def start(self):
+        self.refresh()
+        threading.Thread(target=self._refresh_loop, name="admission-refresh", daemon=True).start()
+
+    def refresh(self):
+        with self._lock:
+            settled = self._released   # the balance fetched below already reflects these
+        try:
+            if self._identity is None:
+                self._identity = w3.eth.contract(
+                    address=contract.functions.identityContract().call(), abi=IDENTITY_ABI
                 )
-                last_block = batch_end
-
-                for event in logs:
-                    args      = event["args"]
-                    iid       = args["intentId"]
-                    employer  = args["employer"]
-                    bounty    = args["bounty"]
-                    min_score = args["minScore"]
-                    raw_json  = args["rawJsonSchema"]
-
-                    print("\n" + "=" * 50)
-                    print("[MATCH] New intent detected!")
-                    print(f"  Intent ID : {iid.hex()}")
-                    print(f"  Employer  : {employer}")
-                    print(f"  Bounty    : {w3.from_wei(bounty, 'ether')} MON")
-                    print(f"  Min Score : {min_score}")
-                    print("=" * 50)
+            try:
+                score = self._identity.functions.getScore(self.address).call()
+            except ContractLogicError:
+                score = -1   # "Agent not registered"
+            balance     = w3.eth.get_balance(self.address, "pending")
+            gas_reserve = SUBMIT_GAS * w3.eth.gas_price
+        except Exception as e:
+            print(f"[!] Admission refresh failed (keeping previous values): {e}")
+            return
+        with self._lock:
+            self.score, self.balance, self.gas_reserve = score, balance, gas_reserve
+            self._released -= settled
+
+    def _refresh_loop(self):
+        while True:
+            time.sleep(ADMISSION_REFRESH)
+            self.refresh()
+
+    def admit(self, event) -> str | None:
+        """Reserve the stake and return None if the intent is admitted, else the rejection reason."""
+        args   = event["args"]
+        bounty = args["bounty"]
+        reason = self._check(args["rawJsonSchema"], bounty, args["minScore"])
+        with self._lock:
+            if reason is None and self.balance is not None:
+                if self.balance - self._reserved - self._released < bounty + self.gas_reserve:
+                    reason = "balance"
+            if reason:
+                self.rejected[reason] += 1
+            else:
+                self._reserved += bounty
+        return reason
+
+    def _check(self, raw_json: str, bounty: int, min_score: int) -> str | None:
+        if bounty < self.min_bounty:
+            return "bounty"
+        if self.score is not None and self.score < min_score:
+            return "unregistered" if self.score < 0 else "score"
+        try:
+            ref = payload_ref(raw_json)
+        except ValueError:
+            return "malformed"
+        if ref and not payload_uri_allowed(ref["uri"]):
+            return "payload_uri"
+        size = ref["size"] if ref else len(raw_json)
+        if size > PAYLOAD_MAX_BYTES or (self.max_payload_bytes and size > self.max_payload_bytes):
+            return "payload_size"
+        if self.task_types is not None:
+            try:
+                task_type = json.loads(raw_json).get("task_type")
+            except (ValueError, AttributeError):
+                return "malformed"
+            if task_type not in self.task_types:
+                return "task_type"
+        return None
+
+    def release(self, bounty: int):
+        """The intent left the pipeline; its stake counts until the balance is refreshed."""
+        with self._lock:
+            bounty = min(bounty, self._reserved)
+            self._reserved -= bounty
+            self._released += bounty
+
+    def summary(self) -> str:
+        with self._lock:
+            if not self.rejected:
+                return "rejected=0"
+            return "rejected " + " ".join(f"{k}={n}" for k, n in sorted(self.rejected.items()))
+
+
+# ── Execution pool ───────────────────────────────────────────────────
+
+DEFAULT_CONCURRENCY = int(os.environ.get("WORKER_CONCURRENCY", "4"))
+METRICS_INTERVAL    = 30
+POLL_INTERVAL       = 1
+
+STAGES = ("queued", "claim", "fetch", "execute", "encrypt", "upload", "submit")
+
+
+class StageMetrics:
+    """Thread-safe queue-depth gauges per pipeline stage plus outcome counters."""
+
+    def __init__(self):
+        self._lock     = threading.Lock()
+        self.depth     = {stage: 0 for stage in STAGES}
+        self.completed = 0
+        self.failed    = 0
+        self.skipped   = 0
+        self.lost      = 0
+
+    def enter(self, stage: str):
+        with self._lock:
+            self.depth[stage] += 1
+
+    def leave(self, stage: str):
+        with self._lock:
+            self.depth[stage] -= 1
+
+    @contextmanager
+    def stage(self, stage: str):
+        self.enter(stage)
+        try:
+            yield
+        finally:
+            self.leave(stage)
 
-                    try:
-                        result_hash, full_log = EXECUTOR.execute(raw_json)
-                        if not result_hash:
-                            continue
+    def count(self, outcome: str):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
 
-                        aes_key = derive_aes_key(private_key, iid)
-                        print("[AES]   Encrypting result with deterministic key...")
-                        encrypted = aes_encrypt(aes_key, full_log.encode("utf-8"))
+    def summary(self) -> str:
+        with self._lock:
+            depths = " ".join(f"{stage}={n}" for stage, n in self.depth.items())
+            return f"{depths} | done={self.completed} failed={self.failed} skipped={self.skipped} lost={self.lost}"
 
-                        gateway_url = os.environ.get("GATEWAY_PUBLIC_URL", "http://127.0.0.1:5000")
-                        manifest = json.dumps({
-                            "version": "1.0",
-                            "key_gateway": gateway_url + "/key",
-                            "encrypted_data": encrypted.hex(),
-                        }).encode("utf-8")
 
-                        print("[IPFS]  Uploading encrypted manifest...")
-                        ipfs_url = upload_to_ipfs(manifest, filename=f"{iid.hex()}.json")
-                        print(f"[IPFS]  Pinned: {ipfs_url}")
+class ExecutionPool:
+    """
+    Bounded thread pool that drains intents off a queue so polling never
+    waits on execution. ``submit`` blocks once the queue is full, which
+    pauses intake (backpressure) instead of dropping intents.
 
-                        submit_to_chain(iid, result_hash, ipfs_url, bounty, private_key)
+    Threads are sufficient here: the heavy lifting happens in the executor's
+    own subprocess, and the remaining stages are network-bound.
+    """
 
-                    except Exception as e:
-                        print(f"[!] Intent {iid.hex()[:8]}... processing failed (skipped): {e}")
+    def __init__(self, handler, concurrency: int = DEFAULT_CONCURRENCY, queue_size: int | None = None):
+        self.metrics  = StageMetrics()
+        self._handler = handler
+        self._lock    = threading.Lock()
+        self._inflight: Counter[int] = Counter()
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size or concurrency * 2)
+        self._threads = [
+            threading.Thread(target=self._run, name=f"intent-worker-{i}", daemon=True)
+            for i in range(max(1, concurrency))
+        ]
+        for t in self._threads:
+            t.start()
+
+    @property
+    def concurrency(self) -> int:
+        return len(self._threads)
+
+    def low_watermark(self) -> int | None:
+        """Lowest block that still has a queued or running job, if any."""
+        with self._lock:
+            return min(self._inflight) if self._inflight else None
+
+    def submit(self, job):
+        """Enqueue a job, blocking while the pool is saturated."""
+        with self._lock:
+            self._inflight[job["blockNumber"]] += 1
+        self.metrics.enter("queued")
+        try:
+            self._queue.put(job, block=False)
+        except queue.Full:
+            print(f"[Pool] Queue full ({self._queue.maxsize}) — pausing intake until a slot frees up")
+            self._queue.put(job)
+
+    def start(self):
+        """Start the retry thread (once)."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="upload-retry", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            self.metrics.leave("queued")
+            try:
+                self._handler(job, self.metrics)
+            except Exception as e:
+                self.metrics.count("failed")
+                print(f"[!] Pool worker error: {e}")
+            finally:
+                with self._lock:
+                    self._inflight[job["blockNumber"]] -= 1
+                    if self._inflight[job["blockNumber"]] <= 0:
+                        del self._inflight[job["blockNumber"]]
+                self._queue.task_done()
+
+
+# ── Intent processing ────────────────────────────────────────────────
+
+def _lost_race(intent_id: bytes, cancel: threading.Event) -> bool:
+    if cancel.is_set() or not intent_still_open(intent_id):
+        cancel.set()
+        print(f"[Race]  Intent {intent_id.hex()[:8]}... already solved or closed — abandoning")
+        return True
+    return False
+
+
+def process_intent(
+    event,
+    private_key: str,
+    metrics: StageMetrics,
+    executor: BaseExecutor = EXECUTOR,
+    cancel: threading.Event | None = None,
+    storage: StorageBackend | None = None,
+):
+    """
+    Execute → encrypt → upload → submit for a single IntentPublished event.
+
+    ``cancel`` is set when another worker wins the intent; the run stops at
+    the next checkpoint, and the chain is re-checked before claiming or
+    executing, before encrypting and before submitting. The manifest's CID
+    is computed locally, so submitResult goes out first and the upload runs
+    in the background.
+    """
+    args      = event["args"]
+    iid       = args["intentId"]
+    employer  = args["employer"]
+    bounty    = args["bounty"]
+    min_score = args["minScore"]
+    raw_json  = args["rawJsonSchema"]
+
+    print("\n" + "=" * 50)
+    print("[MATCH] New intent detected!")
+    print(f"  Intent ID : {iid.hex()}")
+    print(f"  Employer  : {employer}")
+    print(f"  Bounty    : {w3.from_wei(bounty, 'ether')} MON")
+    print(f"  Min Score : {min_score}")
+    print("=" * 50)
+
+    cancel  = cancel or threading.Event()
+    storage = storage or STORAGE or make_storage()
+    try:
+        # The intent may have been solved or closed while it sat in the queue
+        if _lost_race(iid, cancel):
+            metrics.count("lost")
+            return
+
+        # Claim-mode intents are leased first, so competing workers skip them
+        stake = bounty
+        if args["claimLease"]:
+            with metrics.stage("claim"):
+                claimed = claim_intent(iid, bounty, private_key)
+            if not claimed:
+                metrics.count("lost")
+                return
+            stake -= claim_bond(bounty)
+
+        task_json = raw_json
+        ref = payload_ref(raw_json)
+        if ref is not None:
+            with metrics.stage("fetch"):
+                task_json = payload_store().get(ref)
+
+        with metrics.stage("execute"):
+            result_hash, output = run_executor(executor, task_json, cancel)
+        if not result_hash:
+            metrics.count("lost" if cancel.is_set() else "skipped")
+            return
+        if isinstance(output, str):
+            output = CapturedOutput.from_text(output)
+
+        try:
+            if _lost_race(iid, cancel):
+                metrics.count("lost")
+                return
+
+            with metrics.stage("encrypt"):
+                aes_key = derive_aes_key(private_key, iid)
+
+                plain_size = output.size
+                payload, codec = compress_output(output)
+                if payload is not output:
+                    output.close()
+                    output = payload
+                    print(f"[Codec] {codec}: {plain_size} → {output.size} bytes")
+
+                gateway_url = os.environ.get("GATEWAY_PUBLIC_URL", "http://127.0.0.1:5000")
+                manifest = EncryptedManifest(
+                    aes_key, output.open(), output.size, gateway_url + "/key",
+                    key_batch_url=gateway_url + "/keys", codec=codec,
+                )
+                # The manifest encrypts deterministically, so its CID is known before upload
+                cid = cid_of(manifest)
+                print(f"[IPFS]  Manifest CID (local): {cid} ({len(manifest)} bytes)")
+
+            if _lost_race(iid, cancel):
+                metrics.count("lost")
+                return
+
+            with metrics.stage("submit"):
+                tx_hash = submit_to_chain(iid, result_hash, storage.url(cid), stake, private_key, employer)
+            if tx_hash is None:
+                metrics.count("skipped")
+                return
+
+            # Upload overlaps confirmation; the job owns (and closes) the output from here
+            _upload_pool.submit(_upload_in_background, upload_queue(storage), iid, manifest, cid, output, metrics)
+            output = None
+            metrics.count("completed")
+        finally:
+            if output is not None:
+                output.close()
+
+    except Exception as e:
+        metrics.count("failed")
+        print(f"[!] Intent {iid.hex()[:8]}... processing failed (skipped): {e}")
+
+
+# ── Main listener loop ───────────────────────────────────────────────
 
+def _intake(event, policy: AdmissionPolicy, pool: ExecutionPool, races: RaceTracker):
+    """Queue a new intent if the admission policy accepts it; cancel ours on a rival's IntentSolved."""
+    iid = event["args"]["intentId"]
+    if event["event"] in ("IntentSolved", "IntentClaimed"):
+        if races.taken(event):
+            verb = "solved" if event["event"] == "IntentSolved" else "claimed"
+            print(f"[Race]  Intent {iid.hex()[:8]}... {verb} by {event['args']['worker']} — cancelling local run")
+        return
+
+    reason = policy.admit(event)
+    if reason:
+        print(f"[Admit] Intent {iid.hex()[:8]}... rejected ({reason})")
+        return
+    ref = payload_ref(event["args"]["rawJsonSchema"])
+    if ref:
+        payload_store().prefetch(ref)   # download while the intent waits in the queue
+    races.watch(iid)
+    pool.submit(event)
+
+
+def _commit_cursor(cursor: BlockCursor, pool: ExecutionPool, scanned: int):
+    """Persist the highest block whose intents have all left the pool."""
+    pending = pool.low_watermark()
+    target  = scanned if pending is None else min(scanned, pending - 1)
+    if target != cursor.block:
+        cursor.save(target)
+
+
+def listen_for_intents(
+    private_key: str | None = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    admission: dict | None = None,
+    gateway_prewarm=None,
+):
+    global _gateway_prewarm
+    if not private_key:
+        raise ValueError("No private key provided. Start via 'python cli.py start'.")
+    _gateway_prewarm = gateway_prewarm
+    payload_store()
+
+    account  = w3.eth.account.from_key(private_key)
+    executor = make_executor(EXECUTOR)
+    storage  = STORAGE or make_storage()
+    policy   = AdmissionPolicy(account.address, admission)
+    races    = RaceTracker(account.address)
+    policy.start()
+    if queued := upload_queue(storage).resume():
+        print(f"[IPFS]  Resuming {queued} queued manifest upload(s) from {UPLOAD_QUEUE_DIR}")
+
+    def handle(ev, metrics):
+        iid = ev["args"]["intentId"]
+        try:
+            process_intent(ev, private_key, metrics, executor, races.get(iid), storage)
+        finally:
+            policy.release(ev["args"]["bounty"])
+            races.done(iid)
+
+    pool    = ExecutionPool(handle, concurrency=concurrency)
+    cursor  = BlockCursor(CURSOR_PATH, CONTRACT_ADDRESS)
+    # With a task_types allow-list the node filters IntentPublished by its indexed
+    # taskType topic, so unrelated intents never leave the RPC node
+    published = [event_topic(contract.events.IntentPublished), None, None]
+    if policy.task_types is not None:
+        published.append([task_type_topic(t) for t in sorted(policy.task_types)])
+    source  = make_event_source(
+        w3,
+        [
+            log_filter(CONTRACT_ADDRESS, *published),
+            log_filter(
+                CONTRACT_ADDRESS,
+                [event_topic(contract.events.IntentSolved), event_topic(contract.events.IntentClaimed)],
+            ),
+        ],
+        ws_url=os.environ.get("WS_RPC_URL", ""),
+        poll_interval=POLL_INTERVAL,
+    )
+    decode  = event_decoder(
+        contract.events.IntentPublished, contract.events.IntentSolved, contract.events.IntentClaimed,
+    )
+    print(f"[Worker] Node online | executor: {EXECUTOR.name} | storage: {storage.name} | address: {account.address}")
+    print(f"[Worker] Reputation score: {policy.score if policy.score != -1 else 'not registered'} | "
+          f"task types: {', '.join(sorted(policy.task_types)) if policy.task_types else 'any'}")
+
+    head       = w3.eth.block_number
+    last_block = resume_block(cursor, head)
+    if last_block < head:
+        print(f"[Worker] Backfilling blocks {last_block + 1} → {head} ({head - last_block} blocks)...")
+        try:
+            for logs, range_end in backfill_logs(source.fetch, last_block + 1, head):
+                for log in logs:
+                    _intake(decode(log), policy, pool, races)
+                last_block = range_end
+                _commit_cursor(cursor, pool, last_block)
+            print("[Worker] Backfill complete.")
         except Exception as e:
-            print(f"[!] RPC poll error (auto-retrying): {e}")
+            print(f"[!] Backfill interrupted, resuming via live tailing: {e}")
+
+    mode = "websocket" if os.environ.get("WS_RPC_URL") else "polling"
+    print(f"[Worker] Listening on contract {CONTRACT_ADDRESS} ({mode}, concurrency={pool.concurrency})...\n")
 
-        time.sleep(1)
+    last_metrics = time.monotonic()
+    last_summary = ""
+
+    for logs, last_block in source.batches(last_block):
+        try:
+            for log in logs:
+                _intake(decode(log), policy, pool, races)
+            _commit_cursor(cursor, pool, last_block)
+        except Exception as e:
+            print(f"[!] Intent intake error: {e}")
+
+        if time.monotonic() - last_metrics >= METRICS_INTERVAL:
+            summary = f"{pool.metrics.summary()} | {policy.summary()} | lag={source.lag}"
+            if isinstance(executor, CachingExecutor):
+                summary += f" | {executor.cache.summary()}"
+            if summary != last_summary:
+                print(f"[Pool]  {summary}")
+                last_summary = summary
+            last_metrics = time.monotonic()
 
 
 if __name__ == "__main__":
@@ -4,10 +4,16 @@ verified employers via the HTTP 402 challenge-response protocol.
 """
 
 import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
 
 import requests as http_requests
 from eth_account.messages import encode_defunct
-from flask import Flask, jsonify, request
+from flask import Flask, abort, jsonify, request, send_file
 from flask_cors import CORS
 from web3 import Web3
 
@@ -17,7 +23,7 @@ CORS(app, expose_headers=["WWW-Authenticate"])
 # ── Configuration ────────────────────────────────────────────────────
 
 RPC_URL          = "https://testnet-rpc.monad.xyz"
-CONTRACT_ADDRESS = "0x1a8d74e1ADf1Be715e20d39ccF7637b8486b5899"
+CONTRACT_ADDRESS = Web3.to_checksum_address(os.environ.get("INTENTPOOL_ADDRESS") or "0x1a8d74e1ADf1Be715e20d39ccF7637b8486b5899")
 
 CONTRACT_ABI = [
     {"inputs": [{"internalType": "bytes32", "name": "", "type": "bytes32"}],
@@ -36,13 +42,32 @@ CONTRACT_ABI = [
      "stateMutability": "view", "type": "function"}
 ]
 
+GATEWAY_RPC_TIMEOUT = float(os.environ.get("GATEWAY_RPC_TIMEOUT") or 5)   # seconds per chain read in a key request
+
 _session = http_requests.Session()
 _session.trust_env = False
-w3       = Web3(Web3.HTTPProvider(RPC_URL, session=_session))
+w3       = Web3(Web3.HTTPProvider(RPC_URL, session=_session, request_kwargs={"timeout": GATEWAY_RPC_TIMEOUT}))
 contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
 
 _WORKER_PRIVATE_KEY: str = ""
 
+NEGATIVE_TTL = 5          # seconds a "not solved yet" answer is trusted
+MAX_CACHED   = 100_000    # solved intents remembered (oldest evicted first)
+MAX_BATCH_KEYS = 100      # intent ids accepted per POST /keys
+
+# Content-addressed manifests written by the worker's "local" storage backend
+LOCAL_STORE_DIR = os.path.expanduser(os.environ.get("WORKER_STORE_DIR") or "~/.openclaw/ipfs_store")
+_CID_V0 = re.compile(r"Qm[1-9A-HJ-NP-Za-km-z]{44}")
+
+# Production serving (gunicorn, gthread workers)
+GATEWAY_WORKERS        = 2
+GATEWAY_THREADS        = 8
+GATEWAY_WORKER_TIMEOUT = 30   # seconds a worker may go silent before gunicorn restarts it (liveness, not per request)
+GATEWAY_KEEPALIVE      = 5    # seconds an idle keep-alive connection is held open
+GRACEFUL_TIMEOUT       = 10   # seconds in-flight requests get to finish on shutdown
+
+_INTENT_ID_HEX = re.compile(r"[0-9a-fA-F]{64}")
+
 
 # ── Crypto ───────────────────────────────────────────────────────────
 
@@ -51,6 +76,114 @@ def derive_aes_key(private_key_hex: str, intent_id: bytes) -> bytes:
     return hashlib.sha256(bytes.fromhex(private_key_hex) + intent_id).digest()
 
 
+def keys_challenge(intent_ids: list[bytes]) -> str:
+    """Batch x.402 challenge covering exactly this set of intents (order-independent)."""
+    return "Unlock_Keys_" + hashlib.sha256(b"".join(sorted(set(intent_ids)))).hexdigest()
+
+
+# ── On-chain state cache ─────────────────────────────────────────────
+
+class SolvedIntentCache:
+    """
+    intent id → employer for solved intents.
+
+    A solved intent's employer never changes, so positive entries are kept
+    (up to ``MAX_CACHED``). "Not solved yet" answers expire after
+    ``NEGATIVE_TTL``, so a key request that races the worker's own
+    submission is re-checked shortly after.
+    """
+
+    def __init__(self, negative_ttl: float = NEGATIVE_TTL, max_entries: int = MAX_CACHED):
+        self.negative_ttl = negative_ttl
+        self.max_entries  = max_entries
+        self._lock     = threading.Lock()
+        self._solved: OrderedDict[bytes, str] = OrderedDict()
+        self._unsolved: dict[bytes, float] = {}
+
+    def put_solved(self, intent_id: bytes, employer: str):
+        with self._lock:
+            self._solved[intent_id] = employer
+            self._unsolved.pop(intent_id, None)
+            if len(self._solved) > self.max_entries:
+                self._solved.popitem(last=False)
+
+    def _cached(self, intent_id: bytes) -> tuple[bool, str | None]:
+        """(hit, employer) from the cache alone."""
+        with self._lock:
+            employer = self._solved.get(intent_id)
+            if employer is not None:
+                return True, employer
+            checked_at = self._unsolved.get(intent_id)
+            return checked_at is not None and time.monotonic() - checked_at < self.negative_ttl, None
+
+    def _record(self, intent_id: bytes, on_chain) -> str | None:
+        employer, is_solved = on_chain[0], on_chain[5]
+        if is_solved:
+            self.put_solved(intent_id, employer)
+            return employer
+        with self._lock:
+            self._unsolved[intent_id] = time.monotonic()
+            if len(self._unsolved) > self.max_entries:
+                self._unsolved.clear()
+        return None
+
+    def employer_of(self, intent_id: bytes) -> str | None:
+        """Employer of ``intent_id`` if it is solved, else None. Reads the chain only on a miss."""
+        hit, employer = self._cached(intent_id)
+        if hit:
+            return employer
+        return self._record(intent_id, contract.functions.intents(intent_id).call())
+
+    def employers_of(self, intent_ids: list[bytes]) -> dict[bytes, str | None]:
+        """``employer_of`` for many intents; all misses are read in one JSON-RPC batch."""
+        result, misses = {}, []
+        for iid in intent_ids:
+            hit, employer = self._cached(iid)
+            if hit:
+                result[iid] = employer
+            else:
+                misses.append(iid)
+        if not misses:
+            return result
+
+        try:
+            with w3.batch_requests() as batch:
+                for iid in misses:
+                    batch.add(contract.functions.intents(iid))
+                on_chain = batch.execute()
+        except http_requests.Timeout:
+            raise   # the node is slow, not batch-averse; retrying one by one would only wait longer
+        except Exception:
+            on_chain = [contract.functions.intents(iid).call() for iid in misses]
+        for iid, row in zip(misses, on_chain):
+            result[iid] = self._record(iid, row)
+        return result
+
+
+_solved_intents = SolvedIntentCache()
+
+
+@lru_cache(maxsize=4096)
+def recover_signer(message: str, signature: str) -> str:
+    """EIP-191 signer recovery, memoized: a retried key request costs no ECDSA work."""
+    return w3.eth.account.recover_message(encode_defunct(text=message), signature=signature)
+
+
+def _start_prewarm(prewarm):
+    threading.Thread(target=_drain_prewarm, args=(prewarm,), name="gateway-prewarm", daemon=True).start()
+
+
+def _drain_prewarm(prewarm):
+    """Feed (intent_id, employer) pairs confirmed by the listener into the cache."""
+    while True:
+        try:
+            intent_id, employer = prewarm.get()
+            _solved_intents.put_solved(bytes(intent_id), employer)
+        except Exception as e:
+            print(f"[x.402] Pre-warm error: {e}")
+            time.sleep(1)
+
+
 # ── x.402 Endpoint ───────────────────────────────────────────────────
 
 @app.route("/key/<intent_id_hex>", methods=["GET"])
@@ -66,6 +199,8 @@ def deliver_key(intent_id_hex: str):
       ← 200 {"key": "<aes_key_hex>"}
     """
     print(f"\n[x.402] Key request for intent {intent_id_hex[:8]}...")
+    if not _INTENT_ID_HEX.fullmatch(intent_id_hex):
+        return jsonify({"error": "intent id must be 64 hex characters"}), 400
 
     auth = request.headers.get("Authorization")
 
@@ -80,15 +215,11 @@ def deliver_key(intent_id_hex: str):
         signature = auth.split(" ", 1)[1]
         intent_id = bytes.fromhex(intent_id_hex)
 
-        on_chain    = contract.functions.intents(intent_id).call()
-        employer    = on_chain[0]
-        is_solved   = on_chain[5]
-
-        if not is_solved:
+        employer = _solved_intents.employer_of(intent_id)
+        if employer is None:
             return jsonify({"error": "Intent not solved yet"}), 400
 
-        msg       = encode_defunct(text=f"Unlock_Key_{intent_id_hex}")
-        recovered = w3.eth.account.recover_message(msg, signature=signature)
+        recovered = recover_signer(f"Unlock_Key_{intent_id_hex}", signature)
 
         if recovered.lower() != employer.lower():
             print(f"[x.402] Signature mismatch: {recovered} != {employer}")
@@ -101,14 +232,172 @@ def deliver_key(intent_id_hex: str):
         print(f"[x.402] Verified — delivering key to {employer[:10]}...")
         return jsonify({"key": aes_key.hex()}), 200
 
+    except http_requests.Timeout:
+        print("[x.402] Chain lookup timed out")
+        return jsonify({"error": "Chain lookup timed out"}), 504
+    except Exception as e:
+        print(f"[x.402] Error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/keys", methods=["POST"])
+def deliver_keys():
+    """
+    Batch x.402 key delivery — one handshake for many intents.
+
+    Body: {"intent_ids": ["<hex>", ...]}  (at most MAX_BATCH_KEYS)
+
+    1st request (no credentials):
+      ← 402 + WWW-Authenticate: x402 challenge="Unlock_Keys_<sha256(sorted ids)>"
+
+    2nd request (same body, employer signature over the challenge):
+      Authorization: x402 <signature_hex>
+      ← 200 {"keys": {"<id>": "<aes_key_hex>"}, "errors": {"<id>": "<reason>"}}
+    """
+    body    = request.get_json(silent=True) or {}
+    ids_hex = body.get("intent_ids")
+    if not isinstance(ids_hex, list) or not ids_hex or len(ids_hex) > MAX_BATCH_KEYS:
+        return jsonify({"error": f"intent_ids must be a list of 1..{MAX_BATCH_KEYS} ids"}), 400
+    if not all(isinstance(h, str) and _INTENT_ID_HEX.fullmatch(h) for h in ids_hex):
+        return jsonify({"error": "intent_ids must be 64 hex characters each"}), 400
+    intent_ids = [bytes.fromhex(h) for h in ids_hex]
+
+    print(f"\n[x.402] Batch key request for {len(intent_ids)} intents")
+    challenge = keys_challenge(intent_ids)
+
+    auth = request.headers.get("Authorization")
+    if not auth or not auth.startswith("x402 "):
+        resp = jsonify({"error": "Payment Required"})
+        resp.status_code = 402
+        resp.headers["WWW-Authenticate"] = f'x402 challenge="{challenge}"'
+        return resp
+
+    if not _WORKER_PRIVATE_KEY:
+        return jsonify({"error": "Gateway not initialized"}), 500
+
+    try:
+        recovered = recover_signer(challenge, auth.split(" ", 1)[1]).lower()
+        employers = _solved_intents.employers_of(intent_ids)
+    except http_requests.Timeout:
+        print("[x.402] Chain lookup timed out")
+        return jsonify({"error": "Chain lookup timed out"}), 504
     except Exception as e:
         print(f"[x.402] Error: {e}")
         return jsonify({"error": str(e)}), 500
 
+    keys, errors = {}, {}
+    for iid, iid_hex in zip(intent_ids, ids_hex):
+        employer = employers.get(iid)
+        if employer is None:
+            errors[iid_hex] = "Intent not solved yet"
+        elif employer.lower() != recovered:
+            errors[iid_hex] = "Unauthorized: signature mismatch"
+        else:
+            keys[iid_hex] = derive_aes_key(_WORKER_PRIVATE_KEY, iid).hex()
+
+    print(f"[x.402] Batch verified — delivering {len(keys)} keys ({len(errors)} refused)")
+    return jsonify({"keys": keys, "errors": errors}), 200
+
+
+# ── Local content store ──────────────────────────────────────────────
 
-def start_gateway(port: int = 5000, private_key: str = ""):
+@app.route("/ipfs/<cid>", methods=["GET"])
+def serve_manifest(cid: str):
+    """Serve a manifest from the local content-addressed store (``--storage local``)."""
+    if not _CID_V0.fullmatch(cid):
+        abort(404)
+    path = os.path.join(LOCAL_STORE_DIR, cid)
+    if not os.path.isfile(path):
+        abort(404)
+    resp = send_file(path, mimetype="application/octet-stream", conditional=True)
+    resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return resp
+
+
+def _serve_gunicorn(port: int, prewarm, workers: int, threads: int, worker_timeout: int, keepalive: int):
+    """
+    Run the gateway under gunicorn with threaded workers. SIGTERM (the CLI's
+    shutdown path) drains in-flight requests for up to ``GRACEFUL_TIMEOUT``.
+
+    ``worker_timeout`` is gunicorn's ``timeout``: a liveness watchdog that
+    restarts a worker process whose main thread stops checking in. With
+    gthread workers the main thread keeps checking in while handler threads
+    run, so this is not a per-request limit; chain reads inside a request
+    are bounded by ``rpc_timeout`` instead (see ``start_gateway``).
+
+    Each worker process has its own intent cache. A pre-warm entry reaches
+    one of them; the others pay a single RPC read for that intent.
+    """
+    from gunicorn.app.base import BaseApplication
+
+    def post_fork(server, worker):
+        if prewarm is not None:
+            _start_prewarm(prewarm)
+
+    options = {
+        "bind": f"0.0.0.0:{port}",
+        "workers": workers,
+        "threads": threads,
+        "worker_class": "gthread",
+        "timeout": worker_timeout,
+        "keepalive": keepalive,
+        "graceful_timeout": GRACEFUL_TIMEOUT,
+        "post_fork": post_fork,
+    }
+
+    class GatewayApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    # Own session, so a terminal Ctrl+C reaches only the CLI, which then
+    # stops the gateway gracefully with SIGTERM instead of gunicorn's quick exit
+    try:
+        os.setsid()
+    except OSError:
+        pass
+    GatewayApplication().run()
+
+
+def start_gateway(
+    port: int = 5000,
+    private_key: str = "",
+    prewarm=None,
+    server: str = "dev",
+    workers: int = GATEWAY_WORKERS,
+    threads: int = GATEWAY_THREADS,
+    worker_timeout: int = GATEWAY_WORKER_TIMEOUT,
+    keepalive: int = GATEWAY_KEEPALIVE,
+    rpc_timeout: float = GATEWAY_RPC_TIMEOUT,
+):
+    """
+    Serve the key gateway with Flask's development server (``server="dev"``)
+    or gunicorn (``server="gunicorn"``, multi-process with thread pools).
+    ``prewarm`` is an optional multiprocessing queue on which the listener
+    publishes (intent_id, employer) for its own confirmed submissions, so
+    their key requests never touch the chain. ``rpc_timeout`` bounds each
+    chain read a key request makes; a lookup that times out answers 504.
+    """
     global _WORKER_PRIVATE_KEY
     _WORKER_PRIVATE_KEY = private_key
+    w3.provider = Web3.HTTPProvider(RPC_URL, session=_session, request_kwargs={"timeout": rpc_timeout})
+
+    if server == "gunicorn":
+        try:
+            import gunicorn  # noqa: F401  (optional dependency)
+        except ImportError:
+            print("[!] gunicorn not installed (pip install gunicorn) — falling back to the development server")
+        else:
+            print(f"[*] x.402 key gateway listening on port {port} "
+                  f"(gunicorn, {workers} workers × {threads} threads)")
+            _serve_gunicorn(port, prewarm, workers, threads, worker_timeout, keepalive)
+            return
+
+    if prewarm is not None:
+        _start_prewarm(prewarm)
     print(f"[*] x.402 key gateway listening on port {port}")
     app.run(host="0.0.0.0", port=port, use_reloader=False)
 